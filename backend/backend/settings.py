@@ -4,6 +4,7 @@ Django settings for backend project.
 Generated by 'django-admin startproject' using Django 5.2.8.
 """
 #password1234
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -40,6 +41,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'lms.routers.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -71,9 +73,54 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Read replica for the student read endpoints; only used when listed in
+    # LMS_READ_REPLICAS. Locally, `manage.py refresh_replica` copies the
+    # primary into this file.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('LMS_REPLICA_DB_PATH', BASE_DIR / 'db.replica.sqlite3'),
+    },
+}
+
+DATABASE_ROUTERS = ['lms.routers.ReadReplicaRouter']
+
+# Comma-separated DATABASES aliases, e.g. LMS_READ_REPLICAS=replica.
+LMS_READ_REPLICAS = [
+    alias for alias in os.environ.get('LMS_READ_REPLICAS', '').split(',') if alias
+]
+# After writing, a user reads from the primary for this long. Pins are kept
+# in this cache alias; with several workers it must be shared between them.
+LMS_REPLICA_PIN_SECONDS = 5
+LMS_REPLICA_PIN_CACHE_ALIAS = 'default'
+
+# LMS_DB_PROFILE=production tunes SQLite for concurrent workers:
+# - WAL lets readers run alongside the single writer.
+# - synchronous=NORMAL is durable across application crashes in WAL mode.
+# - busy_timeout makes writers queue instead of failing with "database is locked".
+# - BEGIN IMMEDIATE takes the write lock up front. Read-then-write transactions
+#   then wait in line instead of deadlocking on the lock upgrade.
+# Compare both profiles with `manage.py benchmark_sqlite`.
+LMS_DB_PROFILE = os.environ.get('LMS_DB_PROFILE', 'development')
+
+LMS_SQLITE_PRODUCTION_OPTIONS = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA busy_timeout=5000;'
+        'PRAGMA mmap_size=134217728;'
+    ),
+    'transaction_mode': 'IMMEDIATE',
 }
 
+if LMS_DB_PROFILE == 'production':
+    for database in DATABASES.values():
+        database.update({
+            'OPTIONS': LMS_SQLITE_PRODUCTION_OPTIONS,
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+        })
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -93,6 +140,17 @@ USE_TZ = True
 
 # Static files
 STATIC_URL = 'static/'
+
+# User uploads (profile images)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Media serving (lms/media.py). LMS_MEDIA_ACCEL hands files to the front
+# proxy: None, "x-accel-redirect" (nginx, internal location at
+# LMS_MEDIA_ACCEL_PREFIX) or "x-sendfile" (Apache, lighttpd).
+LMS_SERVE_MEDIA = True
+LMS_MEDIA_ACCEL = None
+LMS_MEDIA_ACCEL_PREFIX = '/protected-media/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
@@ -108,7 +166,7 @@ CORS_ALLOW_CREDENTIALS = True
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "lms.authentication.RoleClaimJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -120,8 +178,13 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": "lms.serializers.RoleTokenObtainPairSerializer",
 }
 
+# How long a user's token_version and active/exists state are cached before
+# tokens are re-checked against the database (changes in other processes).
+LMS_TOKEN_VERSION_CACHE_SECONDS = 60
+
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
@@ -133,3 +196,43 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+
+
+# Course notification fan-out (see lms/jobs.py)
+# Rows per bulk INSERT when the worker fans a notification out to a roster.
+LMS_NOTIFICATION_CHUNK_SIZE = 500
+# A RUNNING job without a heartbeat (one per committed chunk) for longer
+# than this is presumed dead and reclaimed by the next worker, which
+# resumes after its last chunk.
+LMS_NOTIFICATION_JOB_TIMEOUT_SECONDS = 600
+# Run jobs inside the request instead of waiting for run_notification_worker.
+LMS_RUN_JOBS_INLINE = False
+# "announcement" stores course-wide messages once and merges them into each
+# student's feed on read; "fanout" copies them per student via the worker.
+LMS_COURSE_NOTIFICATION_MODE = "announcement"
+
+# Notification event stream (lms/stream.py); serve it through backend.asgi.
+LMS_STREAM_KEEPALIVE_SECONDS = 20
+LMS_STREAM_QUEUE_SIZE = 100
+LMS_STREAM_MAX_CONNECTIONS = 10000
+
+# Profile images (lms/images.py). Thumbnails are written by a thread pool
+# after the upload commits, or inline with LMS_RUN_JOBS_INLINE.
+LMS_PROFILE_IMAGE_MAX_BYTES = 5 * 1024 * 1024
+LMS_IMAGE_WORKERS = 2
+
+# Retention applied by `manage.py prune_notifications`; 0 disables a limit.
+LMS_NOTIFICATION_MAX_AGE_DAYS = 365
+LMS_NOTIFICATION_MAX_PER_USER = 1000
+
+# Cache for versioned student read responses (see lms/cache.py). locmem is
+# per process; with several workers use a shared backend such as
+# "django.core.cache.backends.filebased.FileBasedCache".
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "lms",
+    },
+}
+LMS_RESPONSE_CACHE_ALIAS = "default"
+LMS_RESPONSE_CACHE_TIMEOUT = 300
@@ -14,11 +14,13 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.conf import settings              
-from django.conf.urls.static import static    
+from lms.media import serve_media
 from lms.views import RegisterView
 
 from django.http import JsonResponse
@@ -48,5 +50,9 @@ urlpatterns = [
     
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Uploads are served in every environment (see lms/media.py); point the
+# front proxy at MEDIA_ROOT or set LMS_MEDIA_ACCEL to keep bytes off Python.
+if getattr(settings, "LMS_SERVE_MEDIA", True):
+    urlpatterns += [
+        re_path(r"^%s(?P<path>.+)$" % re.escape(settings.MEDIA_URL.lstrip("/")), serve_media),
+    ]
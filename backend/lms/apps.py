@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class LmsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lms'
+
+    def ready(self):
+        # Connects the search index, course timestamp, completion counter,
+        # course progress and notification stream signal handlers.
+        from . import completion, progress, pubsub, search, signals  # noqa: F401
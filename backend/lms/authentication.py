@@ -0,0 +1,133 @@
+"""JWT authentication that authorizes from token claims.
+
+Access tokens carry the user's role and a ``token_version`` claim (see
+``RoleTokenObtainPairSerializer``). ``RoleClaimJWTAuthentication`` does not
+load the user row: ``request.user`` is a lazy object that only queries the
+database if a view actually needs more than the user id. Permission checks
+read the role claim and trust it only while its version still matches the
+profile's, so a role change takes effect on the next request.
+
+The checks simplejwt's ``get_user`` makes against the row (the user exists,
+is active, and the token is not revoked) run against a cached snapshot of
+``is_active`` and the password hash instead. Saving or deleting the user
+drops the snapshot; queryset updates are picked up once it expires.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+ROLE_CLAIM = "role"
+TOKEN_VERSION_CLAIM = "token_version"
+# Cached in place of the user state when the user does not exist.
+MISSING_USER = "missing"
+
+
+def _cache_timeout():
+    # Bounded TTL so processes with a local cache pick up changes made elsewhere.
+    return getattr(settings, "LMS_TOKEN_VERSION_CACHE_SECONDS", 60)
+
+
+def _version_cache_key(user_id):
+    return f"lms:token_version:{user_id}"
+
+
+def _user_state_cache_key(user_id):
+    return f"lms:user_state:{user_id}"
+
+
+def cache_token_version(user_id, version):
+    cache.set(_version_cache_key(user_id), version, _cache_timeout())
+
+
+def forget_user_state(user_id):
+    cache.delete(_user_state_cache_key(user_id))
+
+
+def user_state(user_id):
+    """Return ``(is_active, password_hash)`` for the user, or None if missing."""
+    key = _user_state_cache_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = (
+            get_user_model()
+            .objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list("is_active", "password")
+            .first()
+        )
+        state = (row[0], get_md5_hash_password(row[1])) if row else MISSING_USER
+        cache.set(key, state, _cache_timeout())
+    return None if state == MISSING_USER else tuple(state)
+
+
+def current_token_version(user_id):
+    version = cache.get(_version_cache_key(user_id))
+    if version is None:
+        from .models import Profile
+
+        version = (
+            Profile.objects.filter(user_id=user_id)
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        if version is None:
+            return None
+        cache_token_version(user_id, version)
+    return version
+
+
+def role_from_token(token):
+    """Return the token's role claim if it is still current, else None."""
+    if token is None or ROLE_CLAIM not in token:
+        return None
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if token.get(TOKEN_VERSION_CLAIM) != current_token_version(user_id):
+        return None
+    return token[ROLE_CLAIM]
+
+
+class LazyTokenUser(SimpleLazyObject):
+    """``request.user`` that knows its id without loading the row."""
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id):
+        user_model = get_user_model()
+        super().__init__(
+            lambda: user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        )
+        self.__dict__["pk"] = self.__dict__["id"] = user_id
+
+    def __bool__(self):
+        # IsAuthenticated truth-tests request.user; don't load the row for it.
+        return True
+
+
+class RoleClaimJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+        state = user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        is_active, password_hash = state
+        if api_settings.CHECK_USER_IS_ACTIVE and not is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if (
+            api_settings.CHECK_REVOKE_TOKEN
+            and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash
+        ):
+            raise AuthenticationFailed(
+                "The user's password has been changed.", code="password_changed"
+            )
+        return LazyTokenUser(user_id)
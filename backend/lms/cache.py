@@ -0,0 +1,161 @@
+"""Versioned response cache for the student read endpoints.
+
+Cached responses are keyed by version counters that the signals in
+``lms/signals.py`` bump whenever the underlying rows change, so a write
+invalidates exactly the responses that depend on it and nothing expires on
+a guess. Old entries are never read again and age out of the cache.
+
+With several worker processes, point ``LMS_RESPONSE_CACHE_ALIAS`` at a
+cache they share (file-based, Redis, ...); a per-process locmem cache
+cannot see bumps made by other workers.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .routers import pin_seconds, reading_from_replica, replica_aliases
+
+CATALOG = "catalog"
+
+
+def _cache():
+    return caches[getattr(settings, "LMS_RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _version_key(scope):
+    return f"lms:version:{scope}"
+
+
+def course_scope(course_id):
+    return f"course:{course_id}"
+
+
+def chapter_scope(chapter_id):
+    return f"chapter:{chapter_id}"
+
+
+def instructor_scope(user_id):
+    return f"instructor:{user_id}"
+
+
+def student_scope(user_id):
+    return f"student:{user_id}"
+
+
+def get_versions(scopes):
+    cache = _cache()
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        # Seed from the clock so an evicted counter never restarts at a
+        # value that older cached responses were stored under.
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def bump_versions(scopes):
+    """Bump the scopes now and again once the current transaction commits.
+
+    Until the writer commits, concurrent readers still see the old rows and
+    may cache them under the version bumped here; the bump on commit
+    orphans those entries. The immediate bump keeps reads later in the
+    writer's own transaction from hitting entries cached before the write.
+    """
+    scopes = list(scopes)
+    _bump(scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def _changed_key(scope):
+    return f"lms:changed:{scope}"
+
+
+def _bump(scopes):
+    cache = _cache()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    if replica_aliases():
+        # Marks the scopes as recently changed for as long as replicas may
+        # lag; see ``VersionedCacheMixin``.
+        cache.set_many({_changed_key(scope): True for scope in scopes}, pin_seconds())
+
+
+def changed_recently(scopes):
+    """True if any scope was bumped within the replica pin window."""
+    return bool(_cache().get_many([_changed_key(scope) for scope in scopes]))
+
+
+def chapter_course_id(chapter_id):
+    """Course id of a chapter, remembered so cache lookups skip the database."""
+    cache = _cache()
+    key = f"lms:chapter-course:{chapter_id}"
+    course_id = cache.get(key)
+    if course_id is None:
+        from .models import Chapter
+
+        course_id = (
+            Chapter.objects.filter(pk=chapter_id).values_list("course_id", flat=True).first()
+        )
+        if course_id is not None:
+            cache.set(key, course_id, None)
+    return course_id
+
+
+def forget_chapter(chapter_id):
+    _cache().delete(f"lms:chapter-course:{chapter_id}")
+
+
+class VersionedCacheMixin:
+    """Serve GET responses from the cache until one of their scopes changes.
+
+    Subclasses implement ``get_cache_scopes()``; returning None skips the
+    cache for that request. ``cache_per_user`` keeps separate entries per
+    user for responses that depend on who is asking.
+    """
+
+    cache_per_user = False
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def _response_cache_key(self, scopes):
+        versions = get_versions(scopes)
+        user_part = self.request.user.pk if self.cache_per_user else ""
+        raw = "|".join(
+            [type(self).__name__, self.request.get_full_path(), str(user_part)]
+            + [f"{scope}={version}" for scope, version in zip(scopes, versions)]
+        )
+        return "lms:response:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, request, *args, **kwargs):
+        scopes = self.get_cache_scopes()
+        if scopes is None:
+            return super().get(request, *args, **kwargs)
+
+        cache = _cache()
+        key = self._response_cache_key(scopes)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().get(request, *args, **kwargs)
+        # A replica may lag a recent write; its rows must not be stored as
+        # the current version until the pin window has passed.
+        if response.status_code == 200 and not (
+            reading_from_replica() and changed_recently(scopes)
+        ):
+            timeout = getattr(settings, "LMS_RESPONSE_CACHE_TIMEOUT", 300)
+            cache.set(key, response.data, timeout)
+        return response
@@ -0,0 +1,301 @@
+"""Materialized completion counters for instructor dashboards.
+
+``ChapterCompletionStats`` counts, per chapter, the progress rows that exist
+(students who opened it) and those that are completed.
+``CourseCompletionStats`` sums ``Enrollment.progress`` per course and counts
+the enrollments at 100%. Heartbeat ingestion applies deltas with a few
+UPDATE statements, so reading the counters never scans progress rows.
+
+Only enrolled students count. Progress rows outlive an enrollment, so a
+student who leaves and rejoins a course keeps their history, but leaving
+takes their rows out of the counters and rejoining puts them back, with
+one aggregate query per course however many students change (see
+``batched_enrollment_changes``). ``manage.py reconcile_completion_stats``
+recomputes every counter from the progress of current enrollments,
+reports drift and can repair it.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps as global_apps
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import (
+    ChapterCompletionStats, ChapterProgress, Course, CourseCompletionStats, Enrollment,
+)
+
+COMPLETE = 100
+# Students per aggregate query, below SQLite's bound-parameter limit.
+USER_CHUNK_SIZE = 500
+
+_pending_enrollments = ContextVar("lms_pending_enrollment_changes", default=None)
+
+
+def _increment(field, delta):
+    # Clamp at zero: a counter that has drifted low must not violate the
+    # unsigned CHECK constraint; reconciliation reports the drift instead.
+    return Greatest(F(field) + delta, Value(0))
+
+
+def apply_chapter_deltas(course_by_chapter, opened, completed):
+    """Count newly opened and newly completed chapters (sets of chapter ids)."""
+    touched = opened | completed
+    if not touched:
+        return
+    ChapterCompletionStats.objects.bulk_create(
+        [
+            ChapterCompletionStats(chapter_id=pk, course_id=course_by_chapter[pk])
+            for pk in touched
+        ],
+        ignore_conflicts=True,
+    )
+    # One UPDATE per distinct (opened, completed) delta, at most three.
+    groups = defaultdict(list)
+    for pk in touched:
+        groups[(int(pk in opened), int(pk in completed))].append(pk)
+    _update_chapter_counters(groups)
+
+
+def _update_chapter_counters(groups):
+    """Apply ``{(d_opened, d_completed): [chapter ids]}`` to the counters."""
+    for (d_opened, d_completed), ids in groups.items():
+        changes = {}
+        if d_opened:
+            changes["opened"] = _increment("opened", d_opened)
+        if d_completed:
+            changes["completed"] = _increment("completed", d_completed)
+        ChapterCompletionStats.objects.filter(chapter_id__in=ids).update(**changes)
+
+
+def apply_progress_changes(changes):
+    """Apply ``(course_id, old_progress, new_progress)`` enrollment changes."""
+    deltas = defaultdict(lambda: [0, 0])
+    for course_id, old, new in changes:
+        if old == new:
+            continue
+        deltas[course_id][0] += new - old
+        deltas[course_id][1] += int(new >= COMPLETE) - int(old >= COMPLETE)
+    if not deltas:
+        return
+    # Only gains need a row; removals (e.g. enrollments cascading from a
+    # course delete) must not recreate the stats of a course being deleted.
+    CourseCompletionStats.objects.bulk_create(
+        [
+            CourseCompletionStats(course_id=pk)
+            for pk, (d_sum, d_completed) in deltas.items()
+            if d_sum > 0 or d_completed > 0
+        ],
+        ignore_conflicts=True,
+    )
+    for course_id, (d_sum, d_completed) in deltas.items():
+        CourseCompletionStats.objects.filter(course_id=course_id).update(
+            progress_sum=_increment("progress_sum", d_sum),
+            completed_students=_increment("completed_students", d_completed),
+        )
+
+
+def apply_enrollment_changes(course_id, user_ids, sign):
+    """Count (``sign=1``) or uncount (``sign=-1``) the chapter progress of
+    students joining or leaving a course; return True if any had progress.
+    """
+    user_ids = list(user_ids)
+    counts = defaultdict(lambda: [0, 0])
+    for start in range(0, len(user_ids), USER_CHUNK_SIZE):
+        rows = (
+            ChapterProgress.objects.filter(
+                course_id=course_id, user_id__in=user_ids[start:start + USER_CHUNK_SIZE]
+            )
+            .values("chapter_id")
+            .annotate(
+                opened=Count("id"),
+                completed=Count("id", filter=Q(completed_at__isnull=False)),
+            )
+            .order_by()
+        )
+        for row in rows:
+            counts[row["chapter_id"]][0] += row["opened"]
+            counts[row["chapter_id"]][1] += row["completed"]
+    groups = defaultdict(list)
+    for chapter_id, (opened, completed) in counts.items():
+        groups[(sign * opened, sign * completed)].append(chapter_id)
+    if not groups:
+        return False
+    if sign > 0:
+        ChapterCompletionStats.objects.bulk_create(
+            [
+                ChapterCompletionStats(chapter_id=pk, course_id=course_id)
+                for ids in groups.values() for pk in ids
+            ],
+            ignore_conflicts=True,
+        )
+    _update_chapter_counters(groups)
+    return True
+
+
+def enrollments_changed(course_id, user_ids, sign):
+    """Record students joining (``sign=1``) or leaving (``sign=-1``) a course."""
+    pending = _pending_enrollments.get()
+    if pending is not None:
+        pending["students"][(course_id, sign)].update(user_ids)
+    elif apply_enrollment_changes(course_id, user_ids, sign) and sign > 0:
+        # A returning student's completed chapters count again.
+        from .progress import recompute_course_progress
+
+        recompute_course_progress(course_id)
+
+
+@contextmanager
+def batched_enrollment_changes():
+    """Apply the counter changes of enrollments added or removed inside the
+    block with one aggregate query per course, instead of one per row.
+
+    Only for blocks that keep the students' progress rows, e.g. roster syncs.
+    """
+    pending = {"students": defaultdict(set), "progress": []}
+    token = _pending_enrollments.set(pending)
+    try:
+        yield
+    finally:
+        _pending_enrollments.reset(token)
+    for (course_id, sign), user_ids in pending["students"].items():
+        enrollments_changed(course_id, user_ids, sign)
+    apply_progress_changes(pending["progress"])
+
+
+@receiver(pre_delete, sender=Enrollment)
+def uncount_enrollment_chapters(sender, instance, **kwargs):
+    # Before the delete, so a user deletion still finds the progress rows
+    # it is about to cascade to.
+    enrollments_changed(instance.course_id, [instance.user_id], -1)
+
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment_chapters(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        enrollments_changed(instance.course_id, [instance.user_id], 1)
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def count_added_students(sender, instance, action, reverse, pk_set, **kwargs):
+    # ``course.students.add()`` inserts through rows without post_save.
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        for course_id in pk_set:
+            enrollments_changed(course_id, [instance.pk], 1)
+    else:
+        enrollments_changed(instance.pk, pk_set, 1)
+
+
+@receiver(post_delete, sender=Enrollment)
+def forget_enrollment_progress(sender, instance, **kwargs):
+    if instance.progress:
+        change = (instance.course_id, instance.progress, 0)
+        pending = _pending_enrollments.get()
+        if pending is not None:
+            pending["progress"].append(change)
+        else:
+            apply_progress_changes([change])
+
+
+def _expected_chapter_stats(apps, using):
+    ChapterProgress = apps.get_model("lms", "ChapterProgress")
+    Enrollment = apps.get_model("lms", "Enrollment")
+    enrolled = Enrollment.objects.filter(
+        user_id=OuterRef("user_id"), course_id=OuterRef("course_id")
+    )
+    rows = (
+        ChapterProgress.objects.using(using)
+        .filter(Exists(enrolled))
+        .values("chapter_id", "course_id")
+        .annotate(
+            opened=Count("id"),
+            completed=Count("id", filter=Q(completed_at__isnull=False)),
+        )
+        .order_by()
+    )
+    return {
+        row["chapter_id"]: (row["course_id"], row["opened"], row["completed"])
+        for row in rows
+    }
+
+
+def _expected_course_stats(apps, using):
+    Enrollment = apps.get_model("lms", "Enrollment")
+    rows = (
+        Enrollment.objects.using(using)
+        .values("course_id")
+        .annotate(
+            progress_sum=Sum("progress"),
+            completed_students=Count("id", filter=Q(progress__gte=COMPLETE)),
+        )
+        .order_by()
+    )
+    return {
+        row["course_id"]: (row["progress_sum"] or 0, row["completed_students"])
+        for row in rows
+    }
+
+
+def reconcile(fix=False, apps=global_apps, using=DEFAULT_DB_ALIAS):
+    """Compare every counter with a full recount; return the drifted values.
+
+    Each drift is a dict with ``kind``, ``id``, ``field``, ``stored`` and
+    ``expected``. With ``fix`` the stored counters are replaced by the
+    recounted ones.
+    """
+    chapter_stats_model = apps.get_model("lms", "ChapterCompletionStats")
+    course_stats_model = apps.get_model("lms", "CourseCompletionStats")
+    drift = []
+
+    expected = _expected_chapter_stats(apps, using)
+    stored = {
+        row.chapter_id: row for row in chapter_stats_model.objects.using(using).all()
+    }
+    chapter_rows = []
+    for pk in expected.keys() | stored.keys():
+        course_id, opened, completed = expected.get(pk, (None, 0, 0))
+        row = stored.get(pk) or chapter_stats_model(chapter_id=pk, course_id=course_id)
+        for field, value in (("opened", opened), ("completed", completed)):
+            if getattr(row, field) != value:
+                drift.append({"kind": "chapter", "id": pk, "field": field,
+                              "stored": getattr(row, field), "expected": value})
+                setattr(row, field, value)
+        chapter_rows.append(row)
+
+    expected = _expected_course_stats(apps, using)
+    stored = {
+        row.course_id: row for row in course_stats_model.objects.using(using).all()
+    }
+    course_rows = []
+    for pk in expected.keys() | stored.keys():
+        progress_sum, completed_students = expected.get(pk, (0, 0))
+        row = stored.get(pk) or course_stats_model(course_id=pk)
+        for field, value in (("progress_sum", progress_sum),
+                             ("completed_students", completed_students)):
+            if getattr(row, field) != value:
+                drift.append({"kind": "course", "id": pk, "field": field,
+                              "stored": getattr(row, field), "expected": value})
+                setattr(row, field, value)
+        course_rows.append(row)
+
+    if fix:
+        for model, rows, fields in (
+            (chapter_stats_model, chapter_rows, ["opened", "completed"]),
+            (course_stats_model, course_rows, ["progress_sum", "completed_students"]),
+        ):
+            manager = model.objects.using(using)
+            # Missing rows only need creating when they would not be all zero.
+            manager.bulk_create(
+                [row for row in rows
+                 if row._state.adding and any(getattr(row, f) for f in fields)],
+                ignore_conflicts=True,
+            )
+            manager.bulk_update([row for row in rows if not row._state.adding], fields)
+    return drift
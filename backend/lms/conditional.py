@@ -0,0 +1,42 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified support for read-only list and detail views.
+
+    Subclasses implement ``get_validators()`` returning ``(last_modified,
+    version)`` from a cheap query, typically a timestamp aggregate. The ETag
+    also covers the full path and the user, so query parameters and
+    per-user results get their own validators. A 304 is returned before the
+    main query runs or anything is serialized.
+    """
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def _etag(self, version):
+        raw = f"{self.request.get_full_path()}|{self.request.user.pk}|{version}"
+        return quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        last_modified, version = self.get_validators()
+        if version is None:
+            return super().get(request, *args, **kwargs)
+
+        etag = self._etag(version)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if not 200 <= response.status_code < 300:
+                return response
+
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        # Responses are per-user; let the browser keep them but revalidate.
+        response["Cache-Control"] = "private, no-cache"
+        return response
@@ -0,0 +1,167 @@
+"""Profile image uploads and their avatar thumbnails.
+
+An upload is validated and fully decoded once, in the request, and stored
+under a content-hashed name. The decoded image is handed to a small thread
+pool that writes square thumbnails in every size and format after the
+transaction commits, so the request never pays for resizing. Thumbnail
+names derive from the original's hash, so every URL is immutable.
+
+``manage.py generate_thumbnails`` rebuilds missing thumbnails, e.g. for
+images uploaded before this pipeline or lost when a worker restarted.
+"""
+
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Profile
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = (32, 96, 256)
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+ALLOWED_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+# Bounds the decoded size; Pillow's own bomb check only warns below 2x this.
+MAX_PIXELS = 40_000_000
+
+_executor = None
+
+
+class ImageUploadError(ValueError):
+    """The upload is not an acceptable image; the message is user-facing."""
+
+
+def _max_upload_bytes():
+    return getattr(settings, "LMS_PROFILE_IMAGE_MAX_BYTES", 5 * 1024 * 1024)
+
+
+def decode_image(data):
+    """Open and fully decode image bytes, returning ``(image, format)``."""
+    try:
+        image = Image.open(io.BytesIO(data))
+        image_format = image.format
+        if image_format not in ALLOWED_FORMATS:
+            raise ImageUploadError("Upload a JPEG, PNG, WebP or GIF image.")
+        if image.width * image.height > MAX_PIXELS:
+            raise ImageUploadError("Image dimensions are too large.")
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ImageUploadError("The file is not a readable image.")
+    # Respect camera orientation before anything is cropped.
+    return ImageOps.exif_transpose(image), image_format
+
+
+def _directory(digest):
+    return f"profiles/{digest[:2]}/{digest}"
+
+
+def thumbnail_name(original_name, size, fmt):
+    return f"{os.path.dirname(original_name)}/{size}.{fmt}"
+
+
+def _render(image, size, fmt):
+    pil_format, options = THUMBNAIL_FORMATS[fmt]
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    thumb = ImageOps.fit(image.convert("RGBA" if has_alpha else "RGB"), (size, size), Image.LANCZOS)
+    if fmt == "jpeg" and has_alpha:
+        # JPEG has no alpha channel; flatten transparent avatars onto white.
+        background = Image.new("RGB", thumb.size, "white")
+        background.paste(thumb, mask=thumb.getchannel("A"))
+        thumb = background
+    buffer = io.BytesIO()
+    thumb.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate_thumbnails(profile_id, original_name, image):
+    """Write every thumbnail of ``original_name`` and record their names.
+
+    The profile is only updated if it still points at the same original,
+    so a slow job cannot overwrite the thumbnails of a newer upload.
+    """
+    thumbnails = {}
+    for size in THUMBNAIL_SIZES:
+        for fmt in THUMBNAIL_FORMATS:
+            name = thumbnail_name(original_name, size, fmt)
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(_render(image, size, fmt)))
+            thumbnails.setdefault(str(size), {})[fmt] = name
+    Profile.objects.filter(pk=profile_id, image=original_name).update(
+        image_thumbnails=thumbnails
+    )
+    return thumbnails
+
+
+def _run_in_background(profile_id, original_name, image):
+    try:
+        generate_thumbnails(profile_id, original_name, image)
+    except Exception:
+        logger.exception("Thumbnail generation failed for %s", original_name)
+    finally:
+        close_old_connections()
+
+
+def _schedule_thumbnails(profile_id, original_name, image):
+    global _executor
+    if getattr(settings, "LMS_RUN_JOBS_INLINE", False):
+        generate_thumbnails(profile_id, original_name, image)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "LMS_IMAGE_WORKERS", 2),
+            thread_name_prefix="lms-thumbnails",
+        )
+    transaction.on_commit(
+        lambda: _executor.submit(_run_in_background, profile_id, original_name, image)
+    )
+
+
+def _store_original(data, image_format):
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{_directory(digest)}/original.{ALLOWED_FORMATS[image_format]}"
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def save_profile_image(profile, upload):
+    """Validate ``upload``, store it and queue its thumbnails."""
+    if upload.size > _max_upload_bytes():
+        raise ImageUploadError("Image is too large.")
+    data = upload.read()
+    image, image_format = decode_image(data)
+    name = _store_original(data, image_format)
+
+    profile.image.name = name
+    profile.image_thumbnails = {}
+    profile.save(update_fields=["image", "image_thumbnails"])
+    _schedule_thumbnails(profile.pk, name, image)
+    return profile
+
+
+def rebuild_thumbnails(profile):
+    """Regenerate ``profile``'s thumbnails in the calling thread.
+
+    Images stored before this pipeline are first moved to a content-hashed
+    name so their thumbnails get a directory of their own.
+    """
+    with default_storage.open(profile.image.name, "rb") as handle:
+        data = handle.read()
+    image, image_format = decode_image(data)
+    name = _store_original(data, image_format)
+    if name != profile.image.name:
+        Profile.objects.filter(pk=profile.pk).update(image=name)
+        profile.image.name = name
+    profile.image_thumbnails = generate_thumbnails(profile.pk, name, image)
+    return profile
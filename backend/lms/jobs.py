@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Enrollment, Notification, NotificationJob
+from .pubsub import publish_notifications
+
+
+def _chunk_size():
+    return getattr(settings, "LMS_NOTIFICATION_CHUNK_SIZE", 500)
+
+
+def _job_timeout():
+    return timedelta(seconds=getattr(settings, "LMS_NOTIFICATION_JOB_TIMEOUT_SECONDS", 600))
+
+
+class _JobReclaimed(Exception):
+    """Another worker reclaimed the job and has moved its cursor on."""
+
+
+def enqueue_course_notification(course, created_by, title, message):
+    """Queue a notification for every student of ``course``.
+
+    The row is picked up by the ``run_notification_worker`` command, so the
+    request only pays for a single INSERT.
+    """
+    job = NotificationJob.objects.create(
+        course=course,
+        created_by=created_by,
+        title=title,
+        message=message,
+    )
+    if getattr(settings, "LMS_RUN_JOBS_INLINE", False):
+        run_job(job)
+    return job
+
+
+def claim_next_job():
+    """Mark the oldest runnable job as running and return it, or None.
+
+    Runnable means pending, or running without a heartbeat for more than
+    ``LMS_NOTIFICATION_JOB_TIMEOUT_SECONDS``, i.e. its worker died.
+    """
+    now = timezone.now()
+    candidate = (
+        NotificationJob.objects.filter(
+            Q(status="PENDING")
+            | Q(status="RUNNING", heartbeat_at__lt=now - _job_timeout())
+        )
+        .order_by("id")
+        .values_list("id", "status", "heartbeat_at")
+        .first()
+    )
+    if candidate is None:
+        return None
+    job_id, status, heartbeat_at = candidate
+    # Conditional update so two workers never run (or reclaim) the same job.
+    claimed = NotificationJob.objects.filter(
+        id=job_id, status=status, heartbeat_at=heartbeat_at
+    ).update(
+        status="RUNNING",
+        started_at=Coalesce("started_at", Value(now)),
+        heartbeat_at=now,
+    )
+    if not claimed:
+        return None
+    return NotificationJob.objects.get(id=job_id)
+
+
+def run_job(job, chunk_size=None):
+    """Fan a job out to the course roster with one bulk INSERT per chunk.
+
+    Each chunk commits on its own, together with the job's cursor, so the
+    SQLite write lock is only held for the duration of a single batch and a
+    reclaimed job resumes after the last committed chunk.
+    """
+    chunk_size = chunk_size or _chunk_size()
+    enrollments = Enrollment.objects.filter(course_id=job.course_id).order_by("id")
+    NotificationJob.objects.filter(id=job.id).update(
+        status="RUNNING",
+        total=job.sent + enrollments.filter(id__gt=job.last_enrollment_id).count(),
+        started_at=job.started_at or timezone.now(),
+        heartbeat_at=timezone.now(),
+    )
+
+    try:
+        while True:
+            rows = list(
+                enrollments.filter(id__gt=job.last_enrollment_id)
+                .values_list("id", "user_id")[:chunk_size]
+            )
+            if not rows:
+                break
+            _write_batch(job, [user_id for _, user_id in rows], rows[-1][0])
+    except _JobReclaimed:
+        job.refresh_from_db()
+        return job
+    except Exception as exc:
+        NotificationJob.objects.filter(id=job.id).update(
+            status="FAILED", error=str(exc), finished_at=timezone.now()
+        )
+        raise
+
+    NotificationJob.objects.filter(id=job.id).update(
+        status="DONE", finished_at=timezone.now()
+    )
+    job.refresh_from_db()
+    return job
+
+
+def _write_batch(job, user_ids, last_enrollment_id):
+    with transaction.atomic():
+        # Move the cursor first, and only from where this worker left it: if
+        # the job was reclaimed meanwhile, the chunk is not sent twice.
+        # The heartbeat keeps a long-running job from looking abandoned.
+        moved = NotificationJob.objects.filter(
+            id=job.id, last_enrollment_id=job.last_enrollment_id
+        ).update(
+            sent=job.sent + len(user_ids),
+            last_enrollment_id=last_enrollment_id,
+            heartbeat_at=timezone.now(),
+        )
+        if not moved:
+            raise _JobReclaimed
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(user_id=user_id, title=job.title, message=job.message)
+                for user_id in user_ids
+            ]
+        )
+        publish_notifications(notifications)
+    job.sent += len(user_ids)
+    job.last_enrollment_id = last_enrollment_id
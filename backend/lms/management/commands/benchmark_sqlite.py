@@ -0,0 +1,170 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# "development" mirrors Django's defaults: a rollback journal, deferred
+# transactions and a new connection per request.
+PROFILES = {
+    "development": {"init_command": "", "transaction_mode": "DEFERRED", "persistent": False},
+}
+
+
+def _production_profile():
+    options = getattr(settings, "LMS_SQLITE_PRODUCTION_OPTIONS", {})
+    return {
+        "init_command": options.get("init_command", ""),
+        "transaction_mode": options.get("transaction_mode") or "DEFERRED",
+        "persistent": True,
+    }
+
+
+def _connect(path, profile):
+    conn = sqlite3.connect(path, isolation_level=None)
+    for pragma in profile["init_command"].split(";"):
+        if pragma.strip():
+            conn.execute(pragma)
+    return conn
+
+
+def _seed(path, courses, students):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE enrollment ("
+        " id INTEGER PRIMARY KEY, course_id INTEGER NOT NULL,"
+        " user_id INTEGER NOT NULL, enrolled_at REAL NOT NULL);"
+        "CREATE INDEX enrollment_course ON enrollment (course_id, enrolled_at);"
+    )
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO enrollment (course_id, user_id, enrolled_at) VALUES (?, ?, ?)",
+        ((c, s, now) for c in range(courses) for s in range(students)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _worker(kind, path, profile, deadline, courses, results):
+    conn = _connect(path, profile) if profile["persistent"] else None
+    ops = errors = 0
+    latencies = []
+    n = os.getpid()
+    while time.time() < deadline:
+        n += 1
+        course_id = n % courses
+        started = time.perf_counter()
+        request_conn = conn or _connect(path, profile)
+        try:
+            if kind == "read":
+                request_conn.execute(
+                    "SELECT user_id, enrolled_at FROM enrollment WHERE course_id = ? "
+                    "ORDER BY enrolled_at DESC LIMIT 24",
+                    [course_id],
+                ).fetchall()
+            else:
+                # A join: check the roster, then insert, in one transaction.
+                request_conn.execute(f"BEGIN {profile['transaction_mode']}")
+                try:
+                    request_conn.execute(
+                        "SELECT COUNT(*) FROM enrollment WHERE course_id = ?", [course_id]
+                    ).fetchone()
+                    request_conn.execute(
+                        "INSERT INTO enrollment (course_id, user_id, enrolled_at) "
+                        "VALUES (?, ?, ?)",
+                        [course_id, n, time.time()],
+                    )
+                    request_conn.execute("COMMIT")
+                except sqlite3.OperationalError:
+                    request_conn.execute("ROLLBACK")
+                    raise
+            ops += 1
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            errors += 1
+        finally:
+            if conn is None:
+                request_conn.close()
+    if conn is not None:
+        conn.close()
+    results.put((kind, ops, errors, latencies))
+
+
+def _run(profile, readers, writers, duration, courses, students):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        _seed(path, courses, students)
+        if profile["init_command"]:
+            # journal_mode=WAL is stored in the file; set it before workers start.
+            _connect(path, profile).close()
+
+        results = multiprocessing.Queue()
+        deadline = time.time() + duration
+        procs = [
+            multiprocessing.Process(
+                target=_worker, args=(kind, path, profile, deadline, courses, results)
+            )
+            for kind in ["read"] * readers + ["write"] * writers
+        ]
+        for proc in procs:
+            proc.start()
+        totals = {kind: {"ops": 0, "errors": 0, "latencies": []} for kind in ("read", "write")}
+        for _ in procs:
+            kind, ops, errors, latencies = results.get()
+            totals[kind]["ops"] += ops
+            totals[kind]["errors"] += errors
+            totals[kind]["latencies"] += latencies
+        for proc in procs:
+            proc.join()
+    return totals
+
+
+def _p95(latencies):
+    if not latencies:
+        return 0.0
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent SQLite reads and writes under the development "
+        "profile and LMS_SQLITE_PRODUCTION_OPTIONS, on a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4, help="Reader processes.")
+        parser.add_argument("--writers", type=int, default=4, help="Writer processes.")
+        parser.add_argument(
+            "--duration", type=float, default=5.0, help="Seconds to run each profile."
+        )
+        parser.add_argument("--courses", type=int, default=50)
+        parser.add_argument("--students", type=int, default=200)
+
+    def handle(self, *args, **options):
+        profiles = dict(PROFILES, production=_production_profile())
+        self.stdout.write(
+            f"{'profile':<12} {'reads/s':>9} {'writes/s':>9} {'read p95':>10} "
+            f"{'write p95':>10} {'locked':>7}"
+        )
+        for name, profile in profiles.items():
+            totals = _run(
+                profile,
+                options["readers"],
+                options["writers"],
+                options["duration"],
+                options["courses"],
+                options["students"],
+            )
+            reads, writes = totals["read"], totals["write"]
+            self.stdout.write(
+                f"{name:<12} "
+                f"{reads['ops'] / options['duration']:>9.0f} "
+                f"{writes['ops'] / options['duration']:>9.0f} "
+                f"{_p95(reads['latencies']):>8.1f}ms "
+                f"{_p95(writes['latencies']):>8.1f}ms "
+                f"{reads['errors'] + writes['errors']:>7}"
+            )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from lms.models import Course
+from lms.transfer import export_course_lines
+
+
+class Command(BaseCommand):
+    help = "Export a course and its chapters as NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_id", type=int)
+        parser.add_argument(
+            "-o", "--output", help="File to write to (defaults to stdout)."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(id=options["course_id"])
+        except Course.DoesNotExist:
+            raise CommandError(f"Course {options['course_id']} does not exist")
+
+        if not options["output"]:
+            for line in export_course_lines(course):
+                self.stdout.write(line, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8") as out:
+            out.writelines(export_course_lines(course))
+        self.stderr.write(self.style.SUCCESS(f"Exported course {course.id} to {options['output']}"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from lms.images import ImageUploadError, rebuild_thumbnails
+from lms.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Generate missing profile image thumbnails in this process."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Process every profile image, not only those without thumbnails.",
+        )
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.exclude(image="").exclude(image__isnull=True).order_by("id")
+        if not options["all"]:
+            profiles = profiles.filter(image_thumbnails={})
+
+        done = failed = 0
+        for profile in profiles.iterator():
+            try:
+                rebuild_thumbnails(profile)
+            except (ImageUploadError, OSError) as exc:
+                failed += 1
+                self.stderr.write(f"profile {profile.pk} ({profile.image.name}): {exc}")
+                continue
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f"Generated thumbnails for {done} profiles."))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} images could not be processed."))
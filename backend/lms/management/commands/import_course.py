@@ -0,0 +1,45 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from lms.models import Course
+from lms.transfer import TransferError, import_course_lines
+
+
+class Command(BaseCommand):
+    help = "Import an NDJSON course export as a new course or into an existing one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file produced by export_course.")
+        parser.add_argument(
+            "--instructor", required=True, help="Username that will own the course."
+        )
+        parser.add_argument(
+            "--course", type=int, help="Append the chapters to this existing course."
+        )
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            instructor = User.objects.get(username=options["instructor"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['instructor']} does not exist")
+
+        course = None
+        if options["course"] is not None:
+            try:
+                course = Course.objects.get(id=options["course"], instructor=instructor)
+            except Course.DoesNotExist:
+                raise CommandError(f"Course {options['course']} not found for {instructor.username}")
+
+        try:
+            # Binary, so a bad encoding is reported with its line number.
+            with open(options["path"], "rb") as stream:
+                course, created = import_course_lines(
+                    stream, instructor, course=course, batch_size=options["batch_size"]
+                )
+        except TransferError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {created} chapters into course {course.id}")
+        )
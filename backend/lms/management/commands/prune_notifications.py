@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+
+from lms.retention import NotificationArchive, RetentionPolicy, prune_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete notifications older than LMS_NOTIFICATION_MAX_AGE_DAYS or beyond "
+        "LMS_NOTIFICATION_MAX_PER_USER per user, in small rate-limited batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age-days", type=int, default=None,
+            help="Override LMS_NOTIFICATION_MAX_AGE_DAYS (0 disables).",
+        )
+        parser.add_argument(
+            "--max-per-user", type=int, default=None,
+            help="Override LMS_NOTIFICATION_MAX_PER_USER (0 disables).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Rows deleted per transaction."
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=0.1,
+            help="Seconds to pause between batches so other writers get the lock.",
+        )
+        parser.add_argument(
+            "--archive", default=None,
+            help="Append pruned rows to this gzip NDJSON file before deleting them.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report what would be pruned."
+        )
+
+    def handle(self, *args, **options):
+        policy = RetentionPolicy.from_settings()
+        if options["max_age_days"] is not None:
+            policy.max_age_days = options["max_age_days"]
+        if options["max_per_user"] is not None:
+            policy.max_per_user = options["max_per_user"]
+        if not policy.max_age_days and not policy.max_per_user:
+            self.stdout.write("No retention policy configured; nothing to prune.")
+            return
+
+        archive = None
+        if options["archive"] and not options["dry_run"]:
+            archive = NotificationArchive(options["archive"])
+        try:
+            counts = prune_notifications(
+                policy,
+                batch_size=options["batch_size"],
+                pause=options["sleep"],
+                archive=archive,
+                dry_run=options["dry_run"],
+            )
+        finally:
+            if archive is not None:
+                archive.close()
+
+        verb = "Would prune" if options["dry_run"] else "Pruned"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {counts['expired']} expired and {counts['overflow']} "
+                f"over-limit notifications."
+            )
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lms.completion import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recount the materialized completion counters and report any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Overwrite drifted counters with the recounted values.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = reconcile(fix=options["fix"])
+        for item in sorted(drift, key=lambda d: (d["kind"], d["id"], d["field"])):
+            self.stdout.write(
+                f"{item['kind']} {item['id']} {item['field']}: "
+                f"stored {item['stored']}, expected {item['expected']}"
+            )
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Completion counters are consistent."))
+        elif options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(drift)} drifted counters."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} drifted counters; rerun with --fix."))
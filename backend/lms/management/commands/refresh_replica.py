@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into a replica alias so the read "
+        "replica router can be tried locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="replica", help="Replica alias to overwrite.")
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        if alias == DEFAULT_DB_ALIAS or alias not in connections:
+            raise CommandError(f"Unknown replica alias {alias!r}.")
+        source, target = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if source.vendor != "sqlite" or target.vendor != "sqlite":
+            raise CommandError("refresh_replica only copies SQLite databases.")
+
+        source.ensure_connection()
+        target.ensure_connection()
+        # The online backup API copies a consistent snapshot page by page.
+        source.connection.backup(target.connection)
+        self.stdout.write(
+            self.style.SUCCESS(f"Copied {source.settings_dict['NAME']} to {alias}.")
+        )
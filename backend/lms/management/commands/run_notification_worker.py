@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from lms.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Process queued course notification jobs in the background."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help="Notifications per bulk INSERT (defaults to LMS_NOTIFICATION_CHUNK_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            try:
+                job = run_job(job, chunk_size=options["chunk_size"])
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f"Job {job.id} failed: {exc}"))
+                continue
+            self.stdout.write(
+                self.style.SUCCESS(f"Job {job.id} sent {job.sent}/{job.total} notifications")
+            )
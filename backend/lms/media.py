@@ -0,0 +1,176 @@
+"""Serve user uploads from MEDIA_ROOT outside of DEBUG.
+
+Files are returned as ``FileResponse`` so WSGI servers that provide
+``wsgi.file_wrapper`` (gunicorn, uWSGI) send them with ``sendfile``. The
+view answers conditional requests from the file's size and mtime, using
+the same ETag format as nginx so validators survive moving the bytes to a
+proxy, and serves single byte ranges for resumed or partial downloads.
+
+Paths with a 64-hex-digit component are content-addressed (see
+``lms/images.py``): their bytes never change, so they are cached for a year
+as ``immutable``. Anything else must be revalidated.
+
+With ``LMS_MEDIA_ACCEL`` set the view only resolves the file and hands it
+to the front proxy: ``"x-accel-redirect"`` for nginx, pointing at an
+``internal`` location mounted at ``LMS_MEDIA_ACCEL_PREFIX``, or
+``"x-sendfile"`` for Apache and lighttpd. The proxy then handles ranges
+and validators itself.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+IMMUTABLE_PATH = re.compile(r"(^|/)[0-9a-f]{64}/")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+ENCODED_CONTENT_TYPES = {
+    "br": "application/x-brotli",
+    "bzip2": "application/x-bzip",
+    "compress": "application/x-compress",
+    "gzip": "application/gzip",
+    "xz": "application/x-xz",
+}
+
+
+def is_immutable(path):
+    return IMMUTABLE_PATH.search(path) is not None
+
+
+def _etag(stat):
+    return quote_etag(f"{int(stat.st_mtime):x}-{stat.st_size:x}")
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` inclusive for a single byte range.
+
+    ``None`` means serve the whole file: no header, a malformed one, or
+    several ranges, which RFC 9110 lets a server ignore. Raises
+    ``ValueError`` when the range cannot be satisfied.
+    """
+    match = RANGE_HEADER.match(header.replace(" ", "")) if header else None
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the final ``last`` bytes.
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError
+    return start, end
+
+
+def _range_applies(request, etag, last_modified):
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        # Only a strong, exact match may resume a download.
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+class _FileRange:
+    """File-like view of ``length`` bytes starting at ``start``.
+
+    It has no ``fileno`` on purpose: a server's file wrapper would
+    otherwise send everything up to the end of the file.
+    """
+
+    def __init__(self, handle, start, length):
+        handle.seek(start)
+        self._handle = handle
+        self._remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._handle.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._handle.close()
+
+
+def _accel_response(path, full_path, content_type):
+    mode = getattr(settings, "LMS_MEDIA_ACCEL", None)
+    response = HttpResponse(content_type=content_type)
+    if mode == "x-accel-redirect":
+        prefix = getattr(settings, "LMS_MEDIA_ACCEL_PREFIX", "/protected-media/")
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(path)
+    elif mode == "x-sendfile":
+        response["X-Sendfile"] = full_path
+    else:
+        raise ValueError(f"Unknown LMS_MEDIA_ACCEL mode: {mode!r}")
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("File not found")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    # As FileResponse does: serve compressed files as archives so clients
+    # do not transparently decode them.
+    content_type = ENCODED_CONTENT_TYPES.get(encoding, content_type) or "application/octet-stream"
+    cache_control = IMMUTABLE_CACHE_CONTROL if is_immutable(path) else REVALIDATE_CACHE_CONTROL
+
+    if getattr(settings, "LMS_MEDIA_ACCEL", None):
+        response = _accel_response(path, full_path, content_type)
+        response["Cache-Control"] = cache_control
+        return response
+
+    etag = _etag(stat)
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        size = stat.st_size
+        try:
+            byte_range = None
+            if _range_applies(request, etag, last_modified):
+                byte_range = parse_range(request.headers.get("Range"), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        handle = open(full_path, "rb")
+        if byte_range is None:
+            response = FileResponse(handle, content_type=content_type)
+        else:
+            start, end = byte_range
+            response = FileResponse(
+                _FileRange(handle, start, end - start + 1),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Length"] = end - start + 1
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Accept-Ranges"] = "bytes"
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = cache_control
+    return response
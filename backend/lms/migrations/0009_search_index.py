@@ -0,0 +1,106 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:20
+
+from django.db import migrations
+
+# Frozen copy of the lms.search FTS5 schema and indexing, and of the
+# lms.plate text extraction, as of this migration; later changes to the
+# live modules must not change what this migration does.
+FTS_TABLE = "lms_search_index"
+CREATE_FTS_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "kind UNINDEXED, course_id UNINDEXED, title, body, "
+    "tokenize = 'porter unicode61')"
+)
+DROP_FTS_TABLE = f"DROP TABLE IF EXISTS {FTS_TABLE}"
+INSERT_ROW = (
+    f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, kind, course_id, title, body) "
+    "VALUES (%s, %s, %s, %s, %s)"
+)
+
+BLOCK_TYPES = {
+    "p", "h1", "h2", "h3", "h4", "h5", "h6",
+    "ul", "ul_list", "ol", "ol_list", "li", "list-item",
+    "blockquote", "code",
+}
+
+
+def _as_nodes(content):
+    if not content:
+        return []
+    if isinstance(content, dict):
+        return [content]
+    if isinstance(content, str):
+        return [{"text": content}]
+    if isinstance(content, list):
+        return content
+    return []
+
+
+def _children(node):
+    children = node.get("children")
+    return children if isinstance(children, list) else []
+
+
+def plate_to_text(content):
+    lines = []
+    current = []
+
+    def walk(node):
+        if not isinstance(node, dict):
+            return
+        if "text" in node:
+            current.append(str(node.get("text") or ""))
+            return
+        for child in _children(node):
+            walk(child)
+        if node.get("type", "p") in BLOCK_TYPES and current:
+            lines.append("".join(current))
+            current.clear()
+
+    for node in _as_nodes(content):
+        walk(node)
+    if current:
+        lines.append("".join(current))
+    return "\n".join(line for line in lines if line.strip())
+
+
+
+def build_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    using = schema_editor.connection.alias
+    Course = apps.get_model("lms", "Course")
+    Chapter = apps.get_model("lms", "Chapter")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_FTS_TABLE)
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        # Courses and chapters interleave rowids: id * 2 and id * 2 + 1.
+        for course in Course.objects.using(using).iterator():
+            cursor.execute(
+                INSERT_ROW,
+                [course.id * 2, "course", course.id, course.title, course.description or ""],
+            )
+        for chapter in Chapter.objects.using(using).filter(is_public=True).iterator():
+            parts = [chapter.summary or "", plate_to_text(chapter.content)]
+            cursor.execute(
+                INSERT_ROW,
+                [chapter.id * 2 + 1, "chapter", chapter.course_id, chapter.title,
+                 "\n".join(p for p in parts if p)],
+            )
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(DROP_FTS_TABLE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0008_course_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:45
+
+import hashlib
+import json
+import re
+
+from django.db import migrations, models
+
+
+# Frozen copy of the lms.plate helpers as of this migration; later changes
+# to the live module must not change what this migration does.
+def _as_nodes(content):
+    if not content:
+        return []
+    if isinstance(content, dict):
+        return [content]
+    if isinstance(content, str):
+        return [{"text": content}]
+    if isinstance(content, list):
+        return content
+    return []
+
+
+def _children(node):
+    children = node.get("children")
+    return children if isinstance(children, list) else []
+
+
+def content_digest(content):
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+BLOCK_TAGS = {
+    "h1": "h1", "h2": "h2", "h3": "h3", "h4": "h4", "h5": "h5", "h6": "h6",
+    "ul": "ul", "ul_list": "ul",
+    "ol": "ol", "ol_list": "ol",
+    "li": "li", "list-item": "li",
+    "blockquote": "blockquote",
+}
+MARK_TAGS = (
+    ("bold", "strong"),
+    ("italic", "em"),
+    ("underline", "u"),
+    ("code", "code"),
+    ("strikethrough", "del"),
+)
+SAFE_URL_SCHEMES = {"http", "https", "mailto"}
+IGNORED_URL_CHARS = re.compile(r"[\x00-\x20\x7f]")
+URL_SCHEME = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*):")
+
+
+def _safe_url(url):
+    if not isinstance(url, str) or not url:
+        return "#"
+    match = URL_SCHEME.match(IGNORED_URL_CHARS.sub("", url))
+    if match and match.group(1).lower() not in SAFE_URL_SCHEMES:
+        return "#"
+    return url
+
+
+def _escape_html(value):
+    return (
+        value.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+        .replace("'", "&#39;")
+    )
+
+
+def _escape_attr(value):
+    return (
+        str(value).replace("&", "&amp;").replace('"', "&quot;").replace("'", "&#39;")
+    )
+
+
+def _node_to_html(node):
+    if not isinstance(node, dict):
+        return ""
+    if "text" in node:
+        text = _escape_html(str(node.get("text") or ""))
+        for mark, tag in MARK_TAGS:
+            if node.get(mark):
+                text = f"<{tag}>{text}</{tag}>"
+        return text
+
+    node_type = node.get("type") or "p"
+    inner = "".join(_node_to_html(child) for child in _children(node))
+    if node_type in BLOCK_TAGS:
+        tag = BLOCK_TAGS[node_type]
+        return f"<{tag}>{inner}</{tag}>"
+    if node_type == "code":
+        return f"<pre><code>{inner}</code></pre>"
+    if node_type == "a":
+        url = _safe_url(node.get("url") or node.get("href"))
+        return (
+            f'<a href="{_escape_attr(url)}" target="_blank" '
+            f'rel="noopener noreferrer">{inner}</a>'
+        )
+    return f"<p>{inner}</p>"
+
+
+def plate_to_html(content):
+    return "".join(_node_to_html(node) for node in _as_nodes(content))
+
+
+def render_existing_chapters(apps, schema_editor):
+    Chapter = apps.get_model("lms", "Chapter")
+    for chapter in Chapter.objects.using(schema_editor.connection.alias).iterator():
+        chapter.content_html = plate_to_html(chapter.content)
+        chapter.content_hash = content_digest(chapter.content)
+        chapter.save(update_fields=["content_html", "content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapter',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='chapter',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(render_existing_chapters, migrations.RunPython.noop),
+    ]
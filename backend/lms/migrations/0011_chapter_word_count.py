@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:05
+
+from django.db import migrations, models
+
+# Frozen copy of the lms.plate helpers as of this migration; later changes
+# to the live module must not change what this migration does.
+BLOCK_TYPES = {
+    "p", "h1", "h2", "h3", "h4", "h5", "h6",
+    "ul", "ul_list", "ol", "ol_list", "li", "list-item",
+    "blockquote", "code",
+}
+
+
+def _as_nodes(content):
+    if not content:
+        return []
+    if isinstance(content, dict):
+        return [content]
+    if isinstance(content, str):
+        return [{"text": content}]
+    if isinstance(content, list):
+        return content
+    return []
+
+
+def _children(node):
+    children = node.get("children")
+    return children if isinstance(children, list) else []
+
+
+def plate_to_text(content):
+    lines = []
+    current = []
+
+    def walk(node):
+        if not isinstance(node, dict):
+            return
+        if "text" in node:
+            current.append(str(node.get("text") or ""))
+            return
+        for child in _children(node):
+            walk(child)
+        if node.get("type", "p") in BLOCK_TYPES and current:
+            lines.append("".join(current))
+            current.clear()
+
+    for node in _as_nodes(content):
+        walk(node)
+    if current:
+        lines.append("".join(current))
+    return "\n".join(line for line in lines if line.strip())
+
+
+def word_count(content):
+    return len(plate_to_text(content).split())
+
+
+def count_existing_chapters(apps, schema_editor):
+    Chapter = apps.get_model("lms", "Chapter")
+    for chapter in Chapter.objects.using(schema_editor.connection.alias).iterator():
+        chapter.word_count = word_count(chapter.content)
+        chapter.save(update_fields=["word_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0010_chapter_rendered_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapter',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_existing_chapters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0013_profile_token_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChapterProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opened_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_seen_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('percent_scrolled', models.PositiveSmallIntegerField(default=0)),
+                ('time_spent', models.PositiveIntegerField(default=0, help_text='Seconds')),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('chapter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='lms.chapter')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chapter_progress', to='lms.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chapter_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'course'], name='progress_user_course_idx')],
+                'unique_together': {('user', 'chapter')},
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+
+# Frozen copy of the counting done by lms.completion.reconcile as of this
+# migration; later changes to the live module must not change what this
+# migration does.
+COMPLETE = 100
+
+
+def count_existing_progress(apps, schema_editor):
+    using = schema_editor.connection.alias
+    ChapterProgress = apps.get_model("lms", "ChapterProgress")
+    Enrollment = apps.get_model("lms", "Enrollment")
+    ChapterCompletionStats = apps.get_model("lms", "ChapterCompletionStats")
+    CourseCompletionStats = apps.get_model("lms", "CourseCompletionStats")
+
+    # Only progress of students still enrolled in the course counts.
+    enrolled = Enrollment.objects.filter(
+        user_id=OuterRef("user_id"), course_id=OuterRef("course_id")
+    )
+    chapter_rows = (
+        ChapterProgress.objects.using(using)
+        .filter(Exists(enrolled))
+        .values("chapter_id", "course_id")
+        .annotate(
+            opened=Count("id"),
+            completed=Count("id", filter=Q(completed_at__isnull=False)),
+        )
+        .order_by()
+    )
+    ChapterCompletionStats.objects.using(using).bulk_create(
+        ChapterCompletionStats(
+            chapter_id=row["chapter_id"], course_id=row["course_id"],
+            opened=row["opened"], completed=row["completed"],
+        )
+        for row in chapter_rows
+    )
+
+    course_rows = (
+        Enrollment.objects.using(using)
+        .values("course_id")
+        .annotate(
+            progress_sum=Sum("progress"),
+            completed_students=Count("id", filter=Q(progress__gte=COMPLETE)),
+        )
+        .order_by()
+    )
+    CourseCompletionStats.objects.using(using).bulk_create(
+        CourseCompletionStats(
+            course_id=row["course_id"], progress_sum=row["progress_sum"] or 0,
+            completed_students=row["completed_students"],
+        )
+        for row in course_rows
+        if row["progress_sum"] or row["completed_students"]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0014_chapter_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseCompletionStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='completion_stats', serialize=False, to='lms.course')),
+                ('progress_sum', models.PositiveIntegerField(default=0)),
+                ('completed_students', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChapterCompletionStats',
+            fields=[
+                ('chapter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='completion_stats', serialize=False, to='lms.chapter')),
+                ('opened', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chapter_completion_stats', to='lms.course')),
+            ],
+        ),
+        migrations.RunPython(count_existing_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0016_notification_read_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='image_thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0017_profile_image_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationjob',
+            name='last_enrollment_id',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:55
+
+from django.db import migrations, models
+
+
+def seed_heartbeats(apps, schema_editor):
+    # Running jobs have not beaten yet; time them out from their start.
+    NotificationJob = apps.get_model("lms", "NotificationJob")
+    NotificationJob.objects.using(schema_editor.connection.alias).filter(
+        status="RUNNING"
+    ).update(heartbeat_at=models.F("started_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0019_course_title_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(seed_heartbeats, migrations.RunPython.noop),
+    ]
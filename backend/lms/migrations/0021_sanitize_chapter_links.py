@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:10
+
+import html
+import re
+
+from django.db import migrations
+
+# Frozen copy of lms.plate.safe_url as of this migration.
+SAFE_URL_SCHEMES = {"http", "https", "mailto"}
+IGNORED_URL_CHARS = re.compile(r"[\x00-\x20\x7f]")
+URL_SCHEME = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*):")
+HREF = re.compile(r'<a href="([^"]*)"')
+
+
+def _is_safe(url):
+    match = URL_SCHEME.match(IGNORED_URL_CHARS.sub("", url))
+    return not match or match.group(1).lower() in SAFE_URL_SCHEMES
+
+
+def _sanitize_href(match):
+    # Check the URL as the browser decodes it from the attribute.
+    if _is_safe(html.unescape(match.group(1))):
+        return match.group(0)
+    return '<a href="#"'
+
+
+def sanitize_rendered_links(apps, schema_editor):
+    Chapter = apps.get_model("lms", "Chapter")
+    chapters = Chapter.objects.using(schema_editor.connection.alias).filter(
+        content_html__contains="<a href="
+    )
+    for chapter in chapters.only("id", "content_html").iterator():
+        sanitized = HREF.sub(_sanitize_href, chapter.content_html)
+        if sanitized != chapter.content_html:
+            chapter.content_html = sanitized
+            chapter.save(update_fields=["content_html"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0020_notificationjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(sanitize_rendered_links, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+from .plate import content_digest, plate_to_html, word_count
 
 
 class Profile(models.Model):
@@ -14,10 +17,34 @@ class Profile(models.Model):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="STUDENT")
     full_name = models.CharField(max_length=255, blank=True)
     image = models.ImageField(upload_to="profiles/", blank=True, null=True)
+    # {"<size>": {"webp": name, "jpeg": name}}, filled in by lms/images.py.
+    image_thumbnails = models.JSONField(default=dict, blank=True)
+    # Bumped on every role change so role claims in older JWTs stop being trusted.
+    token_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.user.username} - {self.role}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_role = instance.__dict__.get("role")
+        return instance
+
+    def save(self, *args, **kwargs):
+        saved_role = getattr(self, "_saved_role", None)
+        if saved_role is not None and saved_role != self.role:
+            self.token_version += 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "token_version"}
+        super().save(*args, **kwargs)
+        self._saved_role = self.role
+        if saved_role != self.role:
+            from .authentication import cache_token_version
+
+            cache_token_version(self.user_id, self.token_version)
+
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
@@ -25,6 +52,14 @@ def create_profile(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
 
 
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_auth_state(sender, instance, **kwargs):
+    from .authentication import forget_user_state
+
+    forget_user_state(instance.pk)
+
+
 class Course(models.Model):
     instructor = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="courses"
@@ -32,14 +67,51 @@ class Course(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     students = models.ManyToManyField(
-        User, related_name="enrolled_courses", blank=True
+        User, related_name="enrolled_courses", blank=True, through="Enrollment"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also bumped when the course's chapters change (see lms/signals.py),
+    # so it versions the chapters served for the course.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="course_created_idx"),
+            models.Index(fields=["title", "id"], name="course_title_idx"),
+            models.Index(
+                fields=["instructor", "created_at", "id"], name="course_instructor_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class Enrollment(models.Model):
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="enrollments"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="enrollments"
+    )
+    enrolled_at = models.DateTimeField(default=timezone.now)
+    grade = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        # Keeps the table of the former auto-created M2M so no data moves.
+        db_table = "lms_course_students"
+        unique_together = [("course", "user")]
+        indexes = [
+            models.Index(fields=["course", "enrolled_at"], name="enroll_course_enrolled_idx"),
+            models.Index(fields=["course", "grade"], name="enroll_course_grade_idx"),
+            models.Index(fields=["course", "progress"], name="enroll_course_progress_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.course_id}"
+
+
 class Chapter(models.Model):
     course = models.ForeignKey(
         Course, on_delete=models.CASCADE, related_name="chapters"
@@ -50,6 +122,11 @@ class Chapter(models.Model):
     is_public = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Server-side render of ``content``, refreshed only when its hash changes.
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    content_html = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["order", "id"]
@@ -57,14 +134,178 @@ class Chapter(models.Model):
     def __str__(self):
         return f"{self.course.title} - {self.title}"
 
+    def render_content(self):
+        """Re-render ``content_html`` if ``content`` changed; return True if it did."""
+        digest = content_digest(self.content)
+        if digest == self.content_hash:
+            return False
+        self.content_html = plate_to_html(self.content)
+        self.word_count = word_count(self.content)
+        self.content_hash = digest
+        return True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_is_public = instance.__dict__.get("is_public")
+        return instance
+
+    @property
+    def is_public_changed(self):
+        """True if the last save changed ``is_public`` (valid in post_save)."""
+        return getattr(self, "_previous_is_public", None) != self.is_public
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            if self.render_content() and update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields, "content_hash", "content_html", "word_count"
+                }
+        self._previous_is_public = getattr(self, "_saved_is_public", None)
+        super().save(*args, **kwargs)
+        self._saved_is_public = self.is_public
+
+
+class ChapterProgress(models.Model):
+    """One student's progress through one chapter, written by heartbeats."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="chapter_progress")
+    chapter = models.ForeignKey(Chapter, on_delete=models.CASCADE, related_name="progress")
+    # Denormalized from the chapter for per-course progress queries.
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="chapter_progress")
+    opened_at = models.DateTimeField(default=timezone.now)
+    last_seen_at = models.DateTimeField(default=timezone.now)
+    percent_scrolled = models.PositiveSmallIntegerField(default=0)
+    time_spent = models.PositiveIntegerField(default=0, help_text="Seconds")
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [("user", "chapter")]
+        indexes = [
+            models.Index(fields=["user", "course"], name="progress_user_course_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} on {self.chapter_id}: {self.percent_scrolled}%"
+
+
+class ChapterCompletionStats(models.Model):
+    """Materialized per-chapter counters, maintained by ``lms/completion.py``."""
+
+    chapter = models.OneToOneField(
+        Chapter, on_delete=models.CASCADE, primary_key=True, related_name="completion_stats"
+    )
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="chapter_completion_stats"
+    )
+    opened = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.chapter_id}: {self.completed}/{self.opened}"
+
+
+class CourseCompletionStats(models.Model):
+    """Materialized sums over a course's ``Enrollment.progress`` values."""
+
+    course = models.OneToOneField(
+        Course, on_delete=models.CASCADE, primary_key=True, related_name="completion_stats"
+    )
+    progress_sum = models.PositiveIntegerField(default=0)
+    completed_students = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.course_id}: {self.completed_students} completed"
+
 
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
     title = models.CharField(max_length=255)
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"], name="notif_user_created_idx"),
+            # Partial index: unread counts only touch the (few) unread rows.
+            models.Index(
+                fields=["user"],
+                condition=models.Q(read_at__isnull=True),
+                name="notif_user_unread_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
-    
-    
+
+
+class Announcement(models.Model):
+    """A course-wide message stored once and merged into each student's feed on read."""
+
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="announcements"
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="announcements"
+    )
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["course", "created_at"], name="announce_course_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.course.title} - {self.title}"
+
+
+class AnnouncementCursor(models.Model):
+    """Per-user read position: announcements created up to ``last_read_at`` are read."""
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="announcement_cursor"
+    )
+    last_read_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.last_read_at}"
+
+
+class NotificationJob(models.Model):
+    STATUS_CHOICES = (
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    )
+
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="notification_jobs"
+    )
+    created_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="notification_jobs"
+    )
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    # Id of the last enrollment fanned out; a reclaimed job resumes after it.
+    last_enrollment_id = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed with every committed chunk; a stale heartbeat means the
+    # worker died and the job may be reclaimed.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "id"], name="notifjob_status_idx")]
+
+    def __str__(self):
+        return f"{self.course_id} - {self.title} ({self.status})"
@@ -0,0 +1,86 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination, CursorPagination, PageNumberPagination, _positive_int,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class RosterPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class CatalogCursorPagination(CursorPagination):
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+    def get_ordering(self, request, queryset, view):
+        # Views may offer a choice of orderings (e.g. ``?ordering=``).
+        get_ordering = getattr(view, "get_ordering", None)
+        return get_ordering() if get_ordering is not None else self.ordering
+
+
+class FeedCursorPagination(BasePagination):
+    """Keyset pagination over the notification feed.
+
+    The feed is a UNION of two tables, so the queryset cannot be filtered
+    after the fact the way DRF's CursorPagination does. Instead the view
+    passes the decoded ``(created_at, kind, id)`` position down into the
+    feed query and hands back ``page_size + 1`` rows to detect a next page.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            created_at, kind, pk = urlsafe_b64decode(encoded.encode("ascii")).decode("ascii").split("|")
+            position = (parse_datetime(created_at), kind, int(pk))
+        except (BinasciiError, UnicodeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, item):
+        raw = f"{item['created_at'].isoformat()}|{item['kind']}|{item['id']}"
+        return urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+    def paginate_rows(self, rows, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.next_item = rows[page_size - 1] if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.next_item is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_item))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
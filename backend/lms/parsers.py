@@ -0,0 +1,42 @@
+import codecs
+import csv
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+ENROLL = "enroll"
+UNENROLL = "unenroll"
+HEADER_CELLS = {"id", "user", "user_id", "username"}
+
+
+class EnrollmentCSVParser(BaseParser):
+    """Parse a roster CSV into ``{"enroll": [...], "unenroll": [...]}``.
+
+    Each row is ``identifier[,action]``: a numeric identifier is a user id,
+    anything else a username, and the action defaults to ``enroll``. An
+    optional header row is skipped.
+    """
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        result = {ENROLL: [], UNENROLL: []}
+        try:
+            reader = csv.reader(codecs.iterdecode(stream, encoding))
+            for number, row in enumerate(reader, start=1):
+                cells = [cell.strip() for cell in row]
+                if not cells or not cells[0]:
+                    continue
+                if number == 1 and cells[0].lower() in HEADER_CELLS:
+                    continue
+                action = (cells[1].lower() if len(cells) > 1 and cells[1] else ENROLL)
+                if action not in result:
+                    raise ParseError(f"Row {number}: unknown action {cells[1]!r}")
+                identifier = int(cells[0]) if cells[0].isdigit() else cells[0]
+                result[action].append(identifier)
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f"CSV parse error - {exc}")
+        return result
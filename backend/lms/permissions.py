@@ -1,9 +1,10 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
+from .authentication import role_from_token
 
 
 def _get_role(request):
     try:
-        role = request.user.profile.role
+        role = role_from_token(request.auth) or request.user.profile.role
         if isinstance(role, str):
             return role.upper()
     except Exception:
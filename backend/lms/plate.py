@@ -0,0 +1,155 @@
+"""Helpers for the Plate editor JSON stored in ``Chapter.content``."""
+
+import hashlib
+import json
+import re
+
+# Node types rendered as blocks; their text is separated by newlines.
+BLOCK_TYPES = {
+    "p", "h1", "h2", "h3", "h4", "h5", "h6",
+    "ul", "ul_list", "ol", "ol_list", "li", "list-item",
+    "blockquote", "code",
+}
+
+
+def _as_nodes(content):
+    if not content:
+        return []
+    if isinstance(content, dict):
+        return [content]
+    if isinstance(content, str):
+        return [{"text": content}]
+    if isinstance(content, list):
+        return content
+    # Numbers, booleans and other scalars carry no nodes.
+    return []
+
+
+def _children(node):
+    children = node.get("children")
+    return children if isinstance(children, list) else []
+
+
+def plate_to_text(content):
+    """Return the plain text of a Plate node tree, one line per block."""
+    lines = []
+    current = []
+
+    def walk(node):
+        if not isinstance(node, dict):
+            return
+        if "text" in node:
+            current.append(str(node.get("text") or ""))
+            return
+        for child in _children(node):
+            walk(child)
+        if node.get("type", "p") in BLOCK_TYPES and current:
+            lines.append("".join(current))
+            current.clear()
+
+    for node in _as_nodes(content):
+        walk(node)
+    if current:
+        lines.append("".join(current))
+    return "\n".join(line for line in lines if line.strip())
+
+
+def word_count(content):
+    return len(plate_to_text(content).split())
+
+
+def content_digest(content):
+    """Stable SHA-256 of a node tree, used to skip re-rendering unchanged content."""
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# Port of plateNodesToHtml in frontend/src/lib/plateSerializer.js; keep the
+# two in sync so server and client rendering produce the same markup.
+BLOCK_TAGS = {
+    "h1": "h1", "h2": "h2", "h3": "h3", "h4": "h4", "h5": "h5", "h6": "h6",
+    "ul": "ul", "ul_list": "ul",
+    "ol": "ol", "ol_list": "ol",
+    "li": "li", "list-item": "li",
+    "blockquote": "blockquote",
+}
+
+# Applied innermost first, in the same order as the frontend renderer.
+MARK_TAGS = (
+    ("bold", "strong"),
+    ("italic", "em"),
+    ("underline", "u"),
+    ("code", "code"),
+    ("strikethrough", "del"),
+)
+
+
+def _escape_html(value):
+    return (
+        value.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+        .replace("'", "&#39;")
+    )
+
+
+SAFE_URL_SCHEMES = {"http", "https", "mailto"}
+# Browsers drop ASCII whitespace and control characters inside a URL
+# scheme, so "java\tscript:" must be treated as "javascript:".
+_IGNORED_URL_CHARS = re.compile(r"[\x00-\x20\x7f]")
+_URL_SCHEME = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*):")
+
+
+def safe_url(url):
+    """Return ``url`` if it is relative or http(s)/mailto, else ``"#"``."""
+    if not isinstance(url, str) or not url:
+        return "#"
+    match = _URL_SCHEME.match(_IGNORED_URL_CHARS.sub("", url))
+    if match and match.group(1).lower() not in SAFE_URL_SCHEMES:
+        return "#"
+    return url
+
+
+def _escape_attr(value):
+    # Escaping "&" keeps entities such as "&colon;" from being decoded
+    # into the URL after ``safe_url`` has checked it.
+    return (
+        str(value).replace("&", "&amp;").replace('"', "&quot;").replace("'", "&#39;")
+    )
+
+
+def _leaf_to_html(leaf):
+    text = _escape_html(str(leaf.get("text") or ""))
+    for mark, tag in MARK_TAGS:
+        if leaf.get(mark):
+            text = f"<{tag}>{text}</{tag}>"
+    return text
+
+
+def _node_to_html(node):
+    if not isinstance(node, dict):
+        return ""
+    if "text" in node:
+        return _leaf_to_html(node)
+
+    node_type = node.get("type") or "p"
+    inner = "".join(_node_to_html(child) for child in _children(node))
+
+    if node_type in BLOCK_TAGS:
+        tag = BLOCK_TAGS[node_type]
+        return f"<{tag}>{inner}</{tag}>"
+    if node_type == "code":
+        return f"<pre><code>{inner}</code></pre>"
+    if node_type == "a":
+        url = safe_url(node.get("url") or node.get("href"))
+        return (
+            f'<a href="{_escape_attr(url)}" target="_blank" '
+            f'rel="noopener noreferrer">{inner}</a>'
+        )
+    return f"<p>{inner}</p>"
+
+
+def plate_to_html(content):
+    """Render a Plate node tree to HTML."""
+    return "".join(_node_to_html(node) for node in _as_nodes(content))
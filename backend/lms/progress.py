@@ -0,0 +1,210 @@
+"""Chapter progress from batched client heartbeats.
+
+Clients buffer scroll and time events and post them in batches. A batch is
+coalesced in memory to one update per chapter, so however many events a
+student sends, ingesting them costs one SELECT of the affected progress
+rows plus at most one bulk INSERT and one bulk UPDATE. The completion
+counters in ``lms/completion.py`` are adjusted in the same transaction.
+
+``Enrollment.progress`` is a percentage of the course's public chapters, so
+every enrollment in a course is recomputed when a chapter is added, deleted
+or published/unpublished.
+"""
+
+from dataclasses import dataclass
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .completion import apply_chapter_deltas, apply_progress_changes
+from .models import Chapter, ChapterProgress, Enrollment
+
+COMPLETE_PERCENT = 100
+# Attempts at a batch that loses a race to create the same progress row.
+HEARTBEAT_ATTEMPTS = 2
+
+
+@dataclass
+class CoalescedHeartbeat:
+    chapter_id: int
+    percent_scrolled: int = 0
+    seconds: int = 0
+    completed: bool = False
+    first_at: object = None
+    last_at: object = None
+
+
+def coalesce(events):
+    """Merge raw events into one ``CoalescedHeartbeat`` per chapter.
+
+    Scroll depth keeps its maximum, time spent is summed and completion is
+    sticky.
+    """
+    merged = {}
+    for event in events:
+        at = event.get("at") or timezone.now()
+        beat = merged.get(event["chapter"])
+        if beat is None:
+            beat = merged[event["chapter"]] = CoalescedHeartbeat(
+                event["chapter"], first_at=at, last_at=at
+            )
+        beat.percent_scrolled = max(beat.percent_scrolled, event.get("scrolled", 0))
+        beat.seconds += event.get("seconds", 0)
+        beat.completed = beat.completed or event.get("completed", False)
+        beat.first_at = min(beat.first_at, at)
+        beat.last_at = max(beat.last_at, at)
+    for beat in merged.values():
+        if beat.percent_scrolled >= COMPLETE_PERCENT:
+            beat.completed = True
+    return merged
+
+
+def _readable_chapters(user, chapter_ids):
+    """``{chapter_id: course_id}`` for public chapters of the user's courses."""
+    return dict(
+        Chapter.objects.filter(
+            id__in=chapter_ids, is_public=True, course__enrollments__user_id=user.pk
+        ).values_list("id", "course_id")
+    )
+
+
+def update_course_progress(user, course_ids):
+    """Recompute ``Enrollment.progress`` (percent of public chapters completed).
+
+    Returns ``(course_id, old_progress, new_progress)`` for each enrollment.
+    """
+    done = dict(
+        ChapterProgress.objects.filter(
+            user_id=user.pk, course_id__in=course_ids,
+            completed_at__isnull=False, chapter__is_public=True,
+        )
+        .values("course_id")
+        .annotate(n=Count("id"))
+        .values_list("course_id", "n")
+    )
+    enrollments = list(
+        Enrollment.objects.filter(user_id=user.pk, course_id__in=course_ids)
+        .annotate(chapters=Count("course__chapters", filter=Q(course__chapters__is_public=True)))
+        .only("id", "course_id", "progress")
+    )
+    changes = []
+    for enrollment in enrollments:
+        old = enrollment.progress
+        enrollment.progress = _percent(done.get(enrollment.course_id, 0), enrollment.chapters)
+        changes.append((enrollment.course_id, old, enrollment.progress))
+    Enrollment.objects.bulk_update(enrollments, ["progress"])
+    return changes
+
+
+def _percent(done, total):
+    return round(100 * done / total) if total else 0
+
+
+def recompute_course_progress(course_id, batch_size=500):
+    """Recompute ``Enrollment.progress`` for every student in the course.
+
+    Costs three queries plus one UPDATE per batch of changed enrollments.
+    """
+    with transaction.atomic():
+        total = Chapter.objects.filter(course_id=course_id, is_public=True).count()
+        done = dict(
+            ChapterProgress.objects.filter(
+                course_id=course_id, completed_at__isnull=False, chapter__is_public=True,
+            )
+            .values("user_id")
+            .annotate(n=Count("id"))
+            .values_list("user_id", "n")
+        )
+        changed, changes = [], []
+        for enrollment in Enrollment.objects.filter(course_id=course_id).only(
+            "id", "user_id", "course_id", "progress"
+        ):
+            progress = _percent(done.get(enrollment.user_id, 0), total)
+            if progress != enrollment.progress:
+                changes.append((course_id, enrollment.progress, progress))
+                enrollment.progress = progress
+                changed.append(enrollment)
+        Enrollment.objects.bulk_update(changed, ["progress"], batch_size=batch_size)
+        apply_progress_changes(changes)
+    return changes
+
+
+@receiver(post_save, sender=Chapter)
+def recompute_progress_on_chapter_save(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and (created or instance.is_public_changed):
+        recompute_course_progress(instance.course_id)
+
+
+@receiver(post_delete, sender=Chapter)
+def recompute_progress_on_chapter_delete(sender, instance, **kwargs):
+    course_id = instance.course_id
+    # After commit, so a cascading course delete finds nothing to update.
+    transaction.on_commit(lambda: recompute_course_progress(course_id))
+
+
+def record_heartbeats(user, events):
+    """Apply a batch of heartbeat events for ``user`` and return a summary.
+
+    Events for chapters the user cannot read are ignored. If a concurrent
+    batch creates one of the same progress rows first, the batch is retried
+    and applied on top of it.
+    """
+    merged = coalesce(events)
+    for attempt in range(HEARTBEAT_ATTEMPTS):
+        try:
+            return _record(user, merged, len(events))
+        except IntegrityError:
+            if attempt == HEARTBEAT_ATTEMPTS - 1:
+                raise
+
+
+def _record(user, merged, event_count):
+    with transaction.atomic():
+        courses = _readable_chapters(user, list(merged))
+        existing = {
+            progress.chapter_id: progress
+            for progress in ChapterProgress.objects.select_for_update().filter(
+                user_id=user.pk, chapter_id__in=list(courses)
+            )
+        }
+
+        created, updated, completed_courses = [], [], set()
+        newly_completed = set()
+        for chapter_id, course_id in courses.items():
+            beat = merged[chapter_id]
+            progress = existing.get(chapter_id)
+            if progress is None:
+                progress = ChapterProgress(
+                    user_id=user.pk, chapter_id=chapter_id, course_id=course_id,
+                    opened_at=beat.first_at, last_seen_at=beat.last_at,
+                )
+                created.append(progress)
+            else:
+                updated.append(progress)
+            progress.percent_scrolled = max(progress.percent_scrolled, beat.percent_scrolled)
+            progress.time_spent += beat.seconds
+            progress.last_seen_at = max(progress.last_seen_at, beat.last_at)
+            if beat.completed and progress.completed_at is None:
+                progress.completed_at = beat.last_at
+                completed_courses.add(course_id)
+                newly_completed.add(chapter_id)
+
+        ChapterProgress.objects.bulk_create(created)
+        ChapterProgress.objects.bulk_update(
+            updated, ["percent_scrolled", "time_spent", "last_seen_at", "completed_at"]
+        )
+        apply_chapter_deltas(
+            courses, {progress.chapter_id for progress in created}, newly_completed
+        )
+        if completed_courses:
+            apply_progress_changes(update_course_progress(user, completed_courses))
+
+    return {
+        "events": event_count,
+        "chapters": len(courses),
+        "ignored": len(merged) - len(courses),
+        "completed": len(newly_completed),
+    }
@@ -0,0 +1,144 @@
+"""In-process pub/sub that feeds the notification event stream.
+
+Each open stream (see ``lms/stream.py``) subscribes to its user's channel
+and to one channel per enrolled course. The Notification and Announcement
+write paths publish after their transaction commits. Publishing may happen
+on any thread; events are handed to the subscriber's event loop with
+``call_soon_threadsafe`` and buffered in a small bounded queue, so an idle
+connection costs one queue and no database work.
+
+Only events published by this process reach its subscribers. Writes made
+elsewhere (another worker, ``run_notification_worker``) are not pushed;
+clients catch up by reading the feed with ``?since=`` when they reconnect
+or receive a ``resync`` event.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Announcement, Notification
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def course_channel(course_id):
+    return f"course:{course_id}"
+
+
+class Subscription:
+    def __init__(self, channels, loop, maxsize):
+        self.channels = frozenset(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        # Set when events were dropped because the client fell behind.
+        self.overflowed = False
+
+    def _deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = defaultdict(set)
+        self._count = 0
+
+    @property
+    def subscriber_count(self):
+        return self._count
+
+    def subscribe(self, channels, maxsize=None):
+        """Subscribe the running event loop; call from async code only."""
+        maxsize = maxsize or getattr(settings, "LMS_STREAM_QUEUE_SIZE", 100)
+        subscription = Subscription(channels, asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels[channel].add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+            self._count -= 1
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; its stream is going away.
+                pass
+
+
+broker = Broker()
+
+
+def notification_event(notification):
+    return {
+        "id": notification.id,
+        "kind": "notification",
+        "course": None,
+        "title": notification.title,
+        "message": notification.message,
+        "created_at": notification.created_at.isoformat(),
+        "is_read": notification.read_at is not None,
+    }
+
+
+def announcement_event(announcement):
+    return {
+        "id": announcement.id,
+        "kind": "announcement",
+        "course": announcement.course_id,
+        "title": announcement.title,
+        "message": announcement.message,
+        "created_at": announcement.created_at.isoformat(),
+        "is_read": False,
+    }
+
+
+def publish_notifications(notifications):
+    """Publish saved notifications once the current transaction commits.
+
+    ``bulk_create`` skips ``post_save``, so bulk writers call this directly.
+    """
+    events = [(user_channel(n.user_id), notification_event(n)) for n in notifications]
+
+    def send():
+        for channel, event in events:
+            broker.publish(channel, event)
+
+    if events:
+        transaction.on_commit(send)
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        publish_notifications([instance])
+
+
+@receiver(post_save, sender=Announcement)
+def publish_announcement(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        event = announcement_event(instance)
+        transaction.on_commit(lambda: broker.publish(course_channel(instance.course_id), event))
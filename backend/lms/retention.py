@@ -0,0 +1,135 @@
+"""Notification retention: delete what is too old or beyond a per-user cap.
+
+``prune_notifications`` walks the candidates in id or index order and
+deletes them in small batches, each in its own transaction, sleeping
+between batches so the SQLite write lock is never held for long and other
+writers get a turn. Rows can be appended to a gzip NDJSON archive before
+they are deleted.
+"""
+
+import gzip
+import json
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Notification
+
+ARCHIVE_FIELDS = ("id", "user_id", "title", "message", "created_at", "read_at")
+
+
+@dataclass
+class RetentionPolicy:
+    max_age_days: int = 0
+    max_per_user: int = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_age_days=getattr(settings, "LMS_NOTIFICATION_MAX_AGE_DAYS", 0),
+            max_per_user=getattr(settings, "LMS_NOTIFICATION_MAX_PER_USER", 0),
+        )
+
+
+class NotificationArchive:
+    """Append-only gzip NDJSON file; safe to reopen across runs."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def write(self, rows):
+        if self._file is None:
+            self._file = gzip.open(self.path, "at", encoding="utf-8")
+        for row in rows:
+            self._file.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+        # Rows must be on disk before they are deleted.
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _expired_batches(cutoff, batch_size):
+    last_id = 0
+    while True:
+        ids = list(
+            Notification.objects.filter(id__gt=last_id, created_at__lt=cutoff)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        last_id = ids[-1]
+        yield ids
+
+
+def _overflow_batches(max_per_user, batch_size):
+    over = (
+        Notification.objects.values("user_id")
+        .annotate(total=Count("id"))
+        .filter(total__gt=max_per_user)
+        .order_by("user_id")
+        .values_list("user_id", flat=True)
+    )
+    for user_id in list(over):
+        # The oldest notification the user keeps; everything older goes.
+        position = (
+            Notification.objects.filter(user_id=user_id)
+            .order_by("-created_at", "-id")
+            .values_list("created_at", "id")[max_per_user - 1:max_per_user]
+            .first()
+        )
+        while position is not None:
+            created_at, pk = position
+            rows = list(
+                Notification.objects.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk),
+                    user_id=user_id,
+                )
+                .order_by("-created_at", "-id")
+                .values_list("created_at", "id")[:batch_size]
+            )
+            if not rows:
+                break
+            position = rows[-1]
+            yield [pk for _, pk in rows]
+
+
+def prune_notifications(policy, batch_size=500, pause=0.1, archive=None, dry_run=False):
+    """Apply ``policy`` and return ``{"expired": n, "overflow": n}``.
+
+    With ``dry_run`` nothing is deleted or archived and the counts are what
+    would have been pruned; rows past both limits are counted under each.
+    """
+    counts = {"expired": 0, "overflow": 0}
+    sources = []
+    if policy.max_age_days:
+        cutoff = timezone.now() - timedelta(days=policy.max_age_days)
+        sources.append(("expired", _expired_batches(cutoff, batch_size)))
+    if policy.max_per_user:
+        sources.append(("overflow", _overflow_batches(policy.max_per_user, batch_size)))
+
+    for reason, batches in sources:
+        for ids in batches:
+            if dry_run:
+                counts[reason] += len(ids)
+                continue
+            with transaction.atomic():
+                if archive is not None:
+                    archive.write(
+                        Notification.objects.filter(id__in=ids)
+                        .order_by("id")
+                        .values(*ARCHIVE_FIELDS)
+                    )
+                deleted, _ = Notification.objects.filter(id__in=ids).delete()
+            counts[reason] += deleted
+            if pause:
+                time.sleep(pause)
+    return counts
@@ -0,0 +1,98 @@
+"""Bulk enrollment for roster syncs.
+
+Identifiers are user ids (ints) or usernames (strings). They are resolved
+in chunks, diffed against the course's existing enrollments, and only the
+missing through-rows are inserted with batched ``bulk_create``. Unlike a
+student joining a course, a bulk sync does not write a notification per
+student.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .completion import batched_enrollment_changes, enrollments_changed
+from .models import Enrollment
+from .signals import batched_course_touches, enrollments_touched
+
+# Stay well below SQLite's bound-parameter limit for ``IN (...)`` lookups.
+LOOKUP_CHUNK_SIZE = 500
+# Identifiers echoed back in ``not_found``; the count is always exact.
+MAX_REPORTED_MISSING = 100
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _is_id(identifier):
+    return isinstance(identifier, int) and not isinstance(identifier, bool)
+
+
+def resolve_users(identifiers):
+    """Map identifiers to user ids; return ``(user_ids, not_found)``."""
+    ids = {i for i in identifiers if _is_id(i)}
+    usernames = {i for i in identifiers if isinstance(i, str) and i}
+    found_ids, found_names = set(), {}
+    for chunk in _chunks(ids, LOOKUP_CHUNK_SIZE):
+        found_ids.update(User.objects.filter(pk__in=chunk).values_list("pk", flat=True))
+    for chunk in _chunks(usernames, LOOKUP_CHUNK_SIZE):
+        found_names.update(
+            User.objects.filter(username__in=chunk).values_list("username", "pk")
+        )
+    not_found = sorted(ids - found_ids) + sorted(usernames - set(found_names))
+    return found_ids | set(found_names.values()), not_found
+
+
+def _enrolled_user_ids(course_id, user_ids):
+    enrolled = set()
+    for chunk in _chunks(user_ids, LOOKUP_CHUNK_SIZE):
+        enrolled.update(
+            Enrollment.objects.filter(course_id=course_id, user_id__in=chunk)
+            .values_list("user_id", flat=True)
+        )
+    return enrolled
+
+
+def sync_enrollments(course, enroll=(), unenroll=(), batch_size=500):
+    """Enroll and unenroll users in one transaction and return a summary."""
+    enroll_ids, enroll_missing = resolve_users(enroll)
+    unenroll_ids, unenroll_missing = resolve_users(unenroll)
+    overlap = enroll_ids & unenroll_ids
+    if overlap:
+        raise ValueError("The same user cannot be both enrolled and unenrolled.")
+
+    with transaction.atomic(), batched_enrollment_changes():
+        already = _enrolled_user_ids(course.id, enroll_ids)
+        missing = sorted(enroll_ids - already)
+        Enrollment.objects.bulk_create(
+            [Enrollment(course_id=course.id, user_id=user_id) for user_id in missing],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        # bulk_create skips the signals that count returning students' progress.
+        enrollments_changed(course.id, missing, 1)
+
+        removed = 0
+        # Deleting fires signals per row; bump the cache versions and adjust
+        # the completion counters only once.
+        with batched_course_touches():
+            for chunk in _chunks(unenroll_ids, LOOKUP_CHUNK_SIZE):
+                _, counts = Enrollment.objects.filter(
+                    course_id=course.id, user_id__in=chunk
+                ).delete()
+                removed += counts.get(Enrollment._meta.label, 0)
+            if missing:
+                # bulk_create skips signals.
+                enrollments_touched((course.id, user_id) for user_id in missing)
+
+    not_found = enroll_missing + unenroll_missing
+    return {
+        "enrolled": len(missing),
+        "already_enrolled": len(already),
+        "unenrolled": removed,
+        "not_enrolled": len(unenroll_ids) - removed,
+        "not_found_count": len(not_found),
+        "not_found": not_found[:MAX_REPORTED_MISSING],
+    }
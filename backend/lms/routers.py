@@ -0,0 +1,140 @@
+"""Serve selected read-only endpoints from read replicas.
+
+Views opt in with ``ReplicaReadMixin``; while such a view handles a safe
+request, ``ReadReplicaRouter`` sends reads to one of ``LMS_READ_REPLICAS``.
+Every other query, and every write, stays on ``default``.
+
+Replicas lag the primary, so a user who has just written is pinned to the
+primary for ``LMS_REPLICA_PIN_SECONDS``. ``ReplicaPinMiddleware`` notices
+writes routed during a request and sets the pin once the response is ready.
+Keep replication lag well below the pin window. Pins live in the cache
+named by ``LMS_REPLICA_PIN_CACHE_ALIAS``; with several worker processes it
+must be a cache they share, or a pin set by one worker is invisible to the
+others.
+
+Responses read from a replica are only written to the response cache
+when none of their scopes changed within the pin window (see
+``VersionedCacheMixin``); otherwise they may lag the version they would
+be stored under.
+"""
+
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+_replica_reads = ContextVar("lms_replica_reads", default=False)
+_request_writes = ContextVar("lms_request_writes", default=None)
+
+
+def _pin_key(user_id):
+    return f"lms:replica-pin:{user_id}"
+
+
+def _pin_cache():
+    return caches[getattr(settings, "LMS_REPLICA_PIN_CACHE_ALIAS", "default")]
+
+
+def pin_seconds():
+    return getattr(settings, "LMS_REPLICA_PIN_SECONDS", 5)
+
+
+def pin_to_primary(user_id):
+    _pin_cache().set(_pin_key(user_id), True, pin_seconds())
+
+
+def is_pinned(user_id):
+    return user_id is not None and _pin_cache().get(_pin_key(user_id)) is not None
+
+
+def reading_from_replica():
+    """True while a ``ReplicaReadMixin`` view routes reads to a replica."""
+    return _replica_reads.get() and bool(replica_aliases())
+
+
+def replica_aliases():
+    return list(getattr(settings, "LMS_READ_REPLICAS", []))
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            aliases = replica_aliases()
+            if aliases:
+                return random.choice(aliases)
+        return None
+
+    def db_for_write(self, model, **hints):
+        writes = _request_writes.get()
+        if writes is not None:
+            writes.add(model._meta.label)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+
+class ReplicaReadMixin:
+    """Route this view's safe requests to a read replica.
+
+    Authentication and permission checks still read from the primary;
+    only the handler runs against the replica.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned(request.user.pk):
+            self._replica_token = _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaPinMiddleware:
+    """Pin users to the primary after a request of theirs wrote to it."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _pin(self, request, writes):
+        user = getattr(request, "user", None)
+        if writes and replica_aliases() and user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        writes = set()
+        token = _request_writes.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        self._pin(request, writes)
+        return response
+
+    async def __acall__(self, request):
+        writes = set()
+        token = _request_writes.set(writes)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        if writes:
+            # Resolving a session user may query the database.
+            await sync_to_async(self._pin)(request, writes)
+        return response
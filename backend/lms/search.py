@@ -0,0 +1,213 @@
+"""Full-text search over courses and chapters.
+
+The default backend keeps an SQLite FTS5 table in sync through model
+signals. Other databases fall back to a plain ``icontains`` scan, and
+``LMS_SEARCH_BACKEND`` can point at any class with the same interface.
+"""
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Chapter, Course
+from .plate import plate_to_text
+
+FTS_TABLE = "lms_search_index"
+
+CREATE_FTS_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "kind UNINDEXED, course_id UNINDEXED, title, body, "
+    "tokenize = 'porter unicode61')"
+)
+DROP_FTS_TABLE = f"DROP TABLE IF EXISTS {FTS_TABLE}"
+
+
+def course_document(course):
+    return {"title": course.title, "body": course.description or ""}
+
+
+def chapter_document(chapter):
+    parts = [chapter.summary or "", plate_to_text(chapter.content)]
+    return {"title": chapter.title, "body": "\n".join(p for p in parts if p)}
+
+
+def _match_expression(query):
+    # Quote every term so user input can never be parsed as FTS5 syntax;
+    # the last term is a prefix match to support search-as-you-type.
+    terms = ['"%s"' % term.replace('"', '""') for term in query.split()]
+    if not terms:
+        return None
+    terms[-1] += " *"
+    return " ".join(terms)
+
+
+class Fts5SearchBackend:
+    # Courses and chapters share one FTS table; rowids are interleaved so
+    # every object maps to a fixed row that can be replaced in place.
+    KIND_OFFSET = {"course": 0, "chapter": 1}
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def _rowid(self, kind, object_id):
+        return object_id * 2 + self.KIND_OFFSET[kind]
+
+    def _write(self, kind, object_id, course_id, document):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, kind, course_id, title, body) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                [self._rowid(kind, object_id), kind, course_id,
+                 document["title"], document["body"]],
+            )
+
+    def index_course(self, course):
+        self._write("course", course.id, course.id, course_document(course))
+
+    def index_chapter(self, chapter):
+        if not chapter.is_public:
+            self.remove("chapter", chapter.id)
+            return
+        self._write("chapter", chapter.id, chapter.course_id, chapter_document(chapter))
+
+    def remove(self, kind, object_id):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [self._rowid(kind, object_id)]
+            )
+
+    def rebuild(self, course_model=Course, chapter_model=Chapter):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(CREATE_FTS_TABLE)
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        for course in course_model.objects.using(self.using).iterator():
+            self.index_course(course)
+        chapters = chapter_model.objects.using(self.using).filter(is_public=True)
+        for chapter in chapters.iterator():
+            self.index_chapter(chapter)
+        with connections[self.using].cursor() as cursor:
+            # Merge the index b-trees written by the row-by-row inserts.
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+    def filter_courses(self, queryset, query):
+        """Restrict ``queryset`` to courses whose title or description match."""
+        expression = _match_expression(query)
+        if expression is None:
+            return queryset
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid / 2 FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND kind = 'course'",
+                [expression],
+            )
+        )
+
+    def search(self, query, limit=20):
+        expression = _match_expression(query)
+        if expression is None:
+            return []
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT kind, rowid, course_id, title, "
+                f"snippet({FTS_TABLE}, 3, '', '', '…', 16) "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, 0.0, 0.0, 5.0, 1.0) LIMIT %s",
+                [expression, limit],
+            )
+            rows = cursor.fetchall()
+        return [
+            {
+                "kind": kind,
+                "id": (rowid - self.KIND_OFFSET[kind]) // 2,
+                "course": int(course_id),
+                "title": title,
+                "snippet": snippet,
+            }
+            for kind, rowid, course_id, title, snippet in rows
+        ]
+
+
+class DatabaseSearchBackend:
+    """Unindexed fallback for databases without FTS5."""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def index_course(self, course):
+        pass
+
+    def index_chapter(self, chapter):
+        pass
+
+    def remove(self, kind, object_id):
+        pass
+
+    def rebuild(self, course_model=Course, chapter_model=Chapter):
+        pass
+
+    def filter_courses(self, queryset, query):
+        for term in query.split():
+            queryset = queryset.filter(
+                Q(title__icontains=term) | Q(description__icontains=term)
+            )
+        return queryset
+
+    def search(self, query, limit=20):
+        terms = query.split()
+        if not terms:
+            return []
+        course_q, chapter_q = Q(), Q()
+        for term in terms:
+            course_q &= Q(title__icontains=term) | Q(description__icontains=term)
+            chapter_q &= Q(title__icontains=term) | Q(summary__icontains=term)
+        courses = Course.objects.using(self.using).filter(course_q)[:limit]
+        chapters = (
+            Chapter.objects.using(self.using)
+            .filter(chapter_q, is_public=True)
+            .defer("content")[:limit]
+        )
+        results = [
+            {"kind": "course", "id": c.id, "course": c.id, "title": c.title,
+             "snippet": c.description[:200]}
+            for c in courses
+        ] + [
+            {"kind": "chapter", "id": c.id, "course": c.course_id, "title": c.title,
+             "snippet": c.summary[:200]}
+            for c in chapters
+        ]
+        return results[:limit]
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    path = getattr(settings, "LMS_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)(using=using)
+    if connections[using].vendor == "sqlite":
+        return Fts5SearchBackend(using=using)
+    return DatabaseSearchBackend(using=using)
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    if not raw:
+        get_search_backend(using).index_course(instance)
+
+
+@receiver(post_save, sender=Chapter)
+def index_chapter(sender, instance, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    if not raw:
+        get_search_backend(using).index_chapter(instance)
+
+
+@receiver(post_delete, sender=Course)
+def unindex_course(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    get_search_backend(using).remove("course", instance.id)
+
+
+@receiver(post_delete, sender=Chapter)
+def unindex_chapter(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    get_search_backend(using).remove("chapter", instance.id)
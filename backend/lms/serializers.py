@@ -1,12 +1,28 @@
+import math
+
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.models import User
-from .models import Profile, Course, Chapter, Notification
+from django.core.files.storage import default_storage
+from .authentication import ROLE_CLAIM, TOKEN_VERSION_CLAIM
+from .models import (
+    Profile, Course, Enrollment, Chapter, ChapterProgress, Notification, NotificationJob,
+)
+
+WORDS_PER_MINUTE = 200
 
 class UserSerializer(serializers.ModelSerializer):
+    profile = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = ["id", "username", "email", "profile"]
-        depth = 1
+
+    def get_profile(self, obj):
+        profile = getattr(obj, "profile", None)
+        if profile is None:
+            return None
+        return ProfileSerializer(profile, context=self.context).data
 
 
 
@@ -29,13 +45,45 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
 
 
+# -----------------------------
+# TOKEN SERIALIZER
+# -----------------------------
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Embeds the user's role so permission checks need no queries."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[ROLE_CLAIM] = user.profile.role
+        token[TOKEN_VERSION_CLAIM] = user.profile.token_version
+        return token
+
+
 # -----------------------------
 # PROFILE SERIALIZER
 # -----------------------------
 class ProfileSerializer(serializers.ModelSerializer):
+    image_url = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = Profile
-        fields = ["full_name", "image", "role"]
+        fields = ["id", "full_name", "image", "image_url", "thumbnails", "role"]
+
+    def _url(self, name):
+        url = default_storage.url(name)
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def get_image_url(self, obj):
+        return self._url(obj.image.name) if obj.image else None
+
+    def get_thumbnails(self, obj):
+        # Empty until the thumbnails exist; clients fall back to image_url.
+        return {
+            size: {fmt: self._url(name) for fmt, name in formats.items()}
+            for size, formats in obj.image_thumbnails.items()
+        }
 
 
 # -----------------------------
@@ -62,9 +110,60 @@ class CourseSerializer(serializers.ModelSerializer):
         read_only_fields = ["instructor", "students"]
 
     def get_student_count(self, obj):
+        count = getattr(obj, "num_students", None)
+        if count is not None:
+            return count
         return obj.students.count()
 
 
+class CatalogCourseSerializer(serializers.ModelSerializer):
+    """A course as listed in the catalog, without enrollment data.
+
+    Leaving the roster and student count out means enrollments never
+    invalidate the cached catalog; the course detail endpoint has both.
+    """
+
+    instructor_name = serializers.CharField(
+        source="instructor.username", read_only=True
+    )
+
+    class Meta:
+        model = Course
+        fields = [
+            "id",
+            "title",
+            "description",
+            "instructor",
+            "instructor_name",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
+# -----------------------------
+# ENROLLMENT (ROSTER) SERIALIZER
+# -----------------------------
+class EnrollmentSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="user.id", read_only=True)
+    username = serializers.CharField(source="user.username", read_only=True)
+    email = serializers.CharField(source="user.email", read_only=True)
+    first_name = serializers.CharField(source="user.first_name", read_only=True)
+    last_name = serializers.CharField(source="user.last_name", read_only=True)
+
+    class Meta:
+        model = Enrollment
+        fields = [
+            "id",
+            "username",
+            "email",
+            "first_name",
+            "last_name",
+            "enrolled_at",
+            "grade",
+            "progress",
+        ]
+
+
 # -----------------------------
 # CHAPTER SERIALIZER
 # -----------------------------
@@ -86,6 +185,55 @@ class ChapterSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "created_at"]
 
+    def validate_content(self, value):
+        if value is not None and not isinstance(value, (list, dict, str)):
+            raise serializers.ValidationError("Content must be a list of Plate nodes.")
+        return value
+
+
+class ChapterOutlineSerializer(serializers.ModelSerializer):
+    """Sidebar view of a chapter: no content, plus a reading-time hint."""
+
+    reading_minutes = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Chapter
+        fields = [
+            "id",
+            "title",
+            "summary",
+            "order",
+            "is_public",
+            "word_count",
+            "reading_minutes",
+        ]
+        read_only_fields = fields
+
+    def get_reading_minutes(self, obj):
+        return max(1, math.ceil(obj.word_count / WORDS_PER_MINUTE))
+
+
+class ChapterHtmlSerializer(serializers.ModelSerializer):
+    """Chapter with the server-rendered ``content_html`` instead of the node tree."""
+
+    course_title = serializers.CharField(source="course.title", read_only=True)
+
+    class Meta:
+        model = Chapter
+        fields = [
+            "id",
+            "course",
+            "course_title",
+            "title",
+            "summary",
+            "content_html",
+            "content_hash",
+            "is_public",
+            "order",
+            "created_at",
+        ]
+        read_only_fields = fields
+
 
 # -----------------------------
 # NOTIFICATION SERIALIZER
@@ -94,3 +242,77 @@ class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = "__all__"
+
+
+# -----------------------------
+# NOTIFICATION FEED SERIALIZER
+# -----------------------------
+class FeedItemSerializer(serializers.Serializer):
+    """A row of the merged personal-notification + course-announcement feed."""
+
+    id = serializers.IntegerField()
+    kind = serializers.CharField()
+    course = serializers.IntegerField(source="course_ref", allow_null=True)
+    title = serializers.CharField()
+    message = serializers.CharField()
+    created_at = serializers.DateTimeField()
+    is_read = serializers.SerializerMethodField()
+
+    def get_is_read(self, obj):
+        if obj["kind"] != "announcement":
+            return obj.get("read_ref") is not None
+        last_read_at = self.context.get("announcements_read_at")
+        return last_read_at is not None and obj["created_at"] <= last_read_at
+
+
+# -----------------------------
+# NOTIFICATION JOB SERIALIZER
+# -----------------------------
+class NotificationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NotificationJob
+        fields = [
+            "id",
+            "course",
+            "title",
+            "status",
+            "total",
+            "sent",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+
+
+# -----------------------------
+# PROGRESS SERIALIZERS
+# -----------------------------
+# A client flushes at least this often, so one heartbeat never covers more.
+MAX_HEARTBEAT_SECONDS = 300
+MAX_HEARTBEAT_EVENTS = 500
+
+
+class HeartbeatSerializer(serializers.Serializer):
+    chapter = serializers.IntegerField(min_value=1)
+    scrolled = serializers.IntegerField(min_value=0, max_value=100, default=0)
+    seconds = serializers.IntegerField(min_value=0, max_value=MAX_HEARTBEAT_SECONDS, default=0)
+    completed = serializers.BooleanField(default=False)
+    at = serializers.DateTimeField(required=False)
+
+
+class HeartbeatBatchSerializer(serializers.Serializer):
+    events = HeartbeatSerializer(many=True, allow_empty=False, max_length=MAX_HEARTBEAT_EVENTS)
+
+
+class ChapterProgressSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChapterProgress
+        fields = [
+            "chapter",
+            "opened_at",
+            "last_seen_at",
+            "percent_scrolled",
+            "time_spent",
+            "completed_at",
+        ]
@@ -0,0 +1,120 @@
+"""Keep ``Course.updated_at`` and the response cache versions current.
+
+Chapter writes bump their course's timestamp with a single UPDATE, so HTTP
+validators for chapter reads can be computed from ``Course.updated_at``
+alone. Chapter and enrollment writes bump the cache versions (see
+``lms/cache.py``) of the course and, for enrollments, of the student, but
+never the catalog: catalog payloads embed neither chapters nor enrollments.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import (
+    CATALOG, bump_versions, chapter_scope, course_scope, forget_chapter, instructor_scope,
+    student_scope,
+)
+from .models import Announcement, Chapter, Course, Enrollment, NotificationJob
+
+
+_pending_touches = ContextVar("lms_pending_course_touches", default=None)
+
+
+@contextmanager
+def batched_course_touches():
+    """Coalesce course touches and enrollment bumps inside the block.
+
+    Bulk operations that fire per-row signals (e.g. deleting many
+    enrollments) would otherwise bump the same course once per row.
+    """
+    pending = {"courses": set(), "enrollments": set()}
+    token = _pending_touches.set(pending)
+    try:
+        yield
+    finally:
+        _pending_touches.reset(token)
+        touch_courses(pending["courses"])
+        enrollments_touched(pending["enrollments"])
+
+
+def touch_courses(course_ids):
+    course_ids = [pk for pk in course_ids if pk is not None]
+    pending = _pending_touches.get()
+    if pending is not None:
+        pending["courses"].update(course_ids)
+        return
+    if course_ids:
+        Course.objects.filter(pk__in=course_ids).update(updated_at=timezone.now())
+        bump_versions([course_scope(pk) for pk in course_ids])
+
+
+def enrollments_touched(pairs):
+    """Bump the versions that embed the given ``(course_id, user_id)`` pairs.
+
+    Only the course (its student count and roster) and the student's own
+    course lists change; the course row itself is left alone.
+    """
+    pairs = set(pairs)
+    pending = _pending_touches.get()
+    if pending is not None:
+        pending["enrollments"].update(pairs)
+        return
+    if pairs:
+        course_ids = {course_id for course_id, _ in pairs}
+        user_ids = {user_id for _, user_id in pairs}
+        bump_versions(
+            [course_scope(pk) for pk in course_ids] + [student_scope(pk) for pk in user_ids]
+        )
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def bump_course_versions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_versions([course_scope(instance.pk), CATALOG, instructor_scope(instance.instructor_id)])
+
+
+@receiver(post_save, sender=Announcement)
+@receiver(post_save, sender=NotificationJob)
+def bump_course_notification_version(sender, instance, raw=False, created=False, **kwargs):
+    # Instructor analytics count notifications per course.
+    if not raw and created:
+        bump_versions([course_scope(instance.course_id)])
+
+
+@receiver(post_save, sender=Chapter)
+@receiver(post_delete, sender=Chapter)
+def bump_chapter_version(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_versions([chapter_scope(instance.pk)])
+        forget_chapter(instance.pk)
+
+
+@receiver(post_save, sender=Chapter)
+@receiver(post_delete, sender=Chapter)
+def touch_course_on_chapter_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_courses([instance.course_id])
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def bump_enrollment_versions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        enrollments_touched([(instance.course_id, instance.user_id)])
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def bump_versions_on_enrollment(sender, instance, action, reverse, pk_set, **kwargs):
+    # add() bulk-creates without post_save; remove() and clear() delete the
+    # rows one signal at a time, so bump_enrollment_versions covers them.
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        enrollments_touched((course_id, instance.pk) for course_id in pk_set)
+    else:
+        enrollments_touched((instance.pk, user_id) for user_id in pk_set)
@@ -0,0 +1,95 @@
+"""Server-Sent Events stream of new notifications and announcements.
+
+This is a plain async Django view rather than a DRF view so that an idle
+connection holds no thread. Serve it from an ASGI server (``backend.asgi``);
+under WSGI each open stream would tie up a worker thread.
+
+``EventSource`` cannot send headers, so the access token may also be passed
+as ``?token=``.
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+
+from .authentication import RoleClaimJWTAuthentication
+from .models import Enrollment
+from .pubsub import broker, course_channel, user_channel
+
+
+def _token_user_id(request):
+    """Authenticate like the REST API and return the user id, or None.
+
+    Runs the same user checks as ``RoleClaimJWTAuthentication`` so that
+    deleted, deactivated and revoked users cannot keep a stream open.
+    """
+    raw = request.GET.get("token")
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        raw = header[len("Bearer "):]
+    if not raw:
+        return None
+    authentication = RoleClaimJWTAuthentication()
+    try:
+        user = authentication.get_user(authentication.get_validated_token(raw))
+    except (AuthenticationFailed, TokenError):
+        return None
+    return user.pk
+
+
+def _format(event, name="notification"):
+    return (
+        f"id: {event['kind']}-{event['id']}\n"
+        f"event: {name}\n"
+        f"data: {json.dumps(event, separators=(',', ':'))}\n\n"
+    )
+
+
+async def _events(channels):
+    # Subscribing on first iteration ties the subscription to the generator:
+    # a response closed before it is read never subscribes, and one that was
+    # read unsubscribes when the generator is closed or cancelled.
+    keepalive = getattr(settings, "LMS_STREAM_KEEPALIVE_SECONDS", 20)
+    subscription = broker.subscribe(channels)
+    try:
+        yield "retry: 5000\n: connected\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing the idle connection.
+                yield ": keepalive\n\n"
+                continue
+            if subscription.overflowed:
+                subscription.overflowed = False
+                yield "event: resync\ndata: {}\n\n"
+            yield _format(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@require_GET
+async def notification_stream(request):
+    user_id = await sync_to_async(_token_user_id)(request)
+    if user_id is None:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+    if broker.subscriber_count >= getattr(settings, "LMS_STREAM_MAX_CONNECTIONS", 10000):
+        return JsonResponse({"error": "Too many open streams, poll instead"}, status=503)
+
+    course_ids = await sync_to_async(list)(
+        Enrollment.objects.filter(user_id=user_id).values_list("course_id", flat=True)
+    )
+    # Course channels are fixed for the life of the stream; clients
+    # reconnect after joining a course.
+    channels = [user_channel(user_id)] + [course_channel(pk) for pk in course_ids]
+    response = StreamingHttpResponse(_events(channels), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -1,3 +1,1705 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import (
+    Announcement, Chapter, ChapterCompletionStats, ChapterProgress, Course, Enrollment,
+    Notification, NotificationJob, Profile,
+)
+from .cache import CATALOG, chapter_scope, course_scope, get_versions
+from .completion import reconcile
+from .jobs import claim_next_job, run_job
+from .media import parse_range
+from .plate import plate_to_html, plate_to_text
+from .pubsub import broker
+from .roster import sync_enrollments
+from .search import get_search_backend
+
+
+def _make_user(username, role="STUDENT"):
+    user = User.objects.create_user(username=username, password="pass12345")
+    user.profile.role = role
+    user.profile.save()
+    return user
+
+
+class CourseListQueryCountTests(TestCase):
+    sizes = (10, 100, 1000)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        cls.other_student = _make_user("student2")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _seed(self, count):
+        Course.objects.all().delete()
+        courses = Course.objects.bulk_create(
+            Course(instructor=self.instructor, title=f"Course {i}")
+            for i in range(count)
+        )
+        through = Course.students.through
+        rows = []
+        for course in courses:
+            rows.append(through(course_id=course.id, user_id=self.student.id))
+            rows.append(through(course_id=course.id, user_id=self.other_student.id))
+        through.objects.bulk_create(rows)
+
+    def _query_counts(self, user, url):
+        self.client.force_authenticate(user)
+        counts = []
+        for size in self.sizes:
+            self._seed(size)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            results = response.data
+            if isinstance(results, dict):
+                results = results["results"]
+                size = min(size, 24)
+            self.assertEqual(len(results), size)
+            if "student_count" in results[0]:
+                self.assertEqual(results[0]["student_count"], 2)
+            counts.append(len(ctx.captured_queries))
+        return counts
+
+    def test_student_catalog_query_count_is_constant(self):
+        counts = self._query_counts(self.student, "/api/courses/")
+        self.assertEqual(len(set(counts)), 1, counts)
+
+    def test_my_courses_query_count_is_constant(self):
+        counts = self._query_counts(self.student, "/api/courses/my/")
+        self.assertEqual(len(set(counts)), 1, counts)
+
+    def test_instructor_course_list_query_count_is_constant(self):
+        counts = self._query_counts(self.instructor, "/api/courses/instructor/")
+        self.assertEqual(len(set(counts)), 1, counts)
+
+
+class CourseRosterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Roster")
+        students = User.objects.bulk_create(
+            User(username=f"s{i:03d}") for i in range(120)
+        )
+        Enrollment.objects.bulk_create(
+            Enrollment(course=cls.course, user=student, progress=i % 100)
+            for i, student in enumerate(students)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+        self.url = f"/api/courses/instructor/{self.course.id}/students/"
+
+    def test_roster_is_paginated_and_sortable(self):
+        response = self.client.get(self.url, {"ordering": "-username", "page_size": 25})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 120)
+        self.assertEqual(len(response.data["results"]), 25)
+        self.assertEqual(response.data["results"][0]["username"], "s119")
+
+    def test_roster_query_count_does_not_grow_with_page_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url, {"page_size": 5})
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.url, {"page_size": 120})
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_roster_rejects_other_instructors(self):
+        self.client.force_authenticate(_make_user("other", role="INSTRUCTOR"))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(LMS_COURSE_NOTIFICATION_MODE="fanout")
+class NotificationJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Jobs")
+        students = User.objects.bulk_create(User(username=f"j{i}") for i in range(23))
+        Enrollment.objects.bulk_create(
+            Enrollment(course=cls.course, user=student) for student in students
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+
+    def test_announcement_is_queued_and_fanned_out_by_worker(self):
+        response = self.client.post(
+            f"/api/courses/{self.course.id}/notify/",
+            {"title": "Exam", "message": "Friday"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Notification.objects.count(), 0)
+
+        call_command("run_notification_worker", once=True, chunk_size=5, stdout=StringIO())
+
+        self.assertEqual(Notification.objects.filter(title="Exam").count(), 23)
+        status_response = self.client.get(response.data["status_url"])
+        self.assertEqual(status_response.data["status"], "DONE")
+        self.assertEqual(status_response.data["sent"], 23)
+
+    def test_chapter_create_returns_job(self):
+        response = self.client.post(
+            f"/api/courses/instructor/{self.course.id}/chapters/",
+            {"course": self.course.id, "title": "Intro", "content": []},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        job = NotificationJob.objects.get(id=response.data["notification"]["job_id"])
+        self.assertEqual(job.status, "PENDING")
+
+    def test_stale_running_job_is_reclaimed_and_resumed(self):
+        enrollment_ids = list(
+            Enrollment.objects.filter(course=self.course).order_by("id").values_list("id", flat=True)
+        )
+        job = NotificationJob.objects.create(
+            course=self.course, created_by=self.instructor, title="Exam", message="Friday",
+            status="RUNNING", total=23, sent=10, last_enrollment_id=enrollment_ids[9],
+            started_at=timezone.now() - timedelta(hours=1), heartbeat_at=timezone.now(),
+        )
+        # Long-running but still beating: not reclaimed.
+        self.assertIsNone(claim_next_job())
+
+        NotificationJob.objects.filter(id=job.id).update(
+            heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+        claimed = claim_next_job()
+        self.assertEqual(claimed.id, job.id)
+        self.assertIsNone(claim_next_job())
+
+        job = run_job(claimed, chunk_size=5)
+        self.assertEqual(job.status, "DONE")
+        self.assertEqual((job.sent, job.total), (23, 23))
+        self.assertEqual(job.last_enrollment_id, enrollment_ids[-1])
+        self.assertGreater(job.heartbeat_at, timezone.now() - timedelta(minutes=1))
+        self.assertEqual(Notification.objects.filter(title="Exam").count(), 13)
+
+    def test_worker_stops_when_its_job_was_reclaimed(self):
+        job = NotificationJob.objects.create(
+            course=self.course, created_by=self.instructor, title="Exam", message="Friday",
+            status="RUNNING", started_at=timezone.now(),
+        )
+        # Another worker reclaimed the job and already sent the first chunk.
+        NotificationJob.objects.filter(id=job.id).update(sent=5, last_enrollment_id=1)
+        job = run_job(job, chunk_size=5)
+        self.assertEqual(job.status, "RUNNING")
+        self.assertEqual(Notification.objects.count(), 0)
+
+
+class AnnouncementFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Feed")
+        Enrollment.objects.create(course=cls.course, user=cls.student)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_announcement_is_stored_once_and_merged_into_feed(self):
+        others = User.objects.bulk_create(User(username=f"f{i}") for i in range(30))
+        Enrollment.objects.bulk_create(Enrollment(course=self.course, user=u) for u in others)
+        Notification.objects.create(user=self.student, title="Personal", message="hi")
+
+        self.client.force_authenticate(self.instructor)
+        response = self.client.post(
+            f"/api/courses/{self.course.id}/notify/",
+            {"title": "Exam", "message": "Friday"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Announcement.objects.count(), 1)
+        self.assertEqual(Notification.objects.count(), 1)
+
+        self.client.force_authenticate(self.student)
+        feed = self.client.get("/api/notifications/").data
+        self.assertEqual(len(feed["results"]), 2)
+        self.assertEqual(
+            [(item["kind"], item["title"]) for item in feed["results"]],
+            [("announcement", "Exam"), ("notification", "Personal")],
+        )
+        self.assertFalse(feed["results"][0]["is_read"])
+
+        self.client.post("/api/notifications/announcements/read/")
+        feed = self.client.get("/api/notifications/").data
+        self.assertTrue(feed["results"][0]["is_read"])
+
+    def test_feed_skips_announcements_from_before_enrollment(self):
+        Announcement.objects.create(course=self.course, title="Old", message="m")
+        late = _make_user("late")
+        Enrollment.objects.create(course=self.course, user=late)
+        self.client.force_authenticate(late)
+        self.assertEqual(self.client.get("/api/notifications/").data["results"], [])
+
+    def test_cursor_walks_feed_without_gaps_or_duplicates(self):
+        # Identical timestamps across both tables exercise the tie-breaks.
+        stamp = timezone.now()
+        Notification.objects.bulk_create(
+            Notification(user=self.student, title=f"n{i}", message="m") for i in range(7)
+        )
+        Announcement.objects.bulk_create(
+            Announcement(course=self.course, title=f"a{i}", message="m") for i in range(6)
+        )
+        Notification.objects.update(created_at=stamp)
+        Announcement.objects.update(created_at=stamp)
+        Enrollment.objects.filter(user=self.student).update(enrolled_at=stamp)
+
+        self.client.force_authenticate(self.student)
+        seen = []
+        url = "/api/notifications/?page_size=4"
+        while url:
+            page = self.client.get(url).data
+            seen.extend(item["title"] for item in page["results"])
+            url = page["next"]
+        self.assertEqual(len(seen), 13)
+        self.assertEqual(len(set(seen)), 13)
+
+    def test_since_returns_only_newer_items(self):
+        old = Notification.objects.create(user=self.student, title="old", message="m")
+        Notification.objects.filter(id=old.id).update(
+            created_at=timezone.now() - timedelta(hours=1)
+        )
+        Notification.objects.create(user=self.student, title="new", message="m")
+        self.client.force_authenticate(self.student)
+        since = (timezone.now() - timedelta(minutes=5)).isoformat()
+        page = self.client.get("/api/notifications/", {"since": since}).data
+        self.assertEqual([item["title"] for item in page["results"]], ["new"])
+        response = self.client.get("/api/notifications/", {"since": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+
+class CourseCatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = _make_user("alice", role="INSTRUCTOR")
+        cls.bob = _make_user("bob", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        courses = Course.objects.bulk_create(
+            Course(instructor=cls.alice if i % 2 else cls.bob, title=f"C{i}")
+            for i in range(30)
+        )
+        Enrollment.objects.bulk_create(
+            Enrollment(course=course, user=cls.student) for course in courses[:5]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _walk(self, params):
+        titles, url, data = [], "/api/courses/", params
+        while url:
+            page = self.client.get(url, data).data
+            titles.extend(course["title"] for course in page["results"])
+            url, data = page["next"], None
+        return titles
+
+    def test_catalog_pages_with_cursor(self):
+        titles = self._walk({"page_size": 7})
+        self.assertEqual(len(titles), 30)
+        self.assertEqual(len(set(titles)), 30)
+
+    def test_catalog_filters(self):
+        self.assertEqual(len(self._walk({"instructor": self.alice.id})), 15)
+        self.assertEqual(len(self._walk({"enrolled": "true"})), 5)
+        self.assertEqual(len(self._walk({"enrolled": "false"})), 25)
+        future = (timezone.now() + timedelta(days=1)).isoformat()
+        self.assertEqual(len(self._walk({"created_after": future})), 0)
+        self.assertEqual(len(self._walk({"created_before": future})), 30)
+        response = self.client.get("/api/courses/", {"enrolled": "maybe"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_catalog_search_and_ordering(self):
+        # bulk_create skipped the indexing signals.
+        get_search_backend().rebuild()
+        self.assertEqual(sorted(self._walk({"search": "c2", "page_size": 4})), [
+            "C2", "C20", "C21", "C22", "C23", "C24", "C25", "C26", "C27", "C28", "C29",
+        ])
+        titles = self._walk({"ordering": "title", "page_size": 7})
+        self.assertEqual(titles, sorted(titles))
+        self.assertEqual(len(titles), 30)
+        self.assertEqual(self._walk({"ordering": "-title", "page_size": 7}), titles[::-1])
+        response = self.client.get("/api/courses/", {"ordering": "popular"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_course_detail(self):
+        course = Course.objects.get(title="C3")
+        response = self.client.get(f"/api/courses/{course.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["title"], "C3")
+        missing = self.client.get(f"/api/courses/{course.id + 1000}/")
+        self.assertEqual(missing.status_code, 404)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        cls.course = Course.objects.create(
+            instructor=cls.instructor, title="Astronomy", description="Stars and planets"
+        )
+        cls.chapter = Chapter.objects.create(
+            course=cls.course,
+            title="Orbits",
+            content=[
+                {"type": "h1", "children": [{"text": "Kepler"}]},
+                {"type": "p", "children": [{"text": "Ellipses "}, {"text": "everywhere", "bold": True}]},
+            ],
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _search(self, q):
+        return self.client.get("/api/search/", {"q": q}).data["results"]
+
+    def test_plate_to_text(self):
+        self.assertEqual(plate_to_text(self.chapter.content), "Kepler\nEllipses everywhere")
+
+    def test_search_finds_course_and_chapter_content(self):
+        self.assertEqual([r["kind"] for r in self._search("planets")], ["course"])
+        hits = self._search("everywh")
+        self.assertEqual([(r["kind"], r["id"]) for r in hits], [("chapter", self.chapter.id)])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.chapter.content = [{"type": "p", "children": [{"text": "Newton"}]}]
+        self.chapter.save()
+        self.assertEqual(self._search("Kepler"), [])
+        self.assertEqual(len(self._search("newton")), 1)
+
+        self.chapter.is_public = False
+        self.chapter.save()
+        self.assertEqual(self._search("newton"), [])
+
+        self.course.delete()
+        self.assertEqual(self._search("planets"), [])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self._search('"AND OR (* NEAR'), [])
+        self.assertEqual(self.client.get("/api/search/").status_code, 400)
+
+    def test_rebuild_command(self):
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(self._search("astronomy")), 1)
+
+
+class ChapterHtmlTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Render")
+        cls.chapter = Chapter.objects.create(
+            course=cls.course,
+            title="One",
+            content=[{"type": "p", "children": [{"text": "<hi>", "bold": True, "italic": True}]}],
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_plate_to_html_matches_frontend_renderer(self):
+        nodes = [
+            {"type": "h2", "children": [{"text": "Title"}]},
+            {"type": "ul", "children": [{"type": "li", "children": [{"text": "x", "code": True}]}]},
+            {"type": "a", "url": 'http://e.com/"q', "children": [{"text": "link"}]},
+            {"type": "code", "children": [{"text": "a && b"}]},
+        ]
+        self.assertEqual(
+            plate_to_html(nodes),
+            "<h2>Title</h2><ul><li><code>x</code></li></ul>"
+            '<a href="http://e.com/&quot;q" target="_blank" rel="noopener noreferrer">link</a>'
+            "<pre><code>a &amp;&amp; b</code></pre>",
+        )
+
+    def test_link_urls_are_limited_to_safe_schemes(self):
+        def href(url):
+            html = plate_to_html([{"type": "a", "url": url, "children": [{"text": "x"}]}])
+            return html.split('"')[1]
+
+        for url in ("javascript:alert(1)", "JavaScript:alert(1)", "java\tscript:alert(1)",
+                    " javascript:alert(1)", "data:text/html,<b>", "vbscript:x", None, 5):
+            self.assertEqual(href(url), "#", url)
+        for url in ("https://e.com/a", "http://e.com", "mailto:a@e.com", "/courses/1", "#top",
+                    "page?a=1"):
+            self.assertEqual(href(url), url)
+        # Entities are escaped, so the browser cannot decode a scheme out of them.
+        self.assertEqual(href("javascript&colon;alert(1)"), "javascript&amp;colon;alert(1)")
+
+    def test_scalar_content_is_rejected_or_rendered_empty(self):
+        self.assertEqual(plate_to_html(5), "")
+        self.assertEqual(plate_to_text([{"type": "p", "children": 7}]), "")
+        chapter = Chapter.objects.create(course=self.course, title="Scalar", content=5)
+        self.assertEqual(chapter.content_html, "")
+
+        client = APIClient()
+        client.force_authenticate(self.instructor)
+        response = client.post(
+            f"/api/courses/instructor/{self.course.id}/chapters/",
+            {"title": "Bad", "content": 5},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("content", response.data)
+
+    def test_html_is_rendered_on_save_and_served(self):
+        self.assertEqual(self.chapter.content_html, "<p><em><strong>&lt;hi&gt;</strong></em></p>")
+        response = self.client.get(f"/api/chapters/{self.chapter.id}/", {"format": "html"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["content_html"], self.chapter.content_html)
+        self.assertNotIn("content", response.data)
+
+    def test_render_only_when_content_changes(self):
+        chapter = Chapter.objects.get(id=self.chapter.id)
+        self.assertFalse(chapter.render_content())
+        chapter.title = "Renamed"
+        chapter.save()
+        chapter.content = [{"type": "p", "children": [{"text": "new"}]}]
+        chapter.save(update_fields=["content"])
+        chapter.refresh_from_db()
+        self.assertEqual(chapter.content_html, "<p>new</p>")
+
+
+class ChapterOutlineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Outline")
+        words = " ".join(["word"] * 450)
+        for i in range(3):
+            Chapter.objects.create(
+                course=cls.course,
+                title=f"Ch {i}",
+                order=i,
+                content=[{"type": "p", "children": [{"text": words}]}],
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _assert_outline(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {"outline": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.data[0]),
+            {"id", "title", "summary", "order", "is_public", "word_count", "reading_minutes"},
+        )
+        self.assertEqual(response.data[0]["word_count"], 450)
+        self.assertEqual(response.data[0]["reading_minutes"], 3)
+        chapter_sql = [q["sql"] for q in ctx.captured_queries if 'FROM "lms_chapter"' in q["sql"]]
+        self.assertTrue(chapter_sql)
+        for sql in chapter_sql:
+            self.assertNotIn('"lms_chapter"."content', sql)
+
+    def test_student_outline_defers_content(self):
+        self.client.force_authenticate(self.student)
+        self._assert_outline(f"/api/courses/{self.course.id}/chapters/")
+
+    def test_instructor_outline_defers_content(self):
+        self.client.force_authenticate(self.instructor)
+        self._assert_outline(f"/api/courses/instructor/{self.course.id}/chapters/")
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Cond")
+        cls.chapter = Chapter.objects.create(course=cls.course, title="One")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("ETag", first)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        return first, again
+
+    def test_unchanged_resources_return_304(self):
+        for url in (
+            f"/api/chapters/{self.chapter.id}/",
+            f"/api/courses/{self.course.id}/chapters/",
+            "/api/courses/",
+        ):
+            _, again = self._revalidate(url)
+            self.assertEqual(again.status_code, 304, url)
+            self.assertEqual(again.content, b"")
+
+    def test_chapter_edit_invalidates_detail_and_list(self):
+        detail = f"/api/chapters/{self.chapter.id}/"
+        listing = f"/api/courses/{self.course.id}/chapters/"
+        detail_etag = self.client.get(detail)["ETag"]
+        list_etag = self.client.get(listing)["ETag"]
+
+        self.chapter.title = "Renamed"
+        self.chapter.save()
+
+        self.assertEqual(self.client.get(detail, HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+        self.assertEqual(self.client.get(listing, HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+    def test_joining_invalidates_my_courses(self):
+        etag = self.client.get("/api/courses/my/")["ETag"]
+        self.client.post(f"/api/courses/{self.course.id}/join/")
+        response = self.client.get("/api/courses/my/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+    def test_course_rename_invalidates_chapter_detail(self):
+        url = f"/api/chapters/{self.chapter.id}/"
+        etag = self.client.get(url)["ETag"]
+        self.course.title = "Renamed"
+        self.course.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["course_title"], "Renamed")
+
+    def test_catalog_validator_runs_no_query(self):
+        self.client.get("/api/courses/")
+        etag = self.client.get("/api/courses/")["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/courses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in ctx.captured_queries if "lms_course" in q["sql"]])
+
+        self.course.title = "Renamed"
+        self.course.save()
+        self.assertEqual(
+            self.client.get("/api/courses/", HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    def test_query_params_get_their_own_etag(self):
+        url = f"/api/chapters/{self.chapter.id}/"
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, {"format": "html"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class RoleClaimTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = _make_user("claims")
+        self.client = APIClient()
+        response = self.client.post(
+            "/api/token/", {"username": "claims", "password": "pass12345"}, format="json"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_permission_denied_without_queries(self):
+        self.client.get("/api/courses/instructor/")  # warms the token version cache
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/courses/instructor/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_role_change_applies_to_existing_tokens(self):
+        self.assertEqual(self.client.get("/api/courses/instructor/").status_code, 403)
+        profile = self.user.profile
+        profile.role = "INSTRUCTOR"
+        profile.save()
+        self.assertEqual(self.client.get("/api/courses/instructor/").status_code, 200)
+
+    def test_lazy_user_still_works_in_views(self):
+        response = self.client.get("/api/me/")
+        self.assertEqual(response.data["username"], "claims")
+
+    def test_inactive_user_token_is_rejected(self):
+        self.assertEqual(self.client.get("/api/courses/my/").status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/courses/").status_code, 401)
+        self.assertEqual(self.client.get("/api/courses/my/").status_code, 401)
+
+    def test_deleted_user_token_is_rejected(self):
+        self.assertEqual(self.client.get("/api/courses/").status_code, 200)
+        self.user.delete()
+        response = self.client.get("/api/courses/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["detail"], "User not found")
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Cached")
+        cls.chapter = Chapter.objects.create(course=cls.course, title="One")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _chapter_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        hits = [q for q in ctx.captured_queries if 'FROM "lms_chapter"' in q["sql"]]
+        return response, len(hits)
+
+    def test_chapter_reads_are_served_from_cache_until_edited(self):
+        for url in (f"/api/chapters/{self.chapter.id}/", f"/api/courses/{self.course.id}/chapters/"):
+            _, cold = self._chapter_queries(url)
+            self.assertGreater(cold, 0)
+
+        self.assertEqual(self._chapter_queries(f"/api/courses/{self.course.id}/chapters/")[1], 0)
+        # The detail view still reads updated_at for its ETag, but not the row.
+        response, _ = self._chapter_queries(f"/api/chapters/{self.chapter.id}/")
+        self.assertEqual(response.data["title"], "One")
+
+        self.chapter.title = "Edited"
+        self.chapter.save()
+        response, _ = self._chapter_queries(f"/api/chapters/{self.chapter.id}/")
+        self.assertEqual(response.data["title"], "Edited")
+        listing, _ = self._chapter_queries(f"/api/courses/{self.course.id}/chapters/")
+        self.assertEqual(listing.data[0]["title"], "Edited")
+
+    def test_course_rename_invalidates_chapter_detail(self):
+        url = f"/api/chapters/{self.chapter.id}/"
+        self.client.get(url)
+        self.course.title = "Renamed"
+        self.course.save()
+        self.assertEqual(self.client.get(url).data["course_title"], "Renamed")
+
+    def test_versions_are_bumped_again_after_commit(self):
+        scopes = [chapter_scope(self.chapter.id), course_scope(self.course.id)]
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.chapter.title = "Edited"
+            self.chapter.save()
+            # What a concurrent reader of the uncommitted write would key on.
+            during = get_versions(scopes)
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+        after = get_versions(scopes)
+        self.assertTrue(all(a != d for a, d in zip(after, during)), (during, after))
+
+    def test_enrollment_invalidates_course_detail_counts(self):
+        url = f"/api/courses/{self.course.id}/"
+        etag = self.client.get(url)["ETag"]
+        self.client.post(f"/api/courses/{self.course.id}/join/")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["student_count"], 1)
+
+    def test_enrollment_leaves_catalog_and_course_row_alone(self):
+        self.client.get("/api/courses/")
+        etag = self.client.get("/api/courses/")["ETag"]
+        updated_at = Course.objects.get(pk=self.course.pk).updated_at
+        catalog = get_versions([CATALOG])
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(f"/api/courses/{self.course.id}/join/")
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "lms_course"')])
+        self.assertEqual(Course.objects.get(pk=self.course.pk).updated_at, updated_at)
+        self.assertEqual(get_versions([CATALOG]), catalog)
+        response = self.client.get("/api/courses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_enrollment_invalidates_enrolled_filter(self):
+        url = "/api/courses/?enrolled=true"
+        self.assertEqual(self.client.get(url).data["results"], [])
+        self.client.post(f"/api/courses/{self.course.id}/join/")
+        self.assertEqual(len(self.client.get(url).data["results"]), 1)
+        self.course.students.remove(self.student)
+        self.assertEqual(self.client.get(url).data["results"], [])
+
+
+class ChapterReorderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Reorder")
+        cls.chapters = [
+            Chapter.objects.create(course=cls.course, title=f"Ch {i}", order=i + 1)
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+        self.url = f"/api/courses/instructor/{self.course.id}/chapters/reorder/"
+
+    def test_moving_last_to_first_updates_in_one_statement(self):
+        ids = [c.id for c in self.chapters]
+        new_order = [ids[-1]] + ids[:-1]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, {"order": new_order}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], 5)
+        self.assertEqual([c["id"] for c in response.data["chapters"]], new_order)
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "lms_chapter"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(Chapter.objects.filter(course=self.course).values_list("id", flat=True)),
+            new_order,
+        )
+
+    def test_only_changed_rows_are_written(self):
+        ids = [c.id for c in self.chapters]
+        ids[1], ids[2] = ids[2], ids[1]
+        response = self.client.post(self.url, {"order": ids}, format="json")
+        self.assertEqual(response.data["updated"], 2)
+
+    def test_incomplete_list_is_rejected(self):
+        ids = [c.id for c in self.chapters][:-1]
+        response = self.client.post(self.url, {"order": ids}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, [c.id for c in self.chapters], format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class CourseTransferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.course = Course.objects.create(
+            instructor=cls.instructor, title="Source", description="desc"
+        )
+        for i in range(3):
+            Chapter.objects.create(
+                course=cls.course,
+                title=f"Ch {i}",
+                order=i + 1,
+                content=[{"type": "p", "children": [{"text": f"body {i}"}]}],
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+
+    def _export(self):
+        response = self.client.get(f"/api/courses/instructor/{self.course.id}/export/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return b"".join(response.streaming_content)
+
+    def test_export_import_round_trip(self):
+        body = self._export()
+        self.assertEqual(len(body.splitlines()), 4)
+
+        response = self.client.post(
+            "/api/courses/instructor/import/", body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, 201)
+        copy = Course.objects.get(id=response.data["course"])
+        self.assertEqual(copy.title, "Source")
+        chapters = list(copy.chapters.all())
+        self.assertEqual([c.title for c in chapters], ["Ch 0", "Ch 1", "Ch 2"])
+        self.assertEqual(chapters[1].content_html, "<p>body 1</p>")
+
+    def test_import_appends_after_existing_chapters(self):
+        body = self._export()
+        response = self.client.post(
+            f"/api/courses/instructor/{self.course.id}/import/",
+            body,
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.data["chapters"], 3)
+        self.assertEqual(
+            list(self.course.chapters.values_list("order", flat=True)), [1, 2, 3, 5, 6, 7]
+        )
+
+    def test_appended_chapter_with_order_zero_follows_the_last(self):
+        body = b'{"type":"course","title":"X"}\n{"type":"chapter","title":"a","order":0}\n'
+        self.client.post(
+            f"/api/courses/instructor/{self.course.id}/import/",
+            body,
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(
+            list(self.course.chapters.values_list("title", "order"))[-2:],
+            [("Ch 2", 3), ("a", 4)],
+        )
+
+    def test_bad_line_rolls_back(self):
+        body = self._export() + b"{not json}\n"
+        response = self.client.post(
+            "/api/courses/instructor/import/", body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Line 5", response.data["error"])
+        self.assertEqual(Course.objects.count(), 1)
+
+    def test_invalid_records_are_rejected_with_line_numbers(self):
+        header = b'{"type":"course","title":"Bad"}\n'
+        for line, message in (
+            (b'{"type":"chapter","title":"\xff"}', "not valid UTF-8"),
+            (b'{"type":"chapter","title":"X","content":5}', "content"),
+            (b'{"type":"chapter","title":"X","is_public":"false"}', "is_public"),
+            (b'{"type":"chapter","title":"X","order":1.7}', "order"),
+            (b'{"type":"chapter","title":"X","order":true}', "order"),
+        ):
+            response = self.client.post(
+                "/api/courses/instructor/import/",
+                header + line + b"\n",
+                content_type="application/x-ndjson",
+            )
+            self.assertEqual(response.status_code, 400, message)
+            self.assertIn("Line 2", response.data["error"])
+            self.assertIn(message, response.data["error"])
+        for header, message in (
+            (b'{"type":"course","title":5}', "title"),
+            (b'{"type":"course","title":["x"]}', "title"),
+            (b'{"type":"course","title":"X","description":{"a":1}}', "description"),
+        ):
+            response = self.client.post(
+                "/api/courses/instructor/import/",
+                header + b"\n",
+                content_type="application/x-ndjson",
+            )
+            self.assertEqual(response.status_code, 400, message)
+            self.assertIn("Line 1", response.data["error"])
+            self.assertIn(message, response.data["error"])
+        self.assertEqual(Course.objects.count(), 1)
+
+    def test_management_commands(self):
+        out = StringIO()
+        call_command("export_course", self.course.id, stdout=out)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "course.ndjson")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(out.getvalue())
+            call_command("import_course", path, instructor="teacher", stdout=StringIO())
+        self.assertEqual(Chapter.objects.count(), 6)
+
+
+class BulkEnrollmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Roster")
+        cls.students = [_make_user(f"s{i}") for i in range(5)]
+        cls.course.students.add(cls.students[0])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+        self.url = f"/api/courses/instructor/{self.course.id}/students/bulk/"
+
+    def test_json_enroll_inserts_only_missing_rows(self):
+        payload = {"enroll": ["s0", "s1", self.students[2].id, "ghost"]}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["enrolled"], 2)
+        self.assertEqual(response.data["already_enrolled"], 1)
+        self.assertEqual(response.data["not_found"], ["ghost"])
+        inserts = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith("INSERT") and '"lms_course_students"' in q["sql"]
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(self.course.students.count(), 3)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_csv_enroll_and_unenroll(self):
+        body = f"username,action\ns0,unenroll\ns3\n{self.students[4].id},enroll\n"
+        response = self.client.post(self.url, body, content_type="text/csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["enrolled"], 2)
+        self.assertEqual(response.data["unenrolled"], 1)
+        self.assertEqual(
+            set(self.course.students.values_list("username", flat=True)), {"s3", "s4"}
+        )
+
+    def test_unenroll_bumps_versions_once(self):
+        self.course.students.add(*self.students[1:])
+        with mock.patch("lms.signals.bump_versions") as bump:
+            response = self.client.post(
+                self.url, {"unenroll": [s.username for s in self.students]}, format="json"
+            )
+        self.assertEqual(response.data["unenrolled"], 5)
+        bump.assert_called_once()
+        self.assertEqual(len(bump.call_args.args[0]), 6)
+
+    def test_other_users_are_forbidden(self):
+        self.client.force_authenticate(self.students[1])
+        response = self.client.post(self.url, ["s1"], format="json")
+        self.assertEqual(response.status_code, 403)
+
+
+class SqliteBenchmarkTests(TestCase):
+    def test_benchmark_reports_both_profiles(self):
+        out = StringIO()
+        call_command(
+            "benchmark_sqlite", duration=0.2, readers=1, writers=1,
+            courses=2, students=5, stdout=out,
+        )
+        rows = [line.split()[0] for line in out.getvalue().splitlines()[1:]]
+        self.assertEqual(rows, ["development", "production"])
+
+
+@override_settings(LMS_READ_REPLICAS=["replica"])
+class ReadReplicaTests(TestCase):
+    # Rows are only written to the primary; the empty replica test database
+    # shows which alias served a read.
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Primary only")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_student_reads_use_replica(self):
+        response = self.client.get("/api/courses/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [])
+        self.assertEqual(self.client.get("/api/notifications/").data["results"], [])
+
+    def test_writes_stay_on_primary_and_pin_the_user(self):
+        response = self.client.post(f"/api/courses/{self.course.id}/join/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Enrollment.objects.using("default").filter(user=self.student).exists())
+
+        response = self.client.get("/api/courses/")
+        self.assertEqual([c["id"] for c in response.data["results"]], [self.course.id])
+        self.assertEqual(len(self.client.get("/api/notifications/").data["results"]), 1)
+
+    def test_other_users_are_not_pinned(self):
+        self.client.post(f"/api/courses/{self.course.id}/join/")
+        other = APIClient()
+        other.force_authenticate(_make_user("student2"))
+        self.assertEqual(other.get("/api/courses/").data["results"], [])
+
+    def test_instructor_views_read_primary(self):
+        self.client.force_authenticate(self.instructor)
+        response = self.client.get("/api/courses/instructor/")
+        self.assertEqual(len(response.data), 1)
+
+    def test_replica_reads_are_cached_when_nothing_changed_recently(self):
+        self.client.get("/api/courses/")
+        with CaptureQueriesContext(connections["replica"]) as queries:
+            response = self.client.get("/api/courses/")
+        self.assertEqual(response.data["results"], [])
+        self.assertEqual(len(queries), 0)
+
+    def test_replica_reads_are_not_cached_right_after_a_write(self):
+        writer = APIClient()
+        writer.force_authenticate(self.instructor)
+        writer.patch(f"/api/courses/instructor/{self.course.id}/", {"title": "Renamed"}, format="json")
+        # Served by the lagging replica under the version the rename bumped.
+        self.assertEqual(self.client.get("/api/courses/").data["results"], [])
+        # The pinned writer must get the primary's rows, not that copy.
+        self.assertEqual(len(writer.get("/api/courses/").data["results"]), 1)
+
+    @override_settings(
+        LMS_REPLICA_PIN_CACHE_ALIAS="pins",
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "pins": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "pins",
+            },
+        },
+    )
+    def test_pins_use_configured_cache(self):
+        self.client.post(f"/api/courses/{self.course.id}/join/")
+        self.assertIsNotNone(caches["pins"].get(f"lms:replica-pin:{self.student.pk}"))
+
+
+class ChapterProgressTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Progress")
+        cls.chapters = [
+            Chapter.objects.create(course=cls.course, title=f"Ch {i}", order=i + 1)
+            for i in range(4)
+        ]
+        cls.hidden = Chapter.objects.create(
+            course=cls.course, title="Draft", order=5, is_public=False
+        )
+        cls.course.students.add(cls.student)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _send(self, events):
+        return self.client.post("/api/progress/heartbeats/", {"events": events}, format="json")
+
+    def test_batch_is_coalesced_into_one_write_per_statement(self):
+        events = [
+            {"chapter": self.chapters[0].id, "scrolled": pct, "seconds": 5}
+            for pct in (10, 40, 30, 60)
+        ] + [{"chapter": self.chapters[1].id, "scrolled": 20, "seconds": 15}]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._send(events)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["chapters"], 2)
+        writes = [
+            q for q in ctx.captured_queries
+            if '"lms_chapterprogress"' in q["sql"] and not q["sql"].startswith("SELECT")
+        ]
+        self.assertEqual(len(writes), 1)
+        first = self.student.chapter_progress.get(chapter=self.chapters[0])
+        self.assertEqual((first.percent_scrolled, first.time_spent), (60, 20))
+
+    def test_later_batches_accumulate(self):
+        chapter = self.chapters[0].id
+        self._send([{"chapter": chapter, "scrolled": 50, "seconds": 30}])
+        self._send([{"chapter": chapter, "scrolled": 20, "seconds": 30}])
+        progress = self.student.chapter_progress.get(chapter_id=chapter)
+        self.assertEqual((progress.percent_scrolled, progress.time_spent), (50, 60))
+        self.assertIsNone(progress.completed_at)
+
+    def test_completion_updates_course_progress(self):
+        response = self._send([
+            {"chapter": self.chapters[0].id, "scrolled": 100},
+            {"chapter": self.chapters[1].id, "completed": True},
+            {"chapter": self.hidden.id, "completed": True},
+        ])
+        self.assertEqual(response.data["completed"], 2)
+        self.assertEqual(response.data["ignored"], 1)
+        courses = self.client.get("/api/progress/my/").data
+        self.assertEqual(courses, [{"id": self.course.id, "title": "Progress", "progress": 50}])
+        chapters = self.client.get(f"/api/courses/{self.course.id}/progress/").data
+        self.assertEqual([c["chapter"] for c in chapters], [c.id for c in self.chapters[:2]])
+
+    def test_unenrolled_chapters_are_ignored(self):
+        other = Course.objects.create(instructor=self.instructor, title="Other")
+        chapter = Chapter.objects.create(course=other, title="X", order=1)
+        response = self._send([{"chapter": chapter.id, "seconds": 10}])
+        self.assertEqual(response.data["ignored"], 1)
+        self.assertFalse(self.student.chapter_progress.exists())
+
+    def test_invalid_events_are_rejected(self):
+        response = self._send([{"chapter": self.chapters[0].id, "scrolled": 150}])
+        self.assertEqual(response.status_code, 400)
+
+    def _progress(self):
+        return Enrollment.objects.get(user=self.student, course=self.course).progress
+
+    def test_progress_follows_chapter_changes(self):
+        self._send([{"chapter": c.id, "completed": True} for c in self.chapters])
+        self.assertEqual(self._progress(), 100)
+
+        extra = Chapter.objects.create(course=self.course, title="Extra", order=6)
+        self.assertEqual(self._progress(), 80)
+        extra.is_public = False
+        extra.save()
+        self.assertEqual(self._progress(), 100)
+        self.hidden.is_public = True
+        self.hidden.save()
+        self.assertEqual(self._progress(), 80)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hidden.delete()
+        self.assertEqual(self._progress(), 100)
+
+    def test_deleting_course_with_progress(self):
+        self._send([{"chapter": self.chapters[0].id, "completed": True}])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.delete()
+        connection.check_constraints()
+        self.assertFalse(Enrollment.objects.filter(user=self.student).exists())
+
+    def test_batch_retries_after_losing_create_race(self):
+        chapter = self.chapters[0]
+        ChapterProgress.objects.create(
+            user=self.student, chapter=chapter, course=self.course, time_spent=7
+        )
+        original = ChapterProgress.objects.select_for_update
+        calls = []
+
+        def racing_select(*args, **kwargs):
+            calls.append(1)
+            queryset = original(*args, **kwargs)
+            # The first read misses the row a concurrent batch just created.
+            return queryset.none() if len(calls) == 1 else queryset
+
+        with mock.patch.object(ChapterProgress.objects, "select_for_update", racing_select):
+            response = self._send([{"chapter": chapter.id, "seconds": 5}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.student.chapter_progress.get(chapter=chapter).time_spent, 12)
+
+
+class CompletionStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Stats")
+        cls.chapters = [
+            Chapter.objects.create(course=cls.course, title=f"Ch {i}", order=i + 1)
+            for i in range(2)
+        ]
+        cls.students = [_make_user(f"s{i}") for i in range(4)]
+        cls.course.students.add(*cls.students)
+
+    def _send(self, student, events):
+        client = APIClient()
+        client.force_authenticate(student)
+        client.post("/api/progress/heartbeats/", {"events": events}, format="json")
+
+    def _complete(self, student, *chapters):
+        self._send(student, [{"chapter": c.id, "completed": True} for c in chapters])
+
+    def _stats(self):
+        client = APIClient()
+        client.force_authenticate(self.instructor)
+        return client.get(f"/api/courses/instructor/{self.course.id}/completion/").data
+
+    def test_counters_follow_heartbeats(self):
+        first, second = self.chapters
+        self._complete(self.students[0], first, second)
+        self._complete(self.students[1], first)
+        self._send(self.students[2], [{"chapter": second.id, "scrolled": 30}])
+        self._complete(self.students[0], first)  # already completed, no change
+
+        stats = self._stats()
+        self.assertEqual(stats["students"], 4)
+        self.assertEqual(stats["completed_students"], 1)
+        self.assertEqual(stats["average_completion"], 37.5)
+        self.assertEqual(
+            [(c["opened"], c["completed"], c["completion_rate"]) for c in stats["chapters"]],
+            [(2, 2, 50.0), (2, 1, 25.0)],
+        )
+
+    def test_dashboard_query_count_is_constant(self):
+        client = APIClient()
+        client.force_authenticate(self.instructor)
+        url = f"/api/courses/instructor/{self.course.id}/completion/"
+        with CaptureQueriesContext(connection) as before:
+            client.get(url)
+        for student in self.students:
+            self._complete(student, *self.chapters)
+        with CaptureQueriesContext(connection) as after:
+            client.get(url)
+        self.assertEqual(len(before), len(after))
+
+    def test_unenrolling_removes_progress_from_course_counters(self):
+        self._complete(self.students[0], *self.chapters)
+        self.course.students.remove(self.students[0])
+        stats = self._stats()
+        self.assertEqual((stats["completed_students"], stats["average_completion"]), (0, 0))
+
+    def test_unenrolling_uncounts_but_keeps_chapter_progress(self):
+        first = self.chapters[0]
+        for student in self.students[:3]:
+            self._complete(student, first)
+        self.course.students.remove(*self.students[1:3])
+        self.students[3].delete()
+
+        stats = self._stats()
+        self.assertEqual(stats["students"], 1)
+        self.assertEqual(
+            (stats["chapters"][0]["completed"], stats["chapters"][0]["completion_rate"]),
+            (1, 100.0),
+        )
+        self.assertEqual(ChapterProgress.objects.filter(course=self.course).count(), 3)
+
+        self.course.students.add(self.students[1])
+        stats = self._stats()
+        self.assertEqual(stats["chapters"][0]["completed"], 2)
+        self.assertEqual(
+            Enrollment.objects.get(course=self.course, user=self.students[1]).progress, 50
+        )
+        self.assertEqual(reconcile(), [])
+
+    def test_bulk_unenroll_adjusts_counters_per_course(self):
+        students = User.objects.bulk_create(User(username=f"bulk{i}") for i in range(40))
+        sync_enrollments(self.course, enroll=[s.id for s in students])
+        for student in students:
+            self._complete(student, self.chapters[0])
+        with CaptureQueriesContext(connection) as queries:
+            sync_enrollments(self.course, unenroll=[s.id for s in students])
+        # The delete itself fires per-row signals, but the counters are
+        # adjusted once, so the count grows far slower than the roster.
+        counter_updates = [
+            q for q in queries.captured_queries
+            if q["sql"].startswith("UPDATE") and "completionstats" in q["sql"]
+        ]
+        self.assertLessEqual(len(counter_updates), 2)
+        self.assertEqual(self._stats()["chapters"][0]["completed"], 0)
+        self.assertEqual(reconcile(), [])
+
+    def test_reconcile_ignores_progress_of_unenrolled_students(self):
+        self._complete(self.students[0], *self.chapters)
+        # Raw SQL skips the delete signals, leaving the progress rows behind.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {Enrollment._meta.db_table} WHERE user_id = %s",
+                [self.students[0].id],
+            )
+        out = StringIO()
+        call_command("reconcile_completion_stats", "--fix", stdout=out)
+        self.assertIn(f"chapter {self.chapters[0].id} completed: stored 1, expected 0", out.getvalue())
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        self._complete(self.students[0], *self.chapters)
+        out = StringIO()
+        call_command("reconcile_completion_stats", stdout=out)
+        self.assertIn("consistent", out.getvalue())
+
+        ChapterCompletionStats.objects.filter(chapter=self.chapters[0]).update(completed=7)
+        out = StringIO()
+        call_command("reconcile_completion_stats", "--fix", stdout=out)
+        self.assertIn(f"chapter {self.chapters[0].id} completed: stored 7, expected 1", out.getvalue())
+        self.assertEqual(
+            ChapterCompletionStats.objects.get(chapter=self.chapters[0]).completed, 1
+        )
+
+
+class InstructorAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.students = [_make_user(f"s{i}") for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+
+    def _seed(self, count):
+        for i in range(count):
+            course = Course.objects.create(instructor=self.instructor, title=f"C{i}")
+            course.students.add(*self.students[: i % 3 + 1])
+            Chapter.objects.create(course=course, title="Intro", order=1)
+            Announcement.objects.create(course=course, title="Hi", message="m")
+
+    def _queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/courses/instructor/analytics/")
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.data
+
+    def test_totals(self):
+        self._seed(3)
+        _, data = self._queries()
+        self.assertEqual(data["totals"]["courses"], 3)
+        self.assertEqual(data["totals"]["enrollments"], 6)
+        self.assertEqual(data["totals"]["unique_students"], 3)
+        self.assertEqual(data["totals"]["chapters"], 3)
+        self.assertEqual(data["totals"]["announcements"], 3)
+        self.assertEqual(sum(b["count"] for b in data["enrollments_over_time"]), 6)
+
+    def test_query_count_does_not_grow_with_courses(self):
+        self._seed(2)
+        small, _ = self._queries()
+        self._seed(10)
+        large, _ = self._queries()
+        self.assertEqual(small, large)
+
+    def test_response_is_cached_until_a_course_changes(self):
+        self._seed(1)
+        self.client.get("/api/courses/instructor/analytics/")
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/courses/instructor/analytics/")
+        self.assertEqual(len(ctx), 1)  # the instructor's course ids
+
+        Course.objects.get().students.add(self.students[2])
+        data = self.client.get("/api/courses/instructor/analytics/").data
+        self.assertEqual(data["totals"]["enrollments"], 2)
+
+    def test_bad_bucket_is_rejected(self):
+        response = self.client.get("/api/courses/instructor/analytics/?bucket=year")
+        self.assertEqual(response.status_code, 400)
+
+
+class NotificationReadStateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Badge")
+        cls.course.students.add(cls.student)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.notes = [
+            Notification.objects.create(user=self.student, title=f"N{i}", message="m")
+            for i in range(3)
+        ]
+        Announcement.objects.create(course=self.course, title="A", message="m")
+
+    def _count(self):
+        return self.client.get("/api/notifications/unread-count/").data
+
+    def test_unread_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self._count()
+        self.assertEqual(data, {"notifications": 3, "announcements": 1, "total": 4})
+        self.assertEqual(len(ctx), 3)
+
+    def test_mark_selected_read_in_one_update(self):
+        ids = [n.id for n in self.notes[:2]]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/notifications/read/", {"ids": ids}, format="json")
+        self.assertEqual(response.data["updated"], 2)
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "lms_notification"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self._count()["notifications"], 1)
+
+        feed = self.client.get("/api/notifications/").data["results"]
+        read = {item["title"]: item["is_read"] for item in feed if item["kind"] == "notification"}
+        self.assertEqual(read, {"N0": True, "N1": True, "N2": False})
+
+    def test_mark_all_read_includes_announcements(self):
+        self.client.post("/api/notifications/read/", {"all": True}, format="json")
+        self.assertEqual(self._count()["total"], 0)
+
+    def test_other_users_notifications_are_untouched(self):
+        other = Notification.objects.create(user=self.instructor, title="X", message="m")
+        response = self.client.post("/api/notifications/read/", {"ids": [other.id]}, format="json")
+        self.assertEqual(response.data["updated"], 0)
+
+    def test_non_object_body_is_rejected(self):
+        response = self.client.post("/api/notifications/read/", [1, 2], format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class NotificationStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = _make_user("teacher", role="INSTRUCTOR")
+        cls.student = _make_user("student")
+        cls.course = Course.objects.create(instructor=cls.instructor, title="Live")
+        cls.course.students.add(cls.student)
+
+    async def _open(self, user):
+        token = str(RefreshToken.for_user(user).access_token)
+        response = await self.async_client.get(f"/api/notifications/stream/?token={token}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = response.streaming_content
+        self.assertIn(b": connected", await anext(stream))
+        return stream
+
+    async def _disconnect(self, stream):
+        # The ASGI handler cancels the pending read when the client goes away.
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        try:
+            await pending
+        except (asyncio.CancelledError, StopAsyncIteration):
+            pass
+
+    def _write(self, create):
+        with self.captureOnCommitCallbacks(execute=True):
+            return create()
+
+    async def test_pushes_personal_notifications_and_announcements(self):
+        stream = await self._open(self.student)
+        try:
+            await sync_to_async(self._write)(
+                lambda: Notification.objects.create(user=self.student, title="Hi", message="m")
+            )
+            chunk = await asyncio.wait_for(anext(stream), 1)
+            self.assertIn(b"event: notification", chunk)
+            self.assertIn(b'"title":"Hi"', chunk)
+
+            await sync_to_async(self._write)(
+                lambda: Announcement.objects.create(course=self.course, title="Exam", message="m")
+            )
+            chunk = await asyncio.wait_for(anext(stream), 1)
+            self.assertIn(b'"kind":"announcement"', chunk)
+        finally:
+            await self._disconnect(stream)
+        self.assertEqual(broker.subscriber_count, 0)
+
+    async def test_other_users_events_are_not_delivered(self):
+        stream = await self._open(self.instructor)
+        try:
+            await sync_to_async(self._write)(
+                lambda: Notification.objects.create(user=self.student, title="Hi", message="m")
+            )
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(anext(stream), 0.2)
+        finally:
+            await self._disconnect(stream)
+        self.assertEqual(broker.subscriber_count, 0)
+
+    async def test_response_closed_before_reading_does_not_leak(self):
+        token = str(RefreshToken.for_user(self.student).access_token)
+        response = await self.async_client.get(f"/api/notifications/stream/?token={token}")
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertEqual(broker.subscriber_count, 0)
+
+    async def test_requires_a_valid_token(self):
+        response = await self.async_client.get("/api/notifications/stream/?token=nope")
+        self.assertEqual(response.status_code, 401)
+
+    async def test_rejects_inactive_and_deleted_users(self):
+        # The cached user state outlives the test's rollback.
+        self.addCleanup(cache.clear)
+        token = str(RefreshToken.for_user(self.student).access_token)
+
+        def deactivate():
+            self.student.is_active = False
+            self.student.save()
+
+        await sync_to_async(deactivate)()
+        response = await self.async_client.get(f"/api/notifications/stream/?token={token}")
+        self.assertEqual(response.status_code, 401)
+
+        await sync_to_async(self.student.delete)()
+        response = await self.async_client.get(f"/api/notifications/stream/?token={token}")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(broker.subscriber_count, 0)
+
+
+class NotificationRetentionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = _make_user("alice")
+        cls.bob = _make_user("bob")
+        now = timezone.now()
+        notes = [
+            Notification(user=cls.alice, title=f"A{i}", message="m") for i in range(6)
+        ] + [Notification(user=cls.bob, title=f"B{i}", message="m") for i in range(2)]
+        Notification.objects.bulk_create(notes)
+        # A0..A5 are 0..5 days old; bob's are 400 days old.
+        for i, note in enumerate(notes[:6]):
+            Notification.objects.filter(pk=note.pk).update(created_at=now - timedelta(days=i))
+        Notification.objects.filter(user=cls.bob).update(created_at=now - timedelta(days=400))
+
+    def _prune(self, *args):
+        out = StringIO()
+        call_command("prune_notifications", "--sleep", "0", *args, stdout=out)
+        return out.getvalue()
+
+    def _titles(self):
+        return sorted(Notification.objects.values_list("title", flat=True))
+
+    def test_prunes_by_age_and_per_user_cap(self):
+        output = self._prune("--max-age-days", "365", "--max-per-user", "4", "--batch-size", "1")
+        self.assertIn("Pruned 2 expired and 2 over-limit", output)
+        self.assertEqual(self._titles(), ["A0", "A1", "A2", "A3"])
+
+    def test_dry_run_deletes_nothing(self):
+        output = self._prune("--max-age-days", "365", "--max-per-user", "0", "--dry-run")
+        self.assertIn("Would prune 2 expired", output)
+        self.assertEqual(Notification.objects.count(), 8)
+
+    def test_archive_receives_pruned_rows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "notifications.ndjson.gz")
+            self._prune("--max-age-days", "0", "--max-per-user", "5", "--archive", path)
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                archived = [json.loads(line) for line in handle]
+        self.assertEqual([row["title"] for row in archived], ["A5"])
+        self.assertEqual(archived[0]["user_id"], self.alice.id)
+        self.assertEqual(Notification.objects.count(), 7)
+
+
+def _image_upload(size=(300, 200), mode="RGB", color="red", fmt="PNG", name="avatar.png"):
+    buffer = BytesIO()
+    Image.new(mode, size, color).save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f"image/{fmt.lower()}")
+
+
+class ProfileImageTests(TestCase):
+    url = "/api/profile/upload-image/"
+
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        overrides = override_settings(MEDIA_ROOT=self.media_dir.name, LMS_RUN_JOBS_INLINE=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.user = _make_user("student")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_upload_stores_hashed_original_and_thumbnails(self):
+        response = self.client.post(self.url, {"image": _image_upload()}, format="multipart")
+
+        self.assertEqual(response.status_code, 201)
+        profile = Profile.objects.get(user=self.user)
+        self.assertRegex(profile.image.name, r"^profiles/[0-9a-f]{2}/[0-9a-f]{64}/original\.png$")
+        self.assertEqual(sorted(profile.image_thumbnails, key=int), ["32", "96", "256"])
+        for size, formats in profile.image_thumbnails.items():
+            self.assertEqual(set(formats), {"webp", "jpeg"})
+            for name in formats.values():
+                with Image.open(os.path.join(self.media_dir.name, name)) as thumb:
+                    self.assertEqual(thumb.size, (int(size), int(size)))
+
+        # The authenticated user object still caches its old profile.
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        profile_data = self.client.get("/api/me/").json()["profile"]
+        self.assertTrue(profile_data["image_url"].endswith(profile.image.name))
+        self.assertTrue(profile_data["thumbnails"]["96"]["webp"].endswith("/96.webp"))
+
+    def test_transparent_image_is_flattened_for_jpeg(self):
+        self.client.post(
+            self.url, {"image": _image_upload(mode="RGBA", color=(255, 0, 0, 0))}, format="multipart"
+        )
+
+        names = Profile.objects.get(user=self.user).image_thumbnails["32"]
+        with Image.open(os.path.join(self.media_dir.name, names["jpeg"])) as thumb:
+            self.assertEqual(thumb.mode, "RGB")
+        with Image.open(os.path.join(self.media_dir.name, names["webp"])) as thumb:
+            self.assertEqual(thumb.mode, "RGBA")
+
+    def test_rejects_files_that_are_not_images(self):
+        upload = SimpleUploadedFile("avatar.png", b"not an image", content_type="image/png")
+
+        response = self.client.post(self.url, {"image": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Profile.objects.get(user=self.user).image)
+
+    @override_settings(LMS_PROFILE_IMAGE_MAX_BYTES=100)
+    def test_rejects_oversized_uploads(self):
+        response = self.client.post(self.url, {"image": _image_upload()}, format="multipart")
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(LMS_RUN_JOBS_INLINE=False)
+    def test_thumbnails_are_generated_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.url, {"image": _image_upload()}, format="multipart")
+
+        self.assertEqual(response.json()["thumbnails"], {})
+        self.assertEqual(len(callbacks), 1)
+
+    def test_backfill_command_rehashes_legacy_images(self):
+        legacy = os.path.join(self.media_dir.name, "profiles", "legacy.png")
+        os.makedirs(os.path.dirname(legacy))
+        with open(legacy, "wb") as handle:
+            handle.write(_image_upload().read())
+        Profile.objects.filter(user=self.user).update(image="profiles/legacy.png")
+
+        call_command("generate_thumbnails", stdout=StringIO())
+
+        profile = Profile.objects.get(user=self.user)
+        self.assertTrue(profile.image.name.endswith("/original.png"))
+        self.assertIn("256", profile.image_thumbnails)
+
+
+class MediaServingTests(TestCase):
+    digest = "ab" * 32
+
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        overrides = override_settings(MEDIA_ROOT=self.media_dir.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.body = bytes(range(100))
+        for name in ("files/plain.png", f"profiles/ab/{self.digest}/original.png"):
+            path = os.path.join(self.media_dir.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as handle:
+                handle.write(self.body)
+
+    def _get(self, path="files/plain.png", **headers):
+        return self.client.get(f"/media/{path}", headers=headers)
+
+    def test_full_response_with_validators(self):
+        response = self._get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.body)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Cache-Control"], "public, no-cache")
+        self.assertRegex(response["ETag"], r'^"[0-9a-f]+-64"$')
+
+    def test_content_hashed_paths_are_immutable(self):
+        response = self._get(f"profiles/ab/{self.digest}/original.png")
+
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self._get()["ETag"]
+
+        response = self._get(If_None_Match=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_byte_ranges(self):
+        response = self._get(Range="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.body[10:20])
+        self.assertEqual(response["Content-Range"], "bytes 10-19/100")
+        self.assertEqual(response["Content-Length"], "10")
+
+        suffix = self._get(Range="bytes=-5")
+        self.assertEqual(b"".join(suffix.streaming_content), self.body[-5:])
+
+        unsatisfiable = self._get(Range="bytes=200-")
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable["Content-Range"], "bytes */100")
+
+    def test_stale_if_range_serves_whole_file(self):
+        response = self._get(Range="bytes=10-19", If_Range='"stale"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.body)
+
+    def test_parse_range_ignores_multiple_ranges(self):
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=0-500", 100), (0, 99))
+
+    def test_paths_outside_media_root_are_not_found(self):
+        self.assertEqual(self._get("../secret.txt").status_code, 404)
+        self.assertEqual(self._get("files").status_code, 404)
+        self.assertEqual(self._get("files/missing.png").status_code, 404)
+
+    @override_settings(LMS_MEDIA_ACCEL="x-accel-redirect", LMS_MEDIA_ACCEL_PREFIX="/internal/")
+    def test_x_accel_redirect_mode(self):
+        response = self._get()
+
+        self.assertEqual(response["X-Accel-Redirect"], "/internal/files/plain.png")
+        self.assertEqual(response.content, b"")
+
+    @override_settings(LMS_MEDIA_ACCEL="x-sendfile")
+    def test_x_sendfile_mode(self):
+        response = self._get()
+
+        self.assertEqual(
+            response["X-Sendfile"], os.path.join(self.media_dir.name, "files", "plain.png")
+        )
@@ -0,0 +1,149 @@
+"""NDJSON export and import of a course with its chapters.
+
+The stream starts with one ``{"type": "course", ...}`` header line followed
+by one ``{"type": "chapter", ...}`` line per chapter in course order. Export
+reads chapters with an iterator so memory stays flat; import inserts them
+with batched ``bulk_create`` inside a single transaction.
+"""
+
+import json
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Chapter, Course
+from .progress import recompute_course_progress
+from .search import get_search_backend
+from .signals import touch_courses
+
+FORMAT_VERSION = 1
+CHAPTER_FIELDS = ("title", "summary", "content", "is_public", "order")
+
+
+class TransferError(ValueError):
+    """Raised for a malformed import stream; the message names the line."""
+
+
+def _line(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def export_course_lines(course, chunk_size=100):
+    yield _line({
+        "type": "course",
+        "format": FORMAT_VERSION,
+        "title": course.title,
+        "description": course.description,
+    })
+    chapters = (
+        Chapter.objects.filter(course=course)
+        .order_by("order", "id")
+        .values(*CHAPTER_FIELDS)
+    )
+    for chapter in chapters.iterator(chunk_size=chunk_size):
+        yield _line({"type": "chapter", **chapter})
+
+
+def _records(lines):
+    for number, raw in enumerate(lines, start=1):
+        if isinstance(raw, bytes):
+            try:
+                raw = raw.decode("utf-8")
+            except UnicodeDecodeError:
+                raise TransferError(f"Line {number}: not valid UTF-8")
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError as exc:
+            raise TransferError(f"Line {number}: invalid JSON ({exc})")
+        if not isinstance(record, dict):
+            raise TransferError(f"Line {number}: expected a JSON object")
+        yield number, record
+
+
+def _chapter_from_record(number, record, course, order_offset):
+    title = record.get("title")
+    if not isinstance(title, str) or not title:
+        raise TransferError(f"Line {number}: chapter title is required")
+    order = record.get("order") or 0
+    # bool is an int subclass; neither it nor a float is a valid order.
+    if isinstance(order, bool) or not isinstance(order, int) or order < 0:
+        raise TransferError(f"Line {number}: chapter order must be a non-negative integer")
+    summary = record.get("summary") or ""
+    if not isinstance(summary, str):
+        raise TransferError(f"Line {number}: chapter summary must be a string")
+    content = record.get("content") or []
+    if not isinstance(content, (list, dict, str)):
+        raise TransferError(f"Line {number}: chapter content must be a list of nodes")
+    is_public = record.get("is_public", True)
+    if not isinstance(is_public, bool):
+        raise TransferError(f"Line {number}: chapter is_public must be true or false")
+    chapter = Chapter(
+        course=course,
+        title=title[:255],
+        summary=summary,
+        content=content,
+        is_public=is_public,
+        order=order_offset + order,
+    )
+    # bulk_create bypasses save(), so render the cached HTML here.
+    chapter.render_content()
+    return chapter
+
+
+def import_course_lines(lines, instructor, course=None, batch_size=200):
+    """Import an NDJSON stream and return ``(course, chapter_count)``.
+
+    Without ``course`` a new course is created from the header line;
+    otherwise the chapters are appended after the course's existing ones.
+    """
+    records = _records(lines)
+    created = 0
+    with transaction.atomic():
+        first = next(records, None)
+        if first is None or first[1].get("type") != "course":
+            raise TransferError("Line 1: expected a course header")
+        number, header = first
+        if header.get("format", FORMAT_VERSION) != FORMAT_VERSION:
+            raise TransferError(f"Unsupported export format {header.get('format')}")
+        title = header.get("title") or "Imported course"
+        if not isinstance(title, str):
+            raise TransferError(f"Line {number}: course title must be a string")
+        description = header.get("description") or ""
+        if not isinstance(description, str):
+            raise TransferError(f"Line {number}: course description must be a string")
+
+        if course is None:
+            course = Course.objects.create(
+                instructor=instructor, title=title[:255], description=description
+            )
+            order_offset = 0
+        else:
+            # Start after the last chapter: exported orders begin at 0.
+            last = course.chapters.aggregate(last=Max("order"))["last"]
+            order_offset = 0 if last is None else last + 1
+
+        search = get_search_backend()
+        batch = []
+
+        def flush():
+            for chapter in Chapter.objects.bulk_create(batch):
+                search.index_chapter(chapter)
+            batch.clear()
+
+        for number, record in records:
+            if record.get("type") != "chapter":
+                raise TransferError(f"Line {number}: expected a chapter record")
+            batch.append(_chapter_from_record(number, record, course, order_offset))
+            created += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+        # bulk_create skips the chapter signals that keep progress current.
+        recompute_course_progress(course.id)
+        touch_courses([course.id])
+    return course, created
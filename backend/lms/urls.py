@@ -1,24 +1,46 @@
 from django.urls import path
+from .stream import notification_stream
 from .views import (
     RegisterView,
     UserProfileView,
+    ProfileImageUploadView,
 
     # Courses
     InstructorCourseListCreateView,
     InstructorCourseDetailView,
+    InstructorCourseRosterView,
+    InstructorBulkEnrollmentView,
+    InstructorCourseCompletionView,
+    InstructorAnalyticsView,
+    InstructorCourseExportView,
+    InstructorCourseImportView,
     StudentCourseListView,
     StudentMyCoursesView,
+    StudentCourseDetailView,
     StudentJoinCourseView,
 
     # Chapters
     InstructorChapterListCreateView,
     InstructorChapterDetailView,
+    InstructorChapterReorderView,
     StudentChapterListView,
     StudentChapterDetailView,
 
     # Notifications
     NotificationListView,
+    NotificationJobDetailView,
     send_course_notification,
+    mark_announcements_read,
+    unread_notification_count,
+    mark_notifications_read,
+
+    # Search
+    search,
+
+    # Progress
+    progress_heartbeats,
+    StudentProgressView,
+    StudentCourseProgressView,
 )
 
 urlpatterns = [
@@ -26,14 +48,36 @@ urlpatterns = [
     path("register/", RegisterView.as_view()),
     path("user/", UserProfileView.as_view()),
     path("me/", UserProfileView.as_view()),
+    path("profile/upload-image/", ProfileImageUploadView.as_view()),
 
     # ---------------- INSTRUCTOR COURSES ----------------
     path("courses/instructor/", InstructorCourseListCreateView.as_view()),
+    path("courses/instructor/analytics/", InstructorAnalyticsView.as_view()),
     path("courses/instructor/<int:pk>/", InstructorCourseDetailView.as_view()),
+    path(
+        "courses/instructor/<int:course_id>/students/",
+        InstructorCourseRosterView.as_view(),
+        name="instructor-course-roster"
+    ),
+    path(
+        "courses/instructor/<int:course_id>/students/bulk/",
+        InstructorBulkEnrollmentView.as_view(),
+        name="instructor-bulk-enrollment"
+    ),
+    path(
+        "courses/instructor/<int:course_id>/completion/",
+        InstructorCourseCompletionView.as_view(),
+        name="instructor-course-completion"
+    ),
+
+    path("courses/instructor/import/", InstructorCourseImportView.as_view()),
+    path("courses/instructor/<int:course_id>/export/", InstructorCourseExportView.as_view()),
+    path("courses/instructor/<int:course_id>/import/", InstructorCourseImportView.as_view()),
 
     # ---------------- STUDENT COURSES ----------------
     path("courses/", StudentCourseListView.as_view()),
     path("courses/my/", StudentMyCoursesView.as_view()),
+    path("courses/<int:pk>/", StudentCourseDetailView.as_view()),
     path("courses/<int:course_id>/join/", StudentJoinCourseView.as_view()),
 
     # ========== CHAPTERS ==========
@@ -46,6 +90,13 @@ urlpatterns = [
         name="instructor-chapters"
     ),
 
+    # Instructor reorder all chapters of a course in one request
+    path(
+        "courses/instructor/<int:course_id>/chapters/reorder/",
+        InstructorChapterReorderView.as_view(),
+        name="instructor-chapters-reorder"
+    ),
+
     # Instructor edit/delete chapter
     path(
         "chapters/instructor/<int:pk>/",
@@ -70,4 +121,17 @@ urlpatterns = [
     # ---------------- NOTIFICATIONS ----------------
     path("notifications/", NotificationListView.as_view()),
     path("courses/<int:course_id>/notify/", send_course_notification),
+    path("notifications/jobs/<int:pk>/", NotificationJobDetailView.as_view()),
+    path("notifications/announcements/read/", mark_announcements_read),
+    path("notifications/unread-count/", unread_notification_count),
+    path("notifications/read/", mark_notifications_read),
+    path("notifications/stream/", notification_stream),
+
+    # ---------------- SEARCH ----------------
+    path("search/", search),
+
+    # ---------------- PROGRESS ----------------
+    path("progress/heartbeats/", progress_heartbeats),
+    path("progress/my/", StudentProgressView.as_view()),
+    path("courses/<int:course_id>/progress/", StudentCourseProgressView.as_view()),
 ]
@@ -1,22 +1,143 @@
+from datetime import timedelta
+
 from rest_framework import generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.db.models import (
+    CharField, Count, DateTimeField, Exists, F, IntegerField, OuterRef, Prefetch, Q, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce, Trunc
 from .permissions import IsInstructor, IsStudent
-from .models import Course, Chapter, Notification
+from .jobs import enqueue_course_notification
+from .models import (
+    Course, Enrollment, Chapter, ChapterProgress, Notification, NotificationJob,
+    Announcement, AnnouncementCursor, Profile,
+)
+from .cache import (
+    CATALOG, VersionedCacheMixin, bump_versions, chapter_course_id, chapter_scope, course_scope,
+    get_versions, instructor_scope, student_scope,
+)
+from .signals import touch_courses
+from .transfer import TransferError, export_course_lines, import_course_lines
+from .roster import sync_enrollments
+from .progress import record_heartbeats
+from .images import ImageUploadError, save_profile_image
+from .parsers import ENROLL, UNENROLL, EnrollmentCSVParser
+from .conditional import ConditionalGetMixin
+from .routers import ReplicaReadMixin
+from .search import get_search_backend
+from .pagination import RosterPagination, CatalogCursorPagination, FeedCursorPagination
 from .serializers import (
     RegisterSerializer,
     CourseSerializer,
+    CatalogCourseSerializer,
+    EnrollmentSerializer,
     ChapterSerializer,
-    NotificationSerializer,
+    ChapterHtmlSerializer,
+    ChapterOutlineSerializer,
+    NotificationJobSerializer,
+    FeedItemSerializer,
+    HeartbeatBatchSerializer,
+    ChapterProgressSerializer,
+    ProfileSerializer,
 )
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.parsers import JSONParser, MultiPartParser
 
 
 def _resolve_course_id(kwargs):
     return kwargs.get("course_id") or kwargs.get("courseId") or kwargs.get("id")
 
 
+def _parse_timestamp(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValidationError({name: "Expected an ISO 8601 timestamp."})
+    return parsed
+
+
+def _catalog_validators(scopes):
+    """(last_modified, version) for course lists, from one cache read.
+
+    Every course write bumps the catalog version and every enrollment write
+    its student's version (see ``lms/signals.py``), so together they version
+    any course list; the ETag adds the path and user. No query runs, however
+    large the catalog.
+    """
+    return None, "|".join(str(version) for version in get_versions(scopes))
+
+
+def _job_payload(job):
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/notifications/jobs/{job.id}/",
+    }
+
+
+def _notify_course(course, author, title, message):
+    """Deliver a course-wide message and return the payload describing it.
+
+    By default the message is stored once as an Announcement and merged into
+    each student's feed on read. LMS_COURSE_NOTIFICATION_MODE = "fanout"
+    instead copies it to every student through a NotificationJob.
+    """
+    if getattr(settings, "LMS_COURSE_NOTIFICATION_MODE", "announcement") == "fanout":
+        job = enqueue_course_notification(course, author, title, message)
+        return _job_payload(job)
+
+    announcement = Announcement.objects.create(
+        course=course, author=author, title=title, message=message
+    )
+    return {"announcement_id": announcement.id}
+
+
+def _per_course(queryset, aggregate):
+    """Correlated subquery computing ``aggregate`` over the outer course's rows."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(course_id=OuterRef("pk"))
+            .order_by()
+            .values("course_id")
+            .annotate(total=aggregate)
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def _with_course_list_data(queryset):
+    # Join the instructor, count students in SQL and prefetch student ids so
+    # CourseSerializer runs a fixed number of queries for any page size.
+    # The count is a correlated subquery so it is not skewed by querysets that
+    # already filter on the students join (e.g. user.enrolled_courses).
+    student_counts = (
+        Course.students.through.objects.filter(course_id=OuterRef("pk"))
+        .order_by()
+        .values("course_id")
+        .annotate(total=Count("user_id"))
+        .values("total")
+    )
+    return queryset.select_related("instructor").annotate(
+        num_students=Coalesce(
+            Subquery(student_counts, output_field=IntegerField()), 0
+        )
+    ).prefetch_related(
+        Prefetch("students", queryset=User.objects.only("id"))
+    )
+
+
 # ==========================================
 # AUTH
 # ==========================================
@@ -32,6 +153,25 @@ class UserProfileView(generics.RetrieveAPIView):
         return self.request.user
 
 
+class ProfileImageUploadView(generics.GenericAPIView):
+    """Replace the user's profile image; thumbnails follow asynchronously."""
+
+    serializer_class = ProfileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("image")
+        if upload is None:
+            raise ValidationError({"image": "This field is required."})
+        profile, _ = Profile.objects.get_or_create(user_id=request.user.pk)
+        try:
+            save_profile_image(profile, upload)
+        except ImageUploadError as exc:
+            raise ValidationError({"image": str(exc)})
+        return Response(self.get_serializer(profile).data, status=201)
+
+
 class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
@@ -49,7 +189,9 @@ class InstructorCourseListCreateView(generics.ListCreateAPIView):
       
         user = getattr(self.request, "user", None)
         if user and user.is_authenticated:
-            return Course.objects.filter(instructor=user).order_by("-created_at")
+            return _with_course_list_data(
+                Course.objects.filter(instructor=user)
+            ).order_by("-created_at")
        
         return Course.objects.none()
 
@@ -69,71 +211,267 @@ class InstructorCourseDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Course.objects.filter(instructor=self.request.user)
 
     def retrieve(self, request, *args, **kwargs):
-      
+
         course = self.get_object()
-   
+
         if getattr(course, "instructor", None) != request.user:
             raise PermissionDenied("You are not the instructor of this course.")
 
         base = self.get_serializer(course).data
 
-        students_data = []
-        through = getattr(course.students, "through", None)
-        
-        grade_fields = ("grade", "score", "final_grade", "progress")
+        # Only the first roster page is inlined; the full roster is served
+        # paginated by InstructorCourseRosterView.
+        first_page = _roster_queryset(course.id)[:RosterPagination.page_size]
+        base["students_detail"] = EnrollmentSerializer(first_page, many=True).data
+        base["roster_url"] = f"/api/courses/instructor/{course.id}/students/"
+        return Response(base)
 
-        for student in course.students.all():
-            s = {
-                "id": student.id,
-                "username": getattr(student, "username", None),
-                "email": getattr(student, "email", None),
-                "first_name": getattr(student, "first_name", None),
-                "last_name": getattr(student, "last_name", None),
-            }
 
+ROSTER_ORDERING = {
+    "enrolled_at": "enrolled_at",
+    "username": "user__username",
+    "grade": "grade",
+    "progress": "progress",
+}
+
+
+def _roster_queryset(course_id, ordering="enrolled_at"):
+    descending = ordering.startswith("-")
+    field = ROSTER_ORDERING.get(ordering.lstrip("-"), "enrolled_at")
+    prefix = "-" if descending else ""
+    return (
+        Enrollment.objects.filter(course_id=course_id)
+        .select_related("user")
+        .only(
+            "enrolled_at", "grade", "progress", "course_id",
+            "user__id", "user__username", "user__email",
+            "user__first_name", "user__last_name",
+        )
+        .order_by(f"{prefix}{field}", f"{prefix}id")
+    )
 
-            student_grade = None
-            try:
-                if through:
-                 
-                    user_field = None
-                    course_field = None
-                    for f in through._meta.fields:
-          
-                        rel_model = getattr(f, "related_model", None)
-                        if rel_model is not None:
-                            if rel_model == type(student):
-                                user_field = f.name
-                            if rel_model == type(course):
-                                course_field = f.name
-                   
-                    user_field = user_field or "user" if "user" in [f.name for f in through._meta.fields] else user_field
-                    course_field = course_field or "course" if "course" in [f.name for f in through._meta.fields] else course_field
-
-                    if user_field and course_field:
-                        rel = through.objects.filter(**{user_field: student, course_field: course}).first()
-                        if rel:
-                            for gf in grade_fields:
-                                if hasattr(rel, gf):
-                                    student_grade = getattr(rel, gf)
-                                    break
-            except Exception:
-                student_grade = None
-
-            s["grade"] = student_grade
-            students_data.append(s)
-
-        base["students_detail"] = students_data
-        return Response(base)
 
+class InstructorCourseRosterView(generics.ListAPIView):
+    serializer_class = EnrollmentSerializer
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+    pagination_class = RosterPagination
+
+    def get_queryset(self):
+        course_id = _resolve_course_id(self.kwargs)
+        if not Course.objects.filter(id=course_id, instructor=self.request.user).exists():
+            raise PermissionDenied("You are not the instructor of this course.")
+        ordering = self.request.query_params.get("ordering", "enrolled_at")
+        return _roster_queryset(course_id, ordering)
+
+
+class InstructorBulkEnrollmentView(generics.GenericAPIView):
+    """Enroll and unenroll many students at once, e.g. from a roster export.
+
+    Accepts JSON ``{"enroll": [...], "unenroll": [...]}`` (a bare list means
+    enroll) or a ``text/csv`` body of ``identifier[,action]`` rows, where an
+    identifier is a user id or a username. Open to the course's instructor
+    and to staff users.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [JSONParser, EnrollmentCSVParser]
+
+    def _identifiers(self, data, key):
+        values = data.get(key, [])
+        if not isinstance(values, list) or not all(
+            isinstance(v, (int, str)) and not isinstance(v, bool) for v in values
+        ):
+            raise ValidationError({key: "Expected a list of user ids or usernames."})
+        return values
 
-class InstructorChapterListCreateView(generics.ListCreateAPIView):
+    def post(self, request, course_id=None):
+        cid = course_id or _resolve_course_id(self.kwargs)
+        course = Course.objects.filter(id=cid).only("id", "instructor_id").first()
+        if course is None:
+            return Response({"error": "Course not found"}, status=404)
+        if course.instructor_id != request.user.pk and not request.user.is_staff:
+            raise PermissionDenied("You are not the instructor of this course.")
+
+        data = request.data
+        if isinstance(data, list):
+            data = {ENROLL: data}
+        if not isinstance(data, dict):
+            raise ValidationError("Expected an object with enroll/unenroll lists.")
+        try:
+            summary = sync_enrollments(
+                course,
+                enroll=self._identifiers(data, ENROLL),
+                unenroll=self._identifiers(data, UNENROLL),
+                batch_size=getattr(settings, "LMS_ENROLLMENT_BATCH_SIZE", 500),
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        return Response(summary)
+
+
+class InstructorCourseCompletionView(generics.GenericAPIView):
+    """Chapter completion rates and average course completion.
+
+    Reads the materialized counters from ``lms/completion.py`` in two
+    queries, independent of how many progress rows the course has.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+
+    def get(self, request, course_id=None):
+        cid = course_id or _resolve_course_id(self.kwargs)
+        course = (
+            Course.objects.filter(id=cid, instructor=request.user)
+            .annotate(
+                student_count=_per_course(Enrollment.objects.all(), Count("id")),
+                progress_sum=Coalesce(F("completion_stats__progress_sum"), 0),
+                completed_students=Coalesce(F("completion_stats__completed_students"), 0),
+            )
+            .values("id", "student_count", "progress_sum", "completed_students")
+            .first()
+        )
+        if course is None:
+            return Response({"error": "Course not found"}, status=404)
+
+        students = course["student_count"]
+        chapters = (
+            Chapter.objects.filter(course_id=cid)
+            .order_by("order", "id")
+            .values(
+                "id", "title", "order", "is_public",
+                opened=Coalesce(F("completion_stats__opened"), 0),
+                completed=Coalesce(F("completion_stats__completed"), 0),
+            )
+        )
+        return Response({
+            "course": course["id"],
+            "students": students,
+            "completed_students": course["completed_students"],
+            "average_completion": (
+                round(course["progress_sum"] / students, 1) if students else 0
+            ),
+            "chapters": [
+                {
+                    **chapter,
+                    "completion_rate": (
+                        round(100 * chapter["completed"] / students, 1) if students else 0
+                    ),
+                }
+                for chapter in chapters
+            ],
+        })
+
+
+# Trunc kinds and their approximate length in days.
+ANALYTICS_BUCKETS = {"day": 1, "week": 7, "month": 30}
+
+
+class InstructorAnalyticsView(VersionedCacheMixin, generics.RetrieveAPIView):
+    """Totals across all of the instructor's courses for the dashboard.
+
+    Three aggregate queries, however many courses: per-course counts,
+    unique students, and new enrollments per ``?bucket=day|week|month``
+    (default week) since ``?since=`` (default twelve buckets ago).
+    Responses are cached per instructor until one of their courses changes.
+    Job delivery counts can lag by up to ``LMS_RESPONSE_CACHE_TIMEOUT``.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+    cache_per_user = True
+
+    def get_cache_scopes(self):
+        course_ids = Course.objects.filter(instructor_id=self.request.user.pk).values_list(
+            "id", flat=True
+        )
+        return [instructor_scope(self.request.user.pk)] + [
+            course_scope(pk) for pk in course_ids
+        ]
+
+    def retrieve(self, request, *args, **kwargs):
+        bucket = request.query_params.get("bucket", "week")
+        if bucket not in ANALYTICS_BUCKETS:
+            raise ValidationError({"bucket": f"Expected one of {', '.join(ANALYTICS_BUCKETS)}."})
+        since = _parse_timestamp(request.query_params, "since") or (
+            timezone.now() - timedelta(days=12 * ANALYTICS_BUCKETS[bucket])
+        )
+        instructor_id = request.user.pk
+
+        courses = list(
+            Course.objects.filter(instructor_id=instructor_id)
+            .order_by("-created_at", "-id")
+            .annotate(
+                enrollment_count=_per_course(Enrollment.objects.all(), Count("id")),
+                chapter_count=_per_course(Chapter.objects.all(), Count("id")),
+                announcement_count=_per_course(Announcement.objects.all(), Count("id")),
+                notifications_sent=_per_course(NotificationJob.objects.all(), Sum("sent")),
+            )
+            .values(
+                "id", "title", "enrollment_count", "chapter_count",
+                "announcement_count", "notifications_sent",
+            )
+        )
+        unique_students = (
+            Enrollment.objects.filter(course__instructor_id=instructor_id)
+            .aggregate(total=Count("user_id", distinct=True))["total"]
+        )
+        enrollments_over_time = (
+            Enrollment.objects.filter(
+                course__instructor_id=instructor_id, enrolled_at__gte=since
+            )
+            .annotate(bucket=Trunc("enrolled_at", bucket))
+            .order_by("bucket")
+            .values("bucket")
+            .annotate(count=Count("id"))
+            .values("bucket", "count")
+        )
+
+        return Response({
+            "totals": {
+                "courses": len(courses),
+                "enrollments": sum(c["enrollment_count"] for c in courses),
+                "unique_students": unique_students,
+                "chapters": sum(c["chapter_count"] for c in courses),
+                "announcements": sum(c["announcement_count"] for c in courses),
+                "notifications_sent": sum(c["notifications_sent"] for c in courses),
+            },
+            "courses": courses,
+            "bucket": bucket,
+            "since": since,
+            "enrollments_over_time": list(enrollments_over_time),
+        })
+
+
+class ChapterOutlineMixin:
+    """``?outline=true`` lists chapters without loading their content columns."""
+
+    outline_fields = ("id", "course_id", "title", "summary", "order", "is_public", "word_count")
+
+    def _wants_outline(self):
+        return (
+            self.request.method == "GET"
+            and self.request.query_params.get("outline", "").lower() in ("1", "true")
+        )
+
+    def outline_queryset(self, queryset):
+        if self._wants_outline():
+            return queryset.only(*self.outline_fields)
+        return queryset.select_related("course")
+
+    def get_serializer_class(self):
+        if self._wants_outline():
+            return ChapterOutlineSerializer
+        return super().get_serializer_class()
+
+
+class InstructorChapterListCreateView(ChapterOutlineMixin, generics.ListCreateAPIView):
     serializer_class = ChapterSerializer
     permission_classes = [permissions.IsAuthenticated, IsInstructor]
 
     def get_queryset(self):
         course_id = _resolve_course_id(self.kwargs)
-        return Chapter.objects.filter(course__id=course_id, course__instructor=self.request.user)
+        return self.outline_queryset(
+            Chapter.objects.filter(course__id=course_id, course__instructor=self.request.user)
+        )
 
     def perform_create(self, serializer):
         course_id = _resolve_course_id(self.kwargs)
@@ -141,12 +479,117 @@ class InstructorChapterListCreateView(generics.ListCreateAPIView):
         chapter = serializer.save(course=course)
 
         # Notify all students
-        for student in course.students.all():
-            Notification.objects.create(
-                user=student,
-                title=f"New Chapter: {chapter.title}",
-                message=f"A new chapter was added to {course.title}."
+        self.notification = _notify_course(
+            course,
+            self.request.user,
+            title=f"New Chapter: {chapter.title}",
+            message=f"A new chapter was added to {course.title}.",
+        )
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data["notification"] = self.notification
+        return response
+
+
+class InstructorChapterReorderView(generics.GenericAPIView):
+    """Set the order of every chapter in a course from one ordered id list."""
+
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+    serializer_class = ChapterOutlineSerializer
+
+    def post(self, request, course_id=None):
+        cid = course_id or _resolve_course_id(self.kwargs)
+        if not Course.objects.filter(id=cid, instructor=request.user).exists():
+            raise PermissionDenied("You are not the instructor of this course.")
+
+        if not isinstance(request.data, dict):
+            raise ValidationError("Expected a JSON object.")
+        ordered_ids = request.data.get("order")
+        if not isinstance(ordered_ids, list) or not all(
+            isinstance(pk, int) and not isinstance(pk, bool) for pk in ordered_ids
+        ):
+            raise ValidationError({"order": "Expected a list of chapter ids."})
+
+        outline_fields = ChapterOutlineMixin.outline_fields
+        with transaction.atomic():
+            chapters = list(
+                Chapter.objects.select_for_update()
+                .filter(course_id=cid)
+                .only(*outline_fields, "updated_at")
+            )
+            by_id = {chapter.id: chapter for chapter in chapters}
+            if len(ordered_ids) != len(by_id) or set(ordered_ids) != set(by_id):
+                raise ValidationError(
+                    {"order": "Must list every chapter of the course exactly once."}
+                )
+
+            now = timezone.now()
+            changed = []
+            for position, pk in enumerate(ordered_ids, start=1):
+                chapter = by_id[pk]
+                if chapter.order != position:
+                    chapter.order = position
+                    chapter.updated_at = now
+                    changed.append(chapter)
+            if changed:
+                Chapter.objects.bulk_update(changed, ["order", "updated_at"])
+                # bulk_update skips signals; invalidate what they would have.
+                touch_courses([cid])
+                bump_versions([chapter_scope(chapter.id) for chapter in changed])
+
+        outline = [by_id[pk] for pk in ordered_ids]
+        return Response(
+            {"updated": len(changed), "chapters": self.get_serializer(outline, many=True).data}
+        )
+
+
+class InstructorCourseExportView(generics.GenericAPIView):
+    """Stream a course and its chapters as NDJSON."""
+
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+
+    def get(self, request, course_id=None):
+        cid = course_id or _resolve_course_id(self.kwargs)
+        try:
+            course = Course.objects.get(id=cid, instructor=request.user)
+        except Course.DoesNotExist:
+            return Response({"error": "Course not found"}, status=404)
+
+        response = StreamingHttpResponse(
+            export_course_lines(course), content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = f'attachment; filename="course-{course.id}.ndjson"'
+        return response
+
+
+class InstructorCourseImportView(generics.GenericAPIView):
+    """Import an NDJSON export as a new course, or append it to ``course_id``.
+
+    The request body is the raw NDJSON stream and is read line by line.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+
+    def post(self, request, course_id=None):
+        course = None
+        if course_id is not None:
+            try:
+                course = Course.objects.get(id=course_id, instructor=request.user)
+            except Course.DoesNotExist:
+                return Response({"error": "Course not found"}, status=404)
+
+        stream = request.stream
+        if stream is None:
+            return Response({"error": "Empty import"}, status=400)
+        try:
+            course, created = import_course_lines(
+                iter(stream.readline, b""), request.user, course=course
             )
+        except TransferError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        return Response({"course": course.id, "chapters": created}, status=status.HTTP_201_CREATED)
 
 
 class InstructorChapterDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -163,32 +606,189 @@ class InstructorChapterDetailView(generics.RetrieveUpdateDestroyAPIView):
 # STUDENT COURSE VIEWS
 # ==========================================
 
-class StudentChapterListView(generics.ListAPIView):
+class StudentChapterListView(
+    ReplicaReadMixin, ConditionalGetMixin, VersionedCacheMixin, ChapterOutlineMixin,
+    generics.ListAPIView,
+):
     serializer_class = ChapterSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_cache_scopes(self):
+        return [course_scope(_resolve_course_id(self.kwargs))]
+
+    def get_validators(self):
+        # Chapter writes bump Course.updated_at, so it versions the list.
+        updated_at = (
+            Course.objects.filter(pk=_resolve_course_id(self.kwargs))
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+        if updated_at is None:
+            return None, None
+        return updated_at, updated_at.isoformat()
+
     def get_queryset(self):
         course_id = _resolve_course_id(self.kwargs)
-        return Chapter.objects.filter(
+        return self.outline_queryset(Chapter.objects.filter(
             course_id=course_id,
             is_public=True
-        ).order_by("order")
+        ).order_by("order", "id"))
     
-class StudentChapterDetailView(generics.RetrieveAPIView):
+class ChapterFormatNegotiation(DefaultContentNegotiation):
+    # ``?format=html`` picks the server-rendered chapter body; the response
+    # itself is still JSON, so don't let DRF treat it as a renderer name.
+    def select_renderer(self, request, renderers, format_suffix=None):
+        if request.query_params.get(self.settings.URL_FORMAT_OVERRIDE) == "html":
+            format_suffix = "json"
+        return super().select_renderer(request, renderers, format_suffix)
+
+
+class StudentChapterDetailView(
+    ReplicaReadMixin, ConditionalGetMixin, VersionedCacheMixin, generics.RetrieveAPIView
+):
     serializer_class = ChapterSerializer
     permission_classes = [permissions.IsAuthenticated]
+    content_negotiation_class = ChapterFormatNegotiation
+
+    def get_cache_scopes(self):
+        course_id = chapter_course_id(self.kwargs["pk"])
+        if course_id is None:
+            return None
+        # The course scope covers the embedded course_title.
+        return [chapter_scope(self.kwargs["pk"]), course_scope(course_id)]
+
+    def get_validators(self):
+        # The response embeds the course title, so a course edit counts too.
+        stamps = (
+            Chapter.objects.filter(pk=self.kwargs["pk"], is_public=True)
+            .values_list("updated_at", "course__updated_at")
+            .first()
+        )
+        if stamps is None:
+            return None, None
+        return max(stamps), "|".join(stamp.isoformat() for stamp in stamps)
+
+    def _wants_html(self):
+        return self.request.query_params.get("format") == "html"
 
     def get_queryset(self):
-        return Chapter.objects.filter(is_public=True)
+        queryset = Chapter.objects.filter(is_public=True).select_related("course")
+        if self._wants_html():
+            return queryset.defer("content")
+        return queryset
+
+    def get_serializer_class(self):
+        if self._wants_html():
+            return ChapterHtmlSerializer
+        return ChapterSerializer
+
+    def get_object(self):
+        chapter = super().get_object()
+        # Rows written without save() (bulk imports) have no render yet.
+        if self._wants_html() and not chapter.content_hash:
+            chapter.render_content()
+            Chapter.objects.filter(pk=chapter.pk).update(
+                content_html=chapter.content_html,
+                content_hash=chapter.content_hash,
+                word_count=chapter.word_count,
+            )
+        return chapter
+
 
 
+CATALOG_ORDERINGS = {
+    "newest": ("-created_at", "-id"),
+    "title": ("title", "id"),
+    "-title": ("-title", "-id"),
+}
+
+
+class StudentCourseListView(
+    ReplicaReadMixin, ConditionalGetMixin, VersionedCacheMixin, generics.ListAPIView
+):
+    """Course catalog, cursor-paginated newest first.
+
+    Filters: ``search=<text>`` (title or description, via the search
+    backend), ``instructor=<id>``, ``created_after``/``created_before``
+    (ISO timestamps) and ``enrolled=true|false`` for the current user.
+    ``ordering`` is a key of ``CATALOG_ORDERINGS``, each backed by an index.
+    """
+
+    serializer_class = CatalogCourseSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CatalogCursorPagination
+
+    def get_ordering(self):
+        ordering = self.request.query_params.get("ordering", "newest")
+        if ordering not in CATALOG_ORDERINGS:
+            raise ValidationError(
+                {"ordering": f"Expected one of: {', '.join(CATALOG_ORDERINGS)}."}
+            )
+        return CATALOG_ORDERINGS[ordering]
+
+    def get_validators(self):
+        return _catalog_validators(self.get_cache_scopes())
+
+    def get_cache_scopes(self):
+        if self.cache_per_user:
+            return [CATALOG, student_scope(self.request.user.pk)]
+        return [CATALOG]
+
+    @property
+    def cache_per_user(self):
+        return "enrolled" in self.request.query_params
+
+    def get_queryset(self):
+        return self.get_filtered_courses().select_related("instructor")
+
+    def get_filtered_courses(self):
+        params = self.request.query_params
+        queryset = Course.objects.all()
+
+        search = params.get("search", "").strip()
+        if search:
+            queryset = get_search_backend(queryset.db).filter_courses(queryset, search)
+
+        instructor = params.get("instructor")
+        if instructor is not None:
+            if not instructor.isdigit():
+                raise ValidationError({"instructor": "Expected a user id."})
+            queryset = queryset.filter(instructor_id=int(instructor))
+
+        created_after = _parse_timestamp(params, "created_after")
+        if created_after is not None:
+            queryset = queryset.filter(created_at__gte=created_after)
+        created_before = _parse_timestamp(params, "created_before")
+        if created_before is not None:
+            queryset = queryset.filter(created_at__lt=created_before)
+
+        enrolled = params.get("enrolled")
+        if enrolled is not None:
+            if enrolled.lower() not in ("true", "false", "1", "0"):
+                raise ValidationError({"enrolled": "Expected true or false."})
+            is_enrolled = Exists(
+                Enrollment.objects.filter(course_id=OuterRef("pk"), user=self.request.user)
+            )
+            if enrolled.lower() in ("true", "1"):
+                queryset = queryset.filter(is_enrolled)
+            else:
+                queryset = queryset.filter(~is_enrolled)
+
+        return queryset
+
+
+class StudentCourseDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
+    """One catalog course, so clients never scan the catalog to find it."""
 
-class StudentCourseListView(generics.ListAPIView):
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_validators(self):
+        # Course edits and enrollments both bump the course's version.
+        return _catalog_validators([course_scope(self.kwargs["pk"])])
+
     def get_queryset(self):
-        return Course.objects.all()
+        return _with_course_list_data(Course.objects.all())
     
 from rest_framework.response import Response
 from rest_framework import status
@@ -218,12 +818,15 @@ class StudentJoinCourseView(generics.GenericAPIView):
 
 
 
-class StudentMyCoursesView(generics.ListAPIView):
-    serializer_class = CourseSerializer
+class StudentMyCoursesView(ConditionalGetMixin, generics.ListAPIView):
+    serializer_class = CatalogCourseSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_validators(self):
+        return _catalog_validators([CATALOG, student_scope(self.request.user.pk)])
+
     def get_queryset(self):
-        return self.request.user.enrolled_courses.all()
+        return self.request.user.enrolled_courses.select_related("instructor")
 
 
 @api_view(["POST"])
@@ -294,20 +897,236 @@ def send_course_notification(request, course_id=None):
     if not title or not message:
         return Response({"error": "Title and message required"}, status=400)
 
+    payload = _notify_course(course, request.user, title, message)
 
-    for student in course.students.all():
-        Notification.objects.create(
-            user=student,
-            title=title,
-            message=message,
+    if "job_id" in payload:
+        return Response(
+            {"message": "Notification queued", **payload},
+            status=status.HTTP_202_ACCEPTED,
         )
+    return Response(
+        {"message": "Notification sent", **payload},
+        status=status.HTTP_201_CREATED,
+    )
 
-    return Response({"message": "Notification sent"})
 
-class NotificationListView(generics.ListAPIView):
-    serializer_class = NotificationSerializer
+class NotificationJobDetailView(generics.RetrieveAPIView):
+    serializer_class = NotificationJobSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user).order_by("-created_at")
+        return NotificationJob.objects.filter(created_by=self.request.user)
+
+# Tie-break rank for rows sharing a created_at, so the feed order
+# (-created_at, -kind rank, -id) is total across both tables.
+FEED_KIND_RANK = {"announcement": 0, "notification": 1}
+
+
+def _feed_keyset(kind, position):
+    """Filter selecting rows of ``kind`` that sort after ``position``."""
+    created_at, position_kind, position_id = position
+    rank, position_rank = FEED_KIND_RANK[kind], FEED_KIND_RANK.get(position_kind, 0)
+    if rank < position_rank:
+        return Q(created_at__lte=created_at)
+    if rank > position_rank:
+        return Q(created_at__lt=created_at)
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=position_id)
+
+
+def _notification_feed(user, before=None, since=None):
+    personal = Notification.objects.filter(user=user)
+    # Only announcements posted while the user was enrolled, matching what
+    # the old per-student fan-out delivered.
+    announcements = Announcement.objects.filter(
+        course__enrollments__user=user,
+        created_at__gte=F("course__enrollments__enrolled_at"),
+    )
+    if before is not None:
+        personal = personal.filter(_feed_keyset("notification", before))
+        announcements = announcements.filter(_feed_keyset("announcement", before))
+    if since is not None:
+        personal = personal.filter(created_at__gt=since)
+        announcements = announcements.filter(created_at__gt=since)
+
+    # Both halves select the same model fields followed by the same
+    # annotations so the UNION columns line up.
+    personal = personal.annotate(
+        kind=Value("notification", output_field=CharField()),
+        kind_rank=Value(FEED_KIND_RANK["notification"], output_field=IntegerField()),
+        course_ref=Value(None, output_field=IntegerField()),
+        read_ref=F("read_at"),
+    ).values(
+        "id", "title", "message", "created_at", "kind", "kind_rank", "course_ref", "read_ref"
+    )
+    announcements = announcements.annotate(
+        kind=Value("announcement", output_field=CharField()),
+        kind_rank=Value(FEED_KIND_RANK["announcement"], output_field=IntegerField()),
+        course_ref=F("course_id"),
+        read_ref=Value(None, output_field=DateTimeField()),
+    ).values(
+        "id", "title", "message", "created_at", "kind", "kind_rank", "course_ref", "read_ref"
+    )
+    return personal.union(announcements, all=True).order_by(
+        "-created_at", "-kind_rank", "-id"
+    )
+
 
+class NotificationListView(ReplicaReadMixin, generics.ListAPIView):
+    """Merged notification feed with keyset pagination.
+
+    ``?cursor=`` continues from the ``next`` link of a previous page and
+    ``?since=<ISO timestamp>`` limits the feed to newer items for polling.
+    """
+
+    serializer_class = FeedItemSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedCursorPagination
+
+    def list(self, request, *args, **kwargs):
+        since = _parse_timestamp(request.query_params, "since")
+
+        paginator = self.paginator
+        position = paginator.decode_cursor(request)
+        page_size = paginator.get_page_size(request)
+        rows = list(
+            _notification_feed(request.user, before=position, since=since)[:page_size + 1]
+        )
+        page = paginator.paginate_rows(rows, request)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["announcements_read_at"] = (
+            AnnouncementCursor.objects.filter(user=self.request.user)
+            .values_list("last_read_at", flat=True)
+            .first()
+        )
+        return context
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def mark_announcements_read(request):
+    cursor, _ = AnnouncementCursor.objects.update_or_create(
+        user=request.user, defaults={"last_read_at": timezone.now()}
+    )
+    return Response({"last_read_at": cursor.last_read_at})
+
+
+def _unread_announcements(user_id):
+    read_at = (
+        AnnouncementCursor.objects.filter(user_id=user_id)
+        .values_list("last_read_at", flat=True)
+        .first()
+    )
+    announcements = Announcement.objects.filter(
+        course__enrollments__user_id=user_id,
+        created_at__gte=F("course__enrollments__enrolled_at"),
+    )
+    if read_at is not None:
+        announcements = announcements.filter(created_at__gt=read_at)
+    return announcements
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def unread_notification_count(request):
+    """Badge count from the partial unread index and the announcement cursor."""
+    user_id = request.user.pk
+    notifications = Notification.objects.filter(user_id=user_id, read_at__isnull=True).count()
+    announcements = _unread_announcements(user_id).count()
+    return Response({
+        "notifications": notifications,
+        "announcements": announcements,
+        "total": notifications + announcements,
+    })
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def mark_notifications_read(request):
+    """Mark ``{"ids": [...]}`` or, with ``{"all": true}``, everything as read.
+
+    Personal notifications are updated in one UPDATE; ``all`` also moves
+    the announcement cursor.
+    """
+    if not isinstance(request.data, dict):
+        raise ValidationError("Expected a JSON object.")
+    now = timezone.now()
+    unread = Notification.objects.filter(user_id=request.user.pk, read_at__isnull=True)
+    if request.data.get("all") is True:
+        updated = unread.update(read_at=now)
+        AnnouncementCursor.objects.update_or_create(
+            user_id=request.user.pk, defaults={"last_read_at": now}
+        )
+        return Response({"updated": updated, "read_at": now})
+
+    ids = request.data.get("ids")
+    if not isinstance(ids, list) or not all(
+        isinstance(pk, int) and not isinstance(pk, bool) for pk in ids
+    ):
+        raise ValidationError({"ids": "Expected a list of notification ids, or all=true."})
+    updated = unread.filter(id__in=ids).update(read_at=now) if ids else 0
+    return Response({"updated": updated, "read_at": now})
+
+
+# ==========================================
+# SEARCH
+# ==========================================
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def search(request):
+    query = (request.query_params.get("q") or "").strip()
+    if not query:
+        return Response({"error": "Query parameter q is required"}, status=400)
+    try:
+        limit = min(max(int(request.query_params.get("limit", 20)), 1), 50)
+    except ValueError:
+        return Response({"error": "limit must be an integer"}, status=400)
+
+    return Response({"results": get_search_backend().search(query, limit=limit)})
+
+
+
+# ==========================================
+# PROGRESS
+# ==========================================
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated, IsStudent])
+def progress_heartbeats(request):
+    """Ingest a batch of ``{"events": [...]}`` reading heartbeats."""
+    serializer = HeartbeatBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    summary = record_heartbeats(request.user, serializer.validated_data["events"])
+    return Response(summary)
+
+
+class StudentProgressView(generics.GenericAPIView):
+    """Completion percentage of each of the student's courses."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        # The F() and ordering reuse the filter's join to the user's enrollment.
+        courses = (
+            Course.objects.filter(enrollments__user_id=request.user.pk)
+            .order_by("-enrollments__enrolled_at")
+            .values("id", "title", progress=F("enrollments__progress"))
+        )
+        return Response(list(courses))
+
+
+class StudentCourseProgressView(generics.ListAPIView):
+    """The student's per-chapter progress in one course."""
+
+    serializer_class = ChapterProgressSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return ChapterProgress.objects.filter(
+            user_id=self.request.user.pk, course_id=_resolve_course_id(self.kwargs)
+        ).order_by("chapter__order", "chapter_id")
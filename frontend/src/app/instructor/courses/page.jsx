@@ -73,34 +73,11 @@ export default function MyCourses() {
 
     async function loadCourses() {
       try {
-        let uid = null;
-        try {
-          const meRes = await api.get("/me/");
-          uid = meRes.data?.id;
-        } catch {
-          // ignore
-        }
-
-        try {
-          const res = await api.get("/courses/instructor/");
-          setCourses(res.data || []);
-        } catch (err) {
-          try {
-            const allRes = await api.get("/courses/");
-            const all = allRes.data || [];
-            const filtered = uid
-              ? all.filter((c) =>
-                  [c.instructor, c.instructor_id, c.owner, c.creator, c.user].includes(uid)
-                )
-              : [];
-            setCourses(filtered);
-          } catch (err2) {
-            console.error("Failed to fetch courses (primary and fallback):", err, err2);
-            setCourses([]);
-          }
-        }
+        const res = await api.get("/courses/instructor/");
+        setCourses(res.data || []);
       } catch (err) {
         console.error("Failed to load instructor courses", err);
+        setCourses([]);
       }
     }
 
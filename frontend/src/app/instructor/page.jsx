@@ -25,40 +25,11 @@ export default function InstructorDashboard() {
       const meRes = await api.get("/me/");
       setUser(meRes.data);
 
-      let instructorCourses = [];
-      try {
-        const coursesRes = await api.get("/courses/instructor/");
-        instructorCourses = coursesRes.data || [];
-      } catch (err) {
-        try {
-          const allRes = await api.get("/courses/");
-          const all = allRes.data || [];
-          const uid = meRes.data?.id;
-
-          instructorCourses = all.filter((c) => {
-            return (
-              c.instructor === uid ||
-              c.instructor_id === uid ||
-              c.owner === uid ||
-              c.creator === uid ||
-              c.user === uid
-            );
-          });
-        } catch (err2) {
-          instructorCourses = [];
-        }
-      }
-
-      const coursesCount = instructorCourses.length;
-
-      const studentsCount = instructorCourses.reduce((acc, c) => {
-        const count =
-          c.student_count ??
-          c.enrolled_count ??
-          c.students_count ??
-          (Array.isArray(c.students) ? c.students.length : 0);
-        return acc + (typeof count === "number" ? count : 0);
-      }, 0);
+      // Totals are aggregated server-side in a fixed number of queries.
+      const analyticsRes = await api.get("/courses/instructor/analytics/");
+      const totals = analyticsRes.data?.totals || {};
+      const coursesCount = totals.courses ?? 0;
+      const studentsCount = totals.unique_students ?? 0;
 
       setStats({ courses: coursesCount, students: studentsCount });
     } catch (err) {
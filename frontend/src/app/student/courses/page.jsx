@@ -3,21 +3,25 @@
 import { useEffect, useState } from "react";
 import ProtectedRoute from "@/components/ProtectedRoute";
 import Link from "next/link";
-import api from "@/lib/api";
+import api, { listResults } from "@/lib/api";
 import { motion } from "framer-motion";
 
+const SEARCH_DEBOUNCE_MS = 300;
+
 export default function StudentCourseList() {
   const [courses, setCourses] = useState([]);
-  const [filteredCourses, setFilteredCourses] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [joining, setJoining] = useState({});
   const [joinedIds, setJoinedIds] = useState(new Set());
   const [missingIdCourses, setMissingIdCourses] = useState([]);
 
 
   const [search, setSearch] = useState("");
-  const [category, setCategory] = useState("all");
-  const [sort, setSort] = useState("title-asc");
+  const [debouncedSearch, setDebouncedSearch] = useState("");
+  const [enrolled, setEnrolled] = useState("all");
+  const [ordering, setOrdering] = useState("newest");
 
 
   const difficultyColors = {
@@ -27,23 +31,55 @@ export default function StudentCourseList() {
   };
 
   useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(search.trim()), SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [search]);
+
+  function showPage(data, append) {
+    const list = listResults(data);
+    const missing = list.filter((c) => c == null || c.id == null);
+    setMissingIdCourses((prev) => (append ? [...prev, ...missing] : missing));
+    setCourses((prev) => (append ? [...prev, ...list] : list));
+    setNextUrl(data?.next ?? null);
+  }
+
+  // The catalog is cursor-paginated: search, filtering and sorting run on
+  // the server, and further pages are fetched by following `next`.
+  useEffect(() => {
+    let active = true;
+
     async function loadCourses() {
+      setLoading(true);
+      const params = { ordering };
+      if (debouncedSearch) params.search = debouncedSearch;
+      if (enrolled !== "all") params.enrolled = enrolled;
       try {
-        const res = await api.get("/courses/");
-        const missing = (res.data || []).filter(
-          (c) => c == null || c.id == null
-        );
-        setMissingIdCourses(missing);
-        setCourses(res.data || []);
-        setFilteredCourses(res.data || []);
-        setLoading(false);
+        const res = await api.get("/courses/", { params });
+        if (active) showPage(res.data, false);
       } catch (err) {
         console.error("Failed to load courses", err);
-        setLoading(false);
+      } finally {
+        if (active) setLoading(false);
       }
     }
     loadCourses();
-  }, []);
+    return () => {
+      active = false;
+    };
+  }, [debouncedSearch, enrolled, ordering]);
+
+  async function loadMore() {
+    if (!nextUrl || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const res = await api.get(nextUrl);
+      showPage(res.data, true);
+    } catch (err) {
+      console.error("Failed to load more courses", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
 
   async function joinCourse(courseId) {
     if (joining[courseId]) return;
@@ -60,49 +96,6 @@ export default function StudentCourseList() {
     }
   }
 
-  useEffect(() => {
-    let updated = [...courses];
-
-    if (search.trim()) {
-      updated = updated.filter(
-        (c) =>
-          c.title?.toLowerCase().includes(search.toLowerCase()) ||
-          c.description?.toLowerCase().includes(search.toLowerCase())
-      );
-    }
-
-    if (category !== "all") {
-      updated = updated.filter((c) => c.category === category);
-    }
-
-    updated.sort((a, b) => {
-      switch (sort) {
-        case "title-asc":
-          return a.title.localeCompare(b.title);
-        case "title-desc":
-          return b.title.localeCompare(a.title);
-        case "enrollment":
-          return (b.enrollment_count ?? 0) - (a.enrollment_count ?? 0);
-        case "difficulty":
-          const diffOrder = { Beginner: 1, Intermediate: 2, Advanced: 3 };
-          return diffOrder[a.difficulty] - diffOrder[b.difficulty];
-        default:
-          return 0;
-      }
-    });
-
-    setFilteredCourses(updated);
-  }, [search, category, sort, courses]);
-
-  if (loading)
-    return <div className="p-10 text-center text-xl">Loading courses…</div>;
-
-
-  const uniqueCategories = [
-    "all",
-    ...new Set(courses.map((c) => c.category).filter(Boolean)),
-  ];
-
   return (
     <ProtectedRoute>
       <div className="p-8 max-w-7xl mx-auto">
@@ -141,32 +134,33 @@ export default function StudentCourseList() {
           />
 
           <select
-            value={category}
-            onChange={(e) => setCategory(e.target.value)}
+            value={enrolled}
+            onChange={(e) => setEnrolled(e.target.value)}
             className="px-4 py-2 border rounded-lg shadow-sm"
           >
-            {uniqueCategories.map((cat) => (
-              <option key={cat} value={cat}>
-                {cat === "all" ? "All Categories" : cat}
-              </option>
-            ))}
+            <option value="all">All Courses</option>
+            <option value="false">Not Joined</option>
+            <option value="true">Joined</option>
           </select>
 
           <select
-            value={sort}
-            onChange={(e) => setSort(e.target.value)}
+            value={ordering}
+            onChange={(e) => setOrdering(e.target.value)}
             className="px-4 py-2 border rounded-lg shadow-sm"
           >
-            <option value="title-asc">Title A–Z</option>
-            <option value="title-desc">Title Z–A</option>
-            <option value="enrollment">Most Enrolled</option>
-            <option value="difficulty">Difficulty</option>
+            <option value="newest">Newest</option>
+            <option value="title">Title A–Z</option>
+            <option value="-title">Title Z–A</option>
           </select>
         </div>
 
+        {loading && (
+          <div className="p-10 text-center text-xl">Loading courses…</div>
+        )}
+
         <div className="grid gap-8 mt-10 grid-cols-1 sm:grid-cols-2 lg:grid-cols-3">
-          {filteredCourses.map((course, i) => {
-            const identifier = course?.id ?? course?.slug;
+          {!loading && courses.map((course, i) => {
+            const identifier = course?.id;
             const hasId = course.id != null;
 
             return (
@@ -174,7 +168,7 @@ export default function StudentCourseList() {
                 key={identifier ?? i}
                 initial={{ opacity: 0, y: 35 }}
                 animate={{ opacity: 1, y: 0 }}
-                transition={{ delay: i * 0.06 }}
+                transition={{ delay: (i % 24) * 0.06 }}
                 whileHover={{ scale: 1.03 }}
                 className="bg-white shadow-lg border rounded-2xl overflow-hidden flex flex-col"
               >
@@ -206,9 +200,6 @@ export default function StudentCourseList() {
                     />
                     <div>
                       <p className="font-medium">{course.instructor_name || "Instructor"}</p>
-                      <p className="text-sm text-gray-600">
-                        {course.enrollment_count ?? 0} enrolled
-                      </p>
                     </div>
                   </div>
 
@@ -243,6 +234,18 @@ export default function StudentCourseList() {
             );
           })}
         </div>
+
+        {!loading && nextUrl && (
+          <div className="mt-10 text-center">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-6 py-2 border rounded-lg shadow-sm hover:bg-gray-50 disabled:opacity-60"
+            >
+              {loadingMore ? "Loading…" : "Load more"}
+            </button>
+          </div>
+        )}
       </div>
     </ProtectedRoute>
   );
@@ -18,4 +18,10 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Paginated endpoints (e.g. the course catalog) wrap rows in `results`.
+export function listResults(data) {
+  if (Array.isArray(data)) return data;
+  return data?.results || [];
+}
+
 export default api;
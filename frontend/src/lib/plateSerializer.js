@@ -41,7 +41,7 @@ function nodeToHtml(node) {
       return `<pre><code>${inner}</code></pre>`;
     case "a":
       {
-        const url = node.url || node.href || "#";
+        const url = safeUrl(node.url || node.href);
         return `<a href="${escapeAttr(url)}" target="_blank" rel="noopener noreferrer">${inner}</a>`;
       }
     default:
@@ -69,8 +69,19 @@ function escapeHtml(str) {
     .replace(/'/g, "&#39;");
 }
 
+const SAFE_URL_SCHEMES = ["http", "https", "mailto"];
+
+// Relative and http(s)/mailto links only; anything else (javascript:,
+// data:, ...) becomes "#". Mirrors safe_url in backend/lms/plate.py.
+function safeUrl(url) {
+  if (typeof url !== "string" || !url) return "#";
+  const match = url.replace(/[\x00-\x20\x7f]/g, "").match(/^([a-zA-Z][a-zA-Z0-9+.-]*):/);
+  if (match && !SAFE_URL_SCHEMES.includes(match[1].toLowerCase())) return "#";
+  return url;
+}
+
 function escapeAttr(str) {
-  return String(str).replace(/"/g, "&quot;").replace(/'/g, "&#39;");
+  return String(str).replace(/&/g, "&amp;").replace(/"/g, "&quot;").replace(/'/g, "&#39;");
 }
 
 // Very small HTML -> Plate nodes converter (best-effort).